@@ -0,0 +1,771 @@
+"""
+BattleBuddy Discord Bot application.
+
+``BattleBuddyBot`` owns everything the bot needs at runtime: the database,
+the hot-reloadable roster, the selection engine, the rate limiter and the
+metrics registry. Each service is built the first time it is used, and
+``setup_hook`` builds the database and roster on a worker thread before
+the gateway connects. Creating a bot therefore neither touches the disk
+nor compiles the roster.
+
+The slash commands are defined once at module level and added to every
+bot's command tree. They reach the bot's services through
+``interaction.client``.
+
+Use ``bot.create_bot`` to build a bot from the settings in ``config.py``.
+"""
+import asyncio
+import logging
+import math
+import os
+import signal
+from functools import cached_property
+from typing import Dict, List, Optional
+
+import discord
+from discord import app_commands
+from discord.ext import commands, tasks
+
+from async_database import AsyncDatabase
+from command_queue import CommandQueue, auto_defer, respond
+from command_sync import CommandSyncer
+from database import Database
+from metrics import Metrics, record_error, start_metrics_server, timed_command
+from roster import GameIndex
+from roster_store import RosterStore
+from selection import FAVORITES, UNIFORM, SelectionEngine
+from sharding import collect_shard_health, shard_options_from_env
+from utils.rate_limit import RateLimiter, create_backend
+from utils.time_window import parse_window
+from views import StatsPages, StatsView
+
+logger = logging.getLogger(__name__)
+
+class BattleBuddyBot(commands.AutoShardedBot):
+    """The BattleBuddy bot and the services its commands use."""
+
+    def __init__(self, settings, worker_id: int = 0, run_maintenance: bool = True,
+                 force_sync: bool = False, worker_count: int = 1):
+        """Create the bot without opening the database or loading the roster.
+
+        Args:
+            settings: Object with the attributes defined in ``config.py``
+            worker_id (int): Launcher worker number (0 when run directly)
+            run_maintenance (bool): Whether this process runs the jobs only
+                one process should run: command sync and pick compaction
+            force_sync (bool): Sync slash commands even if they look unchanged
+            worker_count (int): Number of launcher workers (1 when run directly)
+        """
+        intents = discord.Intents.default()
+        intents.message_content = True  # Required for message content access
+        intents.members = True          # Required for member-related operations
+        intents.guilds = True          # Required for server-related operations
+        # Runs every shard, or the range launcher.py assigned to this worker
+        shard_options = shard_options_from_env() if settings.SHARDING_ENABLED else {'shard_count': 1}
+        super().__init__(command_prefix=settings.COMMAND_PREFIX, intents=intents,
+                         description=settings.BOT_DESCRIPTION, **shard_options)
+        self.settings = settings
+        self.worker_id = worker_id
+        self.worker_count = worker_count
+        self.run_maintenance = run_maintenance
+        self.force_sync = force_sync
+
+        # Latency histograms for every command and database query
+        self.metrics = Metrics()
+        self.metrics_server: Optional[asyncio.AbstractServer] = None
+
+        # Bounds how many commands run at once and defers slow responses
+        self.command_queue = CommandQueue(settings.COMMAND_WORKERS, settings.COMMAND_QUEUE_SIZE,
+                                          settings.COMMAND_DEFER_AFTER)
+
+        # Last gateway event seen per shard, for health reports
+        self.shard_states: Dict[int, str] = {}
+
+        self.flush_picks = tasks.loop(seconds=settings.PICK_FLUSH_INTERVAL)(self._flush_picks)
+        self.compact_pick_events = tasks.loop(seconds=settings.PICK_ROLLUP_INTERVAL)(self._compact_pick_events)
+        self.reload_roster = tasks.loop(seconds=settings.ROSTER_RELOAD_INTERVAL)(self._reload_roster)
+        self.report_shard_health = tasks.loop(seconds=settings.SHARD_HEALTH_INTERVAL)(self._report_shard_health)
+
+        for command in COMMANDS:
+            self.tree.add_command(command)
+        self.tree.error(self.on_app_command_error)
+
+    @cached_property
+    def db(self) -> AsyncDatabase:
+        """Database with write-behind pick recording.
+
+        Handlers use the async facade so SQLite I/O runs on worker threads,
+        not the event loop.
+        """
+        settings = self.settings
+        return AsyncDatabase(Database(
+            settings.DATABASE_PATH,
+            pick_flush_interval=settings.PICK_FLUSH_INTERVAL,
+            pick_flush_threshold=settings.PICK_FLUSH_MAX_PENDING,
+            pool_size=settings.DATABASE_POOL_SIZE,
+            pragmas=settings.DATABASE_PRAGMAS,
+            cached_statements=settings.DATABASE_CACHED_STATEMENTS,
+            favorites_cache_size=settings.FAVORITES_CACHE_SIZE,
+            favorites_cache_ttl=settings.FAVORITES_CACHE_TTL,
+            favorite_changes_interval=settings.FAVORITES_CHANGES_INTERVAL,
+            hourly_retention=settings.PICK_HOURLY_RETENTION,
+            daily_retention=settings.PICK_DAILY_RETENTION,
+            rankings=settings.STATS_IN_MEMORY and self.worker_count == 1,
+            metrics=self.metrics
+        ))
+
+    @cached_property
+    def stats_pages(self) -> StatsPages:
+        """Paginated /stats pages, fetched lazily and cached briefly."""
+        return StatsPages(self.db, page_size=self.settings.STATS_PAGE_SIZE,
+                          cache_ttl=self.settings.STATS_PAGE_CACHE_TTL)
+
+    @cached_property
+    def roster_store(self) -> RosterStore:
+        """Game roster, reloaded when its data file changes.
+
+        Commands read ``roster_store.current`` once so a reload never
+        changes it mid-command.
+        """
+        return RosterStore(self.settings.ROSTER_PATH)
+
+    @cached_property
+    def selector(self) -> SelectionEngine:
+        """Weighted character selection for the /who and /random modes."""
+        settings = self.settings
+        return SelectionEngine(
+            favorite_boost=settings.SELECTION_FAVORITE_BOOST,
+            fresh_boost=settings.SELECTION_FRESH_BOOST,
+            fresh_horizon=settings.SELECTION_FRESH_HORIZON,
+            avoid_last=settings.SELECTION_AVOID_LAST,
+            rebuild_interval=settings.SELECTION_REBUILD_INTERVAL
+        )
+
+    @cached_property
+    def rate_limiter(self) -> RateLimiter:
+        """Token-bucket limiter shared by every command.
+
+        Shared by every shard and worker when the sqlite backend is
+        configured, or by default when the launcher runs several workers.
+        """
+        settings = self.settings
+        return RateLimiter(settings.RATE_LIMITS,
+                           create_backend(settings.RATE_LIMIT_BACKEND, settings.RATE_LIMIT_DB_PATH,
+                                          self.worker_count))
+
+    @cached_property
+    def command_syncer(self) -> CommandSyncer:
+        """Syncs slash commands only when they changed since the last sync."""
+        return CommandSyncer(self.tree, self.settings.COMMAND_SYNC_STATE_PATH, force=self.force_sync)
+
+    async def setup_hook(self):
+        """Open the database and load the roster before connecting.
+
+        Both block on disk I/O, so they run on a worker thread. Also makes
+        SIGTERM close the bot the way Ctrl+C does.
+        """
+        loop = asyncio.get_running_loop()
+        # launcher.py, systemd and docker stop the bot with SIGTERM. Without a
+        # handler the process dies before bot.main calls shutdown() and
+        # buffered picks are lost.
+        try:
+            loop.add_signal_handler(signal.SIGTERM, lambda: asyncio.ensure_future(self.close()))
+        except (NotImplementedError, RuntimeError):
+            # Windows event loops and threads other than the main thread
+            logger.debug("Cannot handle SIGTERM here, buffered picks are only flushed on Ctrl+C")
+        await loop.run_in_executor(None, lambda: (self.db, self.roster_store, self.rate_limiter))
+
+    def shutdown(self):
+        """Close the database and rate limiter if they were opened.
+
+        Persists any picks still buffered in memory. This blocks, so call
+        it after the event loop has stopped.
+        """
+        if 'db' in self.__dict__:
+            self.db.close()
+        if 'rate_limiter' in self.__dict__:
+            self.rate_limiter.close()
+
+    async def _flush_picks(self):
+        """Periodically write buffered character picks to the database.
+
+        Picks are also flushed when the buffer fills up; this loop makes sure
+        picks from a quiet period do not wait longer than PICK_FLUSH_INTERVAL.
+        """
+        try:
+            await self.db.flush_picks()
+        except Exception as e:
+            logger.error("Error flushing character picks: %s", e)
+
+    async def _compact_pick_events(self):
+        """Periodically roll pick events up into hourly and daily totals.
+
+        Keeps the pick event log small so windowed /stats queries stay fast.
+        """
+        try:
+            await self.db.compact_pick_events()
+        except Exception as e:
+            logger.error("Error compacting pick events: %s", e)
+
+    async def _reload_roster(self):
+        """Periodically swap in the roster file if it changed."""
+        try:
+            await self.roster_store.refresh()
+        except Exception as e:
+            logger.error("Error reloading roster: %s", e)
+
+    async def _report_shard_health(self):
+        """Periodically store the health of this process's shards in the database."""
+        try:
+            await self.db.report_shard_health(self.worker_id, os.getpid(),
+                                              collect_shard_health(self, self.shard_states))
+        except Exception as e:
+            logger.error("Error reporting shard health: %s", e)
+
+    async def on_shard_connect(self, shard_id: int):
+        """Track a shard's gateway connection."""
+        self.shard_states[shard_id] = 'connected'
+
+    async def on_shard_ready(self, shard_id: int):
+        """Track a shard becoming ready."""
+        self.shard_states[shard_id] = 'ready'
+        logger.info("Shard %s ready", shard_id)
+
+    async def on_shard_resumed(self, shard_id: int):
+        """Track a shard resuming its session."""
+        self.shard_states[shard_id] = 'ready'
+        logger.info("Shard %s resumed", shard_id)
+
+    async def on_shard_disconnect(self, shard_id: int):
+        """Track a shard losing its gateway connection."""
+        self.shard_states[shard_id] = 'disconnected'
+        logger.warning("Shard %s disconnected", shard_id)
+
+    async def on_ready(self):
+        """Event handler for when the bot is ready.
+
+        Performs two main tasks:
+        1. Logs successful bot login and starts background jobs and the
+           metrics endpoint
+        2. Syncs slash commands with Discord if they changed (only in the
+           process running maintenance, see launcher.py)
+
+        Note:
+            Command sync is required for slash commands to work properly
+            and must be done after the bot is ready. on_ready fires again on
+            reconnects, so the sync is skipped when the command tree hash
+            matches the last synced one (see command_sync.py).
+        """
+        logger.info("Logged in as %s", self.user.name)
+        port = self.settings.METRICS_PORT
+        if self.metrics_server is None and port is not None:
+            port += self.worker_id
+            try:
+                self.metrics_server = await start_metrics_server(self.metrics, self.settings.METRICS_HOST, port)
+                logger.info("Serving metrics on http://%s:%s/metrics", self.settings.METRICS_HOST, port)
+            except OSError as e:
+                logger.error("Could not start the metrics endpoint: %s", e)
+        if not self.flush_picks.is_running():
+            self.flush_picks.start()
+        if not self.reload_roster.is_running():
+            self.reload_roster.start()
+        if not self.report_shard_health.is_running():
+            self.report_shard_health.start()
+        if not self.run_maintenance:
+            return
+        if not self.compact_pick_events.is_running():
+            self.compact_pick_events.start()
+        try:
+            await self.command_syncer.sync()
+        except Exception as e:
+            logger.error("Failed to sync commands: %s", e)
+
+    async def on_command_error(self, ctx, error):
+        """Event handler for command errors"""
+        if isinstance(error, commands.CommandNotFound):
+            await ctx.send("Command not found. Use `/help` to see available commands.")
+        elif isinstance(error, commands.MissingPermissions):
+            await ctx.send("You don't have permission to use this command.")
+        else:
+            logger.error("Command error: %s", error)
+            await ctx.send("An error occurred while processing your command.")
+
+    async def on_app_command_error(self, interaction: discord.Interaction,
+                                   error: app_commands.AppCommandError):
+        """Event handler for application command errors"""
+        if isinstance(error, app_commands.CommandOnCooldown):
+            await respond(
+                interaction,
+                f"This command is on cooldown. Try again in {error.retry_after:.1f}s",
+                ephemeral=True
+            )
+        else:
+            logger.error("Application command error: %s", error)
+            await respond(
+                interaction,
+                "An error occurred while processing your command.",
+                ephemeral=True
+            )
+
+# Selection modes offered by /who and /random
+MODE_CHOICES = [
+    app_commands.Choice(name="Uniform", value="uniform"),
+    app_commands.Choice(name="Favor my favorites", value="favorites"),
+    app_commands.Choice(name="Favor rarely picked", value="fresh"),
+    app_commands.Choice(name="Avoid my recent picks", value="avoid_recent"),
+]
+
+# Whose picks /stats counts
+SCOPE_CHOICES = [
+    app_commands.Choice(name="This server", value="server"),
+    app_commands.Choice(name="All servers", value="global"),
+]
+
+async def pick_character(interaction: discord.Interaction, game_index: GameIndex,
+                         role: Optional[str], mode: Optional[str]) -> str:
+    """Draw a character with the selection engine and record the pick.
+
+    Args:
+        interaction (discord.Interaction): The command interaction
+        game_index (GameIndex): Game from the roster snapshot the command uses
+        role (Optional[str]): Canonical role, if the draw is restricted to one
+        mode (Optional[str]): Selection mode, uniform if not given
+
+    Returns:
+        str: The chosen character
+    """
+    bot = interaction.client
+    game = game_index.name
+    mode = mode or UNIFORM
+    favorites = []
+    if mode == FAVORITES:
+        favorites = [character for favorite_game, character
+                     in await bot.db.get_favorites(interaction.user.id) if favorite_game == game]
+    character = bot.selector.pick(game_index, role, mode, interaction.user.id, favorites)
+    bot.selector.record_pick(game, character, interaction.user.id)
+    await bot.db.record_character_pick(game, character, interaction.user.id, interaction.guild_id)
+    return character
+
+async def enforce_rate_limit(interaction: discord.Interaction, command: str) -> bool:
+    """Take a rate limit token for a command use.
+
+    Args:
+        interaction (discord.Interaction): The command interaction
+        command (str): Command name used to look up its limits
+
+    Returns:
+        bool: True if the command may run. Otherwise the user has been told
+              how long to wait and the command should return.
+    """
+    retry_after = interaction.client.rate_limiter.acquire(command, interaction.user.id, interaction.guild_id)
+    if retry_after:
+        await respond(
+            interaction,
+            f"Please wait {math.ceil(retry_after)} seconds before using this command again.",
+            ephemeral=True
+        )
+        return False
+    return True
+
+@app_commands.command(name="who", description="Select a random character from a game")
+@app_commands.describe(mode="How characters are weighted")
+@app_commands.choices(mode=MODE_CHOICES)
+@timed_command
+@auto_defer
+async def who(interaction: discord.Interaction, game: str, role: Optional[str] = None,
+              mode: Optional[str] = None):
+    """Select a random character from a specified game, optionally filtered by role"""
+    try:
+        if not await enforce_rate_limit(interaction, "who"):
+            return
+
+        snapshot = interaction.client.roster_store.current
+        game_index = snapshot.roster.find_game(game)
+        if game_index is None:
+            await respond(
+                interaction,
+                snapshot.templates.game_not_found(game),
+                ephemeral=True
+            )
+            return
+        game = game_index.name
+
+        if role:
+            role_name = game_index.find_role(role)
+            if role_name is None or not game_index.by_role[role_name]:
+                await respond(
+                    interaction,
+                    snapshot.templates.role_not_found(role, game),
+                    ephemeral=True
+                )
+                return
+            role = role_name
+
+        character = await pick_character(interaction, game_index, role, mode)
+
+        embed = discord.Embed(
+            title="Character Selected",
+            description=f"Selected: **{character}**",
+            color=discord.Color.green()
+        )
+        embed.add_field(name="Game", value=game.capitalize(), inline=False)
+        embed.add_field(name="Role", value=game_index.role_of.get(character, "Unknown"), inline=False)
+        embed.set_footer(text=f"Requested by {interaction.user.name}")
+
+        await respond(interaction, embed=embed)
+    except Exception as e:
+        logger.error("Error in who command: %s", e)
+        record_error()
+        await respond(
+            interaction,
+            "An error occurred while processing your command. Please try again.",
+            ephemeral=True
+        )
+
+@app_commands.command(name="random", description="Select a random character from any game")
+@app_commands.describe(mode="How characters are weighted")
+@app_commands.choices(mode=MODE_CHOICES)
+@timed_command
+@auto_defer
+async def random(interaction: discord.Interaction, mode: Optional[str] = None):
+    """Select a random character from any game"""
+    try:
+        if not await enforce_rate_limit(interaction, "random"):
+            return
+
+        game_index = interaction.client.roster_store.current.roster.random_game()
+        game = game_index.name
+        character = await pick_character(interaction, game_index, None, mode)
+
+        embed = discord.Embed(
+            title="Random Character",
+            description=f"Selected: **{character}**",
+            color=discord.Color.green()
+        )
+        embed.add_field(name="Game", value=game.capitalize(), inline=False)
+        embed.add_field(name="Role", value=game_index.role_of.get(character, "Unknown"), inline=False)
+        embed.set_footer(text=f"Requested by {interaction.user.name}")
+
+        await respond(interaction, embed=embed)
+    except Exception as e:
+        logger.error("Error in random command: %s", e)
+        record_error()
+        await respond(
+            interaction,
+            "An error occurred while processing your command. Please try again.",
+            ephemeral=True
+        )
+
+@app_commands.command(name="team", description="Draft a role-balanced team from a game")
+@app_commands.describe(size="Number of players, up to the game's team size")
+@timed_command
+@auto_defer
+async def team(interaction: discord.Interaction, game: str, size: Optional[int] = None):
+    """Draft a whole team without duplicate characters in a single command"""
+    try:
+        if not await enforce_rate_limit(interaction, "team"):
+            return
+
+        bot = interaction.client
+        snapshot = bot.roster_store.current
+        game_index = snapshot.roster.find_game(game)
+        if game_index is None:
+            await respond(
+                interaction,
+                snapshot.templates.game_not_found(game),
+                ephemeral=True
+            )
+            return
+        game = game_index.name
+
+        max_size = game_index.settings.get('max_team_size')
+        if max_size is None:
+            await respond(
+                interaction,
+                f"Team drafts are not available for {game}.",
+                ephemeral=True
+            )
+            return
+        size = max_size if size is None else size
+        if not 1 <= size <= max_size:
+            await respond(
+                interaction,
+                f"Team size for {game} must be between 1 and {max_size}.",
+                ephemeral=True
+            )
+            return
+
+        drafted = bot.selector.draft_team(game_index, size, game_index.settings.get('role_quotas'))
+        characters = [character for character, _ in drafted]
+        for character in characters:
+            bot.selector.record_pick(game, character, interaction.user.id)
+        await bot.db.record_character_picks(game, characters, interaction.user.id, interaction.guild_id)
+
+        embed = discord.Embed(
+            title="Team Drafted",
+            description="\n".join(f"**{character}** - {role}" for character, role in drafted),
+            color=discord.Color.green()
+        )
+        embed.add_field(name="Game", value=game.capitalize(), inline=False)
+        embed.set_footer(text=f"Requested by {interaction.user.name}")
+
+        await respond(interaction, embed=embed)
+    except Exception as e:
+        logger.error("Error in team command: %s", e)
+        record_error()
+        await respond(
+            interaction,
+            "An error occurred while processing your command. Please try again.",
+            ephemeral=True
+        )
+
+@app_commands.command(name="stats", description="View character pick statistics")
+@app_commands.describe(window="Only count recent picks, e.g. 24h, 7d or 4w",
+                       scope="Count picks from this server (default) or all servers")
+@app_commands.choices(scope=SCOPE_CHOICES)
+@timed_command
+@auto_defer
+async def stats(interaction: discord.Interaction, game: Optional[str] = None,
+                window: Optional[str] = None, scope: Optional[str] = None):
+    """Display character pick statistics, optionally filtered by game, time window and scope"""
+    try:
+        if not await enforce_rate_limit(interaction, "stats"):
+            return
+
+        bot = interaction.client
+        window_seconds = None
+        if window:
+            window_seconds = parse_window(window)
+            retention = bot.settings.PICK_DAILY_RETENTION
+            if window_seconds is None or window_seconds > retention:
+                await respond(
+                    interaction,
+                    f"Invalid window '{window}'. Use a number followed by m, h, d or w "
+                    f"(up to {retention // 86400}d), e.g. 7d.",
+                    ephemeral=True
+                )
+                return
+
+        if game:
+            snapshot = bot.roster_store.current
+            game_index = snapshot.roster.find_game(game)
+            if game_index is None:
+                await respond(
+                    interaction,
+                    snapshot.templates.game_not_found(game),
+                    ephemeral=True
+                )
+                return
+            game = game_index.name
+
+        # Outside a server (in DMs) there is only the global view
+        guild_id = None if scope == "global" else interaction.guild_id
+        page = await bot.stats_pages.get(game, None, window_seconds, guild_id)
+        if not page.embed.fields:
+            await respond(
+                interaction,
+                "No statistics available yet.",
+                ephemeral=True
+            )
+            return
+
+        view = StatsView(bot.stats_pages, game, page, interaction.user, window=window_seconds,
+                         guild_id=guild_id)
+        await respond(interaction, embed=view.render(), view=view)
+    except Exception as e:
+        logger.error("Error in stats command: %s", e)
+        record_error()
+        await respond(
+            interaction,
+            "An error occurred while processing your command. Please try again.",
+            ephemeral=True
+        )
+
+@app_commands.command(name="favorite", description="Add/remove a character from your favorites")
+@timed_command
+@auto_defer
+async def favorite(interaction: discord.Interaction, game: str, character: str):
+    """Add or remove a character from a user's favorites"""
+    try:
+        if not await enforce_rate_limit(interaction, "favorite"):
+            return
+
+        snapshot = interaction.client.roster_store.current
+        game_index = snapshot.roster.find_game(game)
+        if game_index is None:
+            await respond(
+                interaction,
+                snapshot.templates.game_not_found(game),
+                ephemeral=True
+            )
+            return
+        game = game_index.name
+
+        character_name = game_index.find_character(character)
+        if character_name is None:
+            await respond(
+                interaction,
+                f"Character '{character}' not found in {game}.",
+                ephemeral=True
+            )
+            return
+        character = character_name
+
+        added = await interaction.client.db.toggle_favorite(interaction.user.id, game, character)
+        action = "added to" if added else "removed from"
+
+        embed = discord.Embed(
+            title="Favorite Updated",
+            description=f"**{character}** has been {action} your favorites.",
+            color=discord.Color.green()
+        )
+        embed.add_field(name="Game", value=game.capitalize(), inline=False)
+        embed.set_footer(text=f"Requested by {interaction.user.name}")
+
+        await respond(interaction, embed=embed)
+    except Exception as e:
+        logger.error("Error in favorite command: %s", e)
+        record_error()
+        await respond(
+            interaction,
+            "An error occurred while processing your command. Please try again.",
+            ephemeral=True
+        )
+
+@app_commands.command(name="favorites", description="View your favorite characters")
+@timed_command
+@auto_defer
+async def favorites(interaction: discord.Interaction):
+    """Display a user's favorite characters"""
+    try:
+        if not await enforce_rate_limit(interaction, "favorites"):
+            return
+
+        favorites = await interaction.client.db.get_favorites(interaction.user.id)
+        if not favorites:
+            await respond(
+                interaction,
+                "You don't have any favorite characters yet.",
+                ephemeral=True
+            )
+            return
+
+        embed = discord.Embed(
+            title="Your Favorites",
+            description="Your favorite characters:",
+            color=discord.Color.blue()
+        )
+
+        current_game = None
+        for game, character in favorites:
+            if current_game != game:
+                current_game = game
+                embed.add_field(name=game.capitalize(), value="", inline=False)
+            embed.add_field(name=character, value="", inline=True)
+
+        embed.set_footer(text=f"Requested by {interaction.user.name}")
+        await respond(interaction, embed=embed)
+    except Exception as e:
+        logger.error("Error in favorites command: %s", e)
+        record_error()
+        await respond(
+            interaction,
+            "An error occurred while processing your command. Please try again.",
+            ephemeral=True
+        )
+
+@app_commands.command(name="help", description="Display available commands and supported games")
+@timed_command
+@auto_defer
+async def help(interaction: discord.Interaction):
+    """Display help information and available commands"""
+    try:
+        if not await enforce_rate_limit(interaction, "help"):
+            return
+
+        embed = interaction.client.roster_store.current.templates.help_embed(interaction.user.name)
+        await respond(interaction, embed=embed)
+    except Exception as e:
+        logger.error("Error in help command: %s", e)
+        record_error()
+        await respond(
+            interaction,
+            "An error occurred while processing your command. Please try again.",
+            ephemeral=True
+        )
+
+@app_commands.command(name="botstats", description="Show command latency and error rates (admins only)")
+@app_commands.default_permissions(administrator=True)
+@app_commands.guild_only()
+@timed_command
+@auto_defer(ephemeral=True)
+async def botstats(interaction: discord.Interaction):
+    """Display per-command latency percentiles, error rates and where the time went"""
+    try:
+        if not interaction.permissions.administrator:
+            await respond(
+                interaction,
+                "Only server administrators can use this command.",
+                ephemeral=True
+            )
+            return
+        if not await enforce_rate_limit(interaction, "botstats"):
+            return
+
+        bot = interaction.client
+        embed = discord.Embed(
+            title="Bot Statistics",
+            description=f"Worker {bot.worker_id}, since <t:{int(bot.metrics.started)}:R>",
+            color=discord.Color.blue()
+        )
+        for summary in bot.metrics.command_summary()[:20]:
+            embed.add_field(
+                name=f"/{summary.command}",
+                value=(f"{summary.count} runs, {summary.errors / summary.count:.1%} errors, "
+                       f"{summary.deferred} deferred\n"
+                       f"p50 {summary.p50 * 1000:.0f}ms, p95 {summary.p95 * 1000:.0f}ms, "
+                       f"p99 {summary.p99 * 1000:.0f}ms\n"
+                       f"avg DB {summary.mean_db * 1000:.1f}ms, "
+                       f"Discord {summary.mean_discord * 1000:.1f}ms"),
+                inline=True
+            )
+        if not embed.fields:
+            embed.add_field(name="No data", value="No commands have run yet.", inline=False)
+        embed.set_footer(text="Full histograms: the local /metrics endpoint")
+        await respond(interaction, embed=embed, ephemeral=True)
+    except Exception as e:
+        logger.error("Error in botstats command: %s", e)
+        record_error()
+        await respond(
+            interaction,
+            "An error occurred while processing your command. Please try again.",
+            ephemeral=True
+        )
+
+def _choices(names: List[str]) -> List[app_commands.Choice[str]]:
+    """Convert names to autocomplete choices."""
+    return [app_commands.Choice(name=name, value=name) for name in names]
+
+async def game_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+    """Suggest game names as the user types"""
+    return _choices(interaction.client.roster_store.current.autocomplete.games.search(current))
+
+async def role_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+    """Suggest roles for the game chosen in the same command"""
+    autocomplete = interaction.client.roster_store.current.autocomplete
+    return _choices(autocomplete.search_roles(interaction.namespace.game, current))
+
+async def character_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+    """Suggest characters for the game chosen in the same command"""
+    autocomplete = interaction.client.roster_store.current.autocomplete
+    return _choices(autocomplete.search_characters(interaction.namespace.game, current))
+
+who.autocomplete('game')(game_autocomplete)
+who.autocomplete('role')(role_autocomplete)
+team.autocomplete('game')(game_autocomplete)
+stats.autocomplete('game')(game_autocomplete)
+favorite.autocomplete('game')(game_autocomplete)
+favorite.autocomplete('character')(character_autocomplete)
+
+# Slash commands added to every bot's command tree
+COMMANDS = [who, random, team, stats, favorite, favorites, help, botstats]
@@ -0,0 +1,132 @@
+"""
+Async database facade for BattleBuddy Discord bot.
+
+The ``Database`` class does blocking ``sqlite3`` I/O. Calling it directly
+from a slash-command handler stalls the discord.py event loop (and with it
+heartbeats and every other guild's interactions) for as long as the disk
+takes. ``AsyncDatabase`` wraps a ``Database`` and runs every query on
+worker threads instead:
+
+1. Writes go through a single dedicated writer thread, so they are applied
+   in submission order and never contend with each other for SQLite's
+   write lock
+2. Reads run on a small pool of reader threads and can proceed while a
+   write is in progress
+"""
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+
+from database import Database
+from metrics import phase
+
+logger = logging.getLogger(__name__)
+
+class AsyncDatabase:
+    """Awaitable wrapper around ``Database``.
+
+    Every method mirrors the ``Database`` method of the same name but
+    returns a coroutine that completes once the query has run on a
+    worker thread.
+    """
+
+    def __init__(self, database: Database, reader_threads: int = 2):
+        """Start the writer thread and reader pool.
+
+        Args:
+            database (Database): The synchronous database to wrap
+            reader_threads (int): Number of threads serving read queries
+        """
+        self.database = database
+        # A single-worker executor is a dedicated thread fed by a request queue
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='battlebuddy-db-writer')
+        self._readers = ThreadPoolExecutor(max_workers=max(1, reader_threads),
+                                           thread_name_prefix='battlebuddy-db-reader')
+
+    async def _run(self, executor: ThreadPoolExecutor, func: Callable, *args) -> Any:
+        """Run a blocking database call on the given executor."""
+        loop = asyncio.get_running_loop()
+        # Counts towards the running command's database time (see metrics.py)
+        with phase('db'):
+            return await loop.run_in_executor(executor, functools.partial(func, *args))
+
+    async def record_character_pick(self, game: str, character: str,
+                                    user_id: Optional[int] = None,
+                                    guild_id: Optional[int] = None):
+        """Record a character pick on the writer thread."""
+        await self._run(self._writer, self.database.record_character_pick,
+                        game, character, user_id, guild_id)
+
+    async def record_character_picks(self, game: str, characters: List[str],
+                                     user_id: Optional[int] = None,
+                                     guild_id: Optional[int] = None):
+        """Record several picks of one game on the writer thread."""
+        await self._run(self._writer, self.database.record_character_picks,
+                        game, characters, user_id, guild_id)
+
+    async def flush_picks(self) -> int:
+        """Write buffered character picks on the writer thread."""
+        return await self._run(self._writer, self.database.flush_picks)
+
+    async def compact_pick_events(self) -> int:
+        """Roll pick events up into hourly and daily totals on the writer thread."""
+        return await self._run(self._writer, self.database.compact_pick_events)
+
+    async def add_favorite(self, user_id: int, game: str, character: str) -> bool:
+        """Add a favorite on the writer thread."""
+        return await self._run(self._writer, self.database.add_favorite, user_id, game, character)
+
+    async def remove_favorite(self, user_id: int, game: str, character: str) -> bool:
+        """Remove a favorite on the writer thread."""
+        return await self._run(self._writer, self.database.remove_favorite, user_id, game, character)
+
+    async def get_character_stats_page(self, game: Optional[str] = None,
+                                       after: Optional[Tuple[str, int, str]] = None,
+                                       limit: int = 15,
+                                       since: Optional[int] = None,
+                                       guild_id: Optional[int] = None) -> List[Tuple[str, str, int]]:
+        """Retrieve one page of character statistics on a reader thread.
+
+        All-time pages are read from the in-memory rankings without a
+        thread when they are enabled. Otherwise buffered picks are not
+        flushed first. The bot's flush loop writes them every
+        ``PICK_FLUSH_INTERVAL`` seconds, so a page can trail the latest
+        rolls by that much.
+        """
+        if since is None and self.database.rankings is not None:
+            return self.database.get_character_stats_page(game, after, limit, since, guild_id)
+        return await self._run(self._readers, self.database.get_character_stats_page,
+                               game, after, limit, since, guild_id)
+
+    async def toggle_favorite(self, user_id: int, game: str, character: str) -> bool:
+        """Toggle a favorite on the writer thread."""
+        return await self._run(self._writer, self.database.toggle_favorite, user_id, game, character)
+
+    async def get_favorites(self, user_id: int) -> List[Tuple[str, str]]:
+        """Retrieve a user's favorites, on a reader thread unless cached.
+
+        Cached favorites are answered on the event loop until the next
+        check for changes made by other processes is due; that check and
+        cache misses run on a reader thread.
+        """
+        if not self.database.favorite_changes_due():
+            cached = self.database.get_cached_favorites(user_id)
+            if cached is not None:
+                return cached
+        return await self._run(self._readers, self.database.get_favorites, user_id)
+
+    async def report_shard_health(self, worker_id: int, pid: int,
+                                  shards: List[Tuple[int, str, Optional[float], int]]):
+        """Store shard health on the writer thread."""
+        await self._run(self._writer, self.database.report_shard_health, worker_id, pid, shards)
+
+    def close(self):
+        """Wait for queued queries to finish and flush buffered picks.
+
+        This blocks, so call it after the event loop has stopped.
+        """
+        self._readers.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+        self.database.close()
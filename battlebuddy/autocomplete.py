@@ -0,0 +1,142 @@
+"""
+Autocomplete indexes for game, role and character names.
+
+Discord calls an autocomplete handler on every keystroke, so lookups have
+to be cheap. Each ``NameIndex`` is precomputed once from the roster:
+
+1. A sorted array of lowercased name keys (the full name plus every word
+   start, so "sin" finds "Lee Sin") searched with ``bisect``; a prefix
+   match is a contiguous slice of it, like walking a prefix trie
+2. A trigram index used as a fuzzy fallback when nothing matches the
+   prefix, so typos like "wriath" still suggest "Wraith"
+"""
+import re
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple
+
+from roster import RosterIndex
+
+# Discord shows at most 25 autocomplete choices
+MAX_CHOICES = 25
+
+# Minimum trigram similarity for a fuzzy match to be suggested
+FUZZY_THRESHOLD = 0.2
+
+_WORD_BREAK = re.compile(r"[\s.'&:/-]+")
+
+def _trigrams(text: str) -> Set[str]:
+    """Return the trigrams of a lowercased string, padded at both ends."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class NameIndex:
+    """Prefix and fuzzy search over a fixed set of names."""
+
+    def __init__(self, names: Iterable[str]):
+        """Precompute the search structures.
+
+        Args:
+            names (Iterable[str]): Names to index, in their display order
+        """
+        self.names: Tuple[str, ...] = tuple(dict.fromkeys(names))
+        # (key, is word match, name position) sorted by key
+        entries: List[Tuple[str, bool, int]] = []
+        self._name_trigrams: List[Set[str]] = []
+        trigram_index: Dict[str, List[int]] = {}
+        for position, name in enumerate(self.names):
+            lower = name.lower()
+            starts = [0] + [match.end() for match in _WORD_BREAK.finditer(lower)]
+            for start in starts:
+                if start < len(lower):
+                    entries.append((lower[start:], start != 0, position))
+            grams = _trigrams(lower)
+            self._name_trigrams.append(grams)
+            for gram in grams:
+                trigram_index.setdefault(gram, []).append(position)
+        entries.sort()
+        self._keys = [entry[0] for entry in entries]
+        self._entries = entries
+        self._trigram_index = {gram: tuple(positions) for gram, positions in trigram_index.items()}
+
+    def search(self, query: str, limit: int = MAX_CHOICES) -> List[str]:
+        """Return up to ``limit`` names matching ``query``.
+
+        Names starting with the query come first, then names with a word
+        starting with it. Only if nothing matches that way are names
+        suggested by trigram similarity, to catch typos.
+
+        Args:
+            query (str): Text typed so far
+            limit (int): Maximum number of names to return
+
+        Returns:
+            List[str]: Matching names in their original spelling
+        """
+        query = query.strip().lower()
+        if not query:
+            return list(self.names[:limit])
+
+        low = bisect_left(self._keys, query)
+        high = bisect_left(self._keys, query + '\uffff', low)
+        matches: List[int] = []
+        seen: Set[int] = set()
+        for word_match in (False, True):
+            for _, is_word, position in self._entries[low:high]:
+                if is_word == word_match and position not in seen:
+                    seen.add(position)
+                    matches.append(position)
+                    if len(matches) == limit:
+                        return [self.names[i] for i in matches]
+
+        if not matches and len(query) > 1:
+            matches = self._fuzzy(query, limit, seen)
+        return [self.names[i] for i in matches]
+
+    def _fuzzy(self, query: str, limit: int, exclude: Set[int]) -> List[int]:
+        """Return positions of the names most similar to ``query``."""
+        grams = _trigrams(query)
+        shared: Counter = Counter()
+        for gram in grams:
+            for position in self._trigram_index.get(gram, ()):
+                shared[position] += 1
+        scored = []
+        for position, count in shared.items():
+            if position in exclude:
+                continue
+            # Jaccard similarity of the two trigram sets
+            score = count / (len(grams) + len(self._name_trigrams[position]) - count)
+            if score >= FUZZY_THRESHOLD:
+                scored.append((-score, position))
+        scored.sort()
+        return [position for _, position in scored[:limit]]
+
+class RosterAutocomplete(NamedTuple):
+    """Name indexes for every autocompleted command parameter."""
+    games: NameIndex
+    roles: Dict[str, NameIndex]
+    characters: Dict[str, NameIndex]
+    all_characters: NameIndex
+    roster: RosterIndex
+
+    def search_roles(self, game: str, query: str) -> List[str]:
+        """Search a game's roles; no suggestions until the game is known."""
+        game_index = self.roster.find_game(game or '')
+        return self.roles[game_index.name].search(query) if game_index else []
+
+    def search_characters(self, game: str, query: str) -> List[str]:
+        """Search a game's characters, or every game's if it is unknown."""
+        game_index = self.roster.find_game(game or '')
+        index = self.characters[game_index.name] if game_index else self.all_characters
+        return index.search(query)
+
+def build_autocomplete(roster: RosterIndex) -> RosterAutocomplete:
+    """Build the autocomplete indexes for a roster."""
+    games = roster.games.values()
+    return RosterAutocomplete(
+        games=NameIndex(roster.game_names),
+        roles={game.name: NameIndex(game.roles) for game in games},
+        characters={game.name: NameIndex(game.characters) for game in games},
+        all_characters=NameIndex(name for game in games for name in game.characters),
+        roster=roster,
+    )
@@ -0,0 +1,186 @@
+"""
+Command admission and deferred responses for BattleBuddy Discord bot.
+
+Discord fails an interaction that is not answered within three seconds.
+Commands answer after their database work, so a slow database or a burst
+of commands can push them past that deadline. Commands decorated with
+``auto_defer``:
+
+1. Wait for a slot in the bot's ``CommandQueue``, which runs a bounded
+   number of commands at once and turns commands away with a "busy"
+   message once too many are waiting
+2. Defer the interaction ("BattleBuddy is thinking...") if they have not
+   responded within the queue's ``defer_after`` budget
+3. Send their response with ``respond``, which sends a follow-up instead
+   once the interaction has been deferred
+
+The first follow-up replaces the "thinking" message and keeps its
+visibility, whatever ``ephemeral`` it is sent with. Commands therefore defer
+with the visibility of their usual response (``auto_defer(ephemeral=True)``
+for private ones), and ``respond`` deletes the "thinking" message first
+when a response needs the other visibility, e.g. an ephemeral error after
+a public deferral.
+"""
+import asyncio
+import functools
+import logging
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Optional, Union
+
+from metrics import phase, record_deferred, record_error
+
+logger = logging.getLogger(__name__)
+
+class QueueFull(Exception):
+    """Raised when a command arrives while the command queue is full."""
+
+class CommandQueue:
+    """Bounded admission for slash commands.
+
+    At most ``workers`` commands run at once. Up to ``max_waiting`` more
+    wait for a slot in arrival order; commands beyond that are rejected
+    straight away instead of piling up behind a slow database.
+    """
+
+    def __init__(self, workers: int, max_waiting: int, defer_after: float):
+        """Create the queue.
+
+        Args:
+            workers (int): Commands that may run at the same time
+            max_waiting (int): Commands that may wait for a slot
+            defer_after (float): Seconds a command may take before its
+                response is deferred
+        """
+        self.workers = workers
+        self.max_waiting = max_waiting
+        self.defer_after = defer_after
+        self.running = 0
+        self.waiting = 0
+        self.rejected = 0
+        # Created on first use, inside the running event loop: on Python 3.8
+        # and 3.9 a semaphore binds to the loop current when it is created
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a slot while the block runs.
+
+        Raises:
+            QueueFull: If ``max_waiting`` commands are already waiting
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        if self._slots.locked():
+            if self.waiting >= self.max_waiting:
+                self.rejected += 1
+                raise QueueFull()
+            self.waiting += 1
+            try:
+                await self._slots.acquire()
+            finally:
+                self.waiting -= 1
+        else:
+            await self._slots.acquire()
+        self.running += 1
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self._slots.release()
+
+class _ResponseState:
+    """Response bookkeeping of the command running in the current task."""
+    __slots__ = ('lock', 'thinking')
+
+    def __init__(self):
+        # Serializes responses with the deferral, so a response never races
+        # a defer that is in flight
+        self.lock = asyncio.Lock()
+        # Visibility (ephemeral or not) of a "thinking" message no response
+        # has replaced yet, None if there is none
+        self.thinking: Optional[bool] = None
+
+_response_state: ContextVar[Optional[_ResponseState]] = ContextVar('battlebuddy_response_state',
+                                                                   default=None)
+
+async def respond(interaction, *args, **kwargs):
+    """Send the response to an interaction.
+
+    Takes the same arguments as ``InteractionResponse.send_message`` and
+    counts the API call towards the command's Discord time. If the
+    interaction was already deferred or answered, the message is sent as a
+    follow-up.
+    """
+    state = _response_state.get()
+    with phase('discord'):
+        if state is None:
+            await _send(interaction, None, *args, **kwargs)
+            return
+        async with state.lock:
+            await _send(interaction, state, *args, **kwargs)
+
+async def _send(interaction, state: Optional[_ResponseState], *args, **kwargs):
+    if not interaction.response.is_done():
+        await interaction.response.send_message(*args, **kwargs)
+        return
+    if state is not None and state.thinking is not None:
+        thinking, state.thinking = state.thinking, None
+        if thinking != kwargs.get('ephemeral', False):
+            # The follow-up would replace the "thinking" message and take its visibility
+            await interaction.delete_original_response()
+    await interaction.followup.send(*args, **kwargs)
+
+async def _defer_after(interaction, state: _ResponseState, delay: float, ephemeral: bool):
+    """Defer the interaction if it has not been answered after ``delay`` seconds."""
+    await asyncio.sleep(delay)
+    async with state.lock:
+        if interaction.response.is_done():
+            return
+        try:
+            with phase('discord'):
+                await interaction.response.defer(ephemeral=ephemeral, thinking=True)
+        except Exception as e:
+            logger.warning("Could not defer a slow command: %s", e)
+            return
+        state.thinking = ephemeral
+        record_deferred()
+
+def auto_defer(func: Optional[Callable] = None, *, ephemeral: bool = False) -> Union[Callable, Callable[[Callable], Callable]]:
+    """Decorate a slash command callback to run it through the command queue.
+
+    Uses the ``command_queue`` of ``interaction.client`` (the bot), if it
+    has one. Decorate with ``timed_command`` on top, so the recorded
+    latency includes the time spent waiting for a slot.
+
+    Use as ``@auto_defer``, or as ``@auto_defer(ephemeral=True)`` for
+    commands that usually respond privately, so a deferred response stays
+    private.
+    """
+    if func is None:
+        return functools.partial(auto_defer, ephemeral=ephemeral)
+
+    @functools.wraps(func)
+    async def wrapper(interaction, *args, **kwargs):
+        queue = getattr(interaction.client, 'command_queue', None)
+        if queue is None:
+            return await func(interaction, *args, **kwargs)
+        state = _ResponseState()
+        token = _response_state.set(state)
+        # Created after the state is set, so the watcher shares it
+        watcher = asyncio.create_task(_defer_after(interaction, state, queue.defer_after, ephemeral))
+        try:
+            async with queue.slot():
+                return await func(interaction, *args, **kwargs)
+        except QueueFull:
+            logger.warning("Command queue full, rejected /%s", func.__name__)
+            record_error()
+            await respond(
+                interaction,
+                "BattleBuddy is busy right now. Please try again in a moment.",
+                ephemeral=True
+            )
+        finally:
+            watcher.cancel()
+            _response_state.reset(token)
+    return wrapper
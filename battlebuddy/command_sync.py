@@ -0,0 +1,95 @@
+"""
+Slash command sync for BattleBuddy Discord bot.
+
+``on_ready`` fires on every reconnect, and syncing the command tree each
+time spends a rate-limited global API call even though the commands rarely
+change. ``CommandSyncer`` hashes the payload Discord would receive (every
+command's name, description, parameters, choices and permissions) and
+stores the hash in a small JSON file, so the tree is only synced when the
+hash differs from the one last synced.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from discord import app_commands
+
+logger = logging.getLogger(__name__)
+
+def command_tree_hash(tree: app_commands.CommandTree) -> str:
+    """Hash a command tree's global commands deterministically.
+
+    Args:
+        tree (app_commands.CommandTree): The tree to hash
+
+    Returns:
+        str: Hex digest that changes whenever the synced payload would
+    """
+    payload = sorted((command.to_dict(tree) for command in tree.get_commands()),
+                     key=lambda command: (command.get('type', 1), command['name']))
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+class CommandSyncer:
+    """Syncs a command tree only when its hash has changed."""
+
+    def __init__(self, tree: app_commands.CommandTree, state_path: str, force: bool = False):
+        """Create the syncer.
+
+        Args:
+            tree (app_commands.CommandTree): Tree to sync
+            state_path (str): JSON file the last synced hash is stored in
+            force (bool): Sync on the next call even if the hash is unchanged
+        """
+        self.tree = tree
+        self.state_path = state_path
+        self.force = force
+
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_path, encoding='utf-8') as state_file:
+                state = json.load(state_file)
+            return state if isinstance(state, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable command sync state %s: %s", self.state_path, e)
+            return {}
+
+    def _save_state(self, state: Dict[str, Any]):
+        # Write to a temporary file first so a crash never leaves a torn file
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as state_file:
+            json.dump(state, state_file, indent=2, sort_keys=True)
+        os.replace(temp_path, self.state_path)
+
+    async def sync(self) -> Optional[int]:
+        """Sync the tree with Discord if it changed since the last sync.
+
+        Returns:
+            Optional[int]: Number of commands synced, or None if skipped
+        """
+        # Hashes are kept per application so several bots can share a directory
+        application = str(self.tree.client.application_id)
+        tree_hash = command_tree_hash(self.tree)
+        state = self._load_state()
+        last = state.get(application, {})
+        if not self.force and last.get('hash') == tree_hash:
+            logger.info("Command tree unchanged, skipped sync "
+                        "(saved ~%.2fs and a global API call)", last.get('seconds', 0.0))
+            return None
+
+        start = time.perf_counter()
+        synced = await self.tree.sync()
+        elapsed = time.perf_counter() - start
+        state[application] = {'hash': tree_hash, 'seconds': round(elapsed, 3), 'synced_at': int(time.time())}
+        try:
+            self._save_state(state)
+        except OSError as e:
+            logger.warning("Could not save command sync state to %s: %s", self.state_path, e)
+        self.force = False
+        logger.info("Synced %s command(s) in %.2fs", len(synced), elapsed)
+        return len(synced)
@@ -1,334 +1,146 @@
 """
 Configuration file for BattleBuddy Discord bot.
-Contains game characters and other configuration settings.
+Contains bot configuration settings.
 
 This module defines:
-1. Character lists for each supported game
-2. Role types and role mappings for characters
-3. Bot configuration settings
-4. Command cooldown settings
+1. Bot configuration settings
+2. Command cooldown and rate limit settings
+3. Database settings
+4. Where the game roster is loaded from (the roster itself lives in
+   data/roster.json)
 """
+import os
 
 # Bot configuration settings
 COMMAND_PREFIX = '!'  # Prefix for legacy text commands
 BOT_DESCRIPTION = 'A bot that helps you select random characters from various games'
 COMMAND_COOLDOWN = 5  # Cooldown period in seconds between command uses
 
-# Dictionary of characters for each supported game with their roles and descriptions
-# Each game entry contains:
-# - characters: List of available characters
-# - roles: Available role types
-# - role_mapping: Dictionary mapping characters to their roles
-CHARACTERS = {
-    'apex': {
-        'characters': [
-            'Alter', 'Ash', 'Ballistic', 'Bangalore', 'Bloodhound', 'Catalyst', 'Caustic', 'Conduit',
-            'Crypto', 'Fuse', 'Gibraltar', 'Horizon', 'Lifeline', 'Loba', 'Mad Maggie', 'Mirage',
-            'Newcastle', 'Octane', 'Pathfinder', 'Rampart', 'Revenant', 'Seer', 'Valkyrie',
-            'Vantage', 'Wattson', 'Wraith'
-        ],
-        'roles': ['Assault', 'Skirmisher', 'Recon', 'Support', 'Controller'],
-        'role_mapping': {
-            'Ash': 'Assault',
-            'Ballistic': 'Assault',
-            'Bangalore': 'Assault',
-            'Bloodhound': 'Recon',
-            'Catalyst': 'Controller',
-            'Caustic': 'Controller',
-            'Conduit': 'Support',
-            'Crypto': 'Recon',
-            'Fuse': 'Assault',
-            'Gibraltar': 'Support',
-            'Horizon': 'Skirmisher',
-            'Lifeline': 'Support',
-            'Loba': 'Support',
-            'Mad Maggie': 'Assault',
-            'Mirage': 'Support',
-            'Newcastle': 'Support',
-            'Octane': 'Skirmisher',
-            'Pathfinder': 'Skirmisher',
-            'Rampart': 'Controller',
-            'Revenant': 'Skirmisher',
-            'Seer': 'Recon',
-            'Valkyrie': 'Skirmisher',
-            'Vantage': 'Recon',
-            'Wattson': 'Controller',
-            'Wraith': 'Skirmisher',
-            'Alter': 'Skirmisher'
-        }
+# Where rate limit buckets are stored:
+# - 'memory': private to this process
+# - 'sqlite': shared by every bot process that uses RATE_LIMIT_DB_PATH
+# - 'auto': 'sqlite' when launcher.py runs several workers, else 'memory'
+RATE_LIMIT_BACKEND = 'auto'
+RATE_LIMIT_DB_PATH = 'ratelimits.db'  # Use a tmpfs path (e.g. /dev/shm) in production
+
+# Token-bucket rate limits per command. Each scope allows a burst of
+# 'burst' uses and refills at 'rate' uses per second:
+# - user: limit for one user
+# - guild: limit shared by everyone in one server
+# Commands without an entry use 'default'.
+RATE_LIMITS = {
+    'default': {
+        'user': {'burst': 1, 'rate': 1 / COMMAND_COOLDOWN},
     },
-    'overwatch': {
-        'characters': [
-            'Ana', 'Ashe', 'Baptiste', 'Bastion', 'Brigitte', 'Cassidy', 'D.Va', 'Doomfist', 'Echo',
-            'Genji', 'Hanzo', 'Hazard', 'Illari', 'Junker Queen', 'Junkrat', 'Kiriko', 'Lúcio', 'Mei',
-            'Mercy', 'Moira', 'Orisa', 'Pharah', 'Ramattra', 'Reaper', 'Reinhardt', 'Roadhog', 'Sigma',
-            'Soldier: 76', 'Sojourn', 'Sombra', 'Symmetra', 'Torbjörn', 'Tracer', 'Widowmaker', 'Winston',
-            'Wrecking Ball', 'Zarya', 'Zenyatta'
-        ],
-        'roles': ['Tank', 'Damage', 'Support'],
-        'role_mapping': {
-            'Ana': 'Support',
-            'Ashe': 'Damage',
-            'Baptiste': 'Support',
-            'Bastion': 'Damage',
-            'Brigitte': 'Support',
-            'Cassidy': 'Damage',
-            'D.Va': 'Tank',
-            'Doomfist': 'Tank',
-            'Echo': 'Damage',
-            'Genji': 'Damage',
-            'Hanzo': 'Damage',
-            'Hazard': 'Damage',
-            'Illari': 'Support',
-            'Junker Queen': 'Tank',
-            'Junkrat': 'Damage',
-            'Kiriko': 'Support',
-            'Lúcio': 'Support',
-            'Mei': 'Damage',
-            'Mercy': 'Support',
-            'Moira': 'Support',
-            'Orisa': 'Tank',
-            'Pharah': 'Damage',
-            'Ramattra': 'Tank',
-            'Reaper': 'Damage',
-            'Reinhardt': 'Tank',
-            'Roadhog': 'Tank',
-            'Sigma': 'Tank',
-            'Soldier: 76': 'Damage',
-            'Sojourn': 'Damage',
-            'Sombra': 'Damage',
-            'Symmetra': 'Damage',
-            'Torbjörn': 'Damage',
-            'Tracer': 'Damage',
-            'Widowmaker': 'Damage',
-            'Winston': 'Tank',
-            'Wrecking Ball': 'Tank',
-            'Zarya': 'Tank',
-            'Zenyatta': 'Support'
-        }
+    'who': {
+        'user': {'burst': 3, 'rate': 1 / COMMAND_COOLDOWN},
+        'guild': {'burst': 30, 'rate': 2},
     },
-    'valorant': {
-        'characters': [
-            'Astra', 'Breach', 'Brimstone', 'Chamber', 'Clove', 'Cypher', 'Deadlock', 'Fade', 'Gekko',
-            'Harbor', 'Iso', 'Jett', 'Kay/o', 'Killjoy', 'Neon', 'Omen', 'Phoenix', 'Raze', 'Reyna',
-            'Sage', 'Skye', 'Sova', 'Tejo', 'Viper', 'Vyse', 'Waylay', 'Yoru'
-        ],
-        'roles': ['Controller', 'Duelist', 'Initiator', 'Sentinel'],
-        'role_mapping': {
-            'Astra': 'Controller',
-            'Breach': 'Initiator',
-            'Brimstone': 'Controller',
-            'Chamber': 'Sentinel',
-            'Clove': 'Controller',
-            'Cypher': 'Sentinel',
-            'Deadlock': 'Sentinel',
-            'Fade': 'Initiator',
-            'Gekko': 'Initiator',
-            'Harbor': 'Controller',
-            'Iso': 'Duelist',
-            'Jett': 'Duelist',
-            'Kay/o': 'Initiator',
-            'Killjoy': 'Sentinel',
-            'Neon': 'Duelist',
-            'Omen': 'Controller',
-            'Phoenix': 'Duelist',
-            'Raze': 'Duelist',
-            'Reyna': 'Duelist',
-            'Sage': 'Sentinel',
-            'Skye': 'Initiator',
-            'Sova': 'Initiator',
-            'Tejo': 'Initiator',
-            'Viper': 'Controller',
-            'Vyse': 'Sentinel',
-            'Waylay': 'Duelist',
-            'Yoru': 'Duelist'
-        }
+    'random': {
+        'user': {'burst': 3, 'rate': 1 / COMMAND_COOLDOWN},
+        'guild': {'burst': 30, 'rate': 2},
     },
-    'lol': {
-        'characters': [
-            'Aatrox', 'Ahri', 'Akali', 'Akshan', 'Alistar', 'Amumu', 'Anivia', 'Annie', 'Aphelios',
-            'Ashe', 'Aurelion Sol', 'Azir', 'Bard', 'Bel\'Veth', 'Blitzcrank', 'Brand', 'Braum',
-            'Caitlyn', 'Camille', 'Cassiopeia', 'Cho\'Gath', 'Corki', 'Darius', 'Diana', 'Draven',
-            'Dr. Mundo', 'Ekko', 'Elise', 'Evelynn', 'Ezreal', 'Fiddlesticks', 'Fiora', 'Fizz',
-            'Galio', 'Gangplank', 'Garen', 'Gnar', 'Gragas', 'Graves', 'Gwen', 'Hecarim', 'Heimerdinger',
-            'Illaoi', 'Irelia', 'Ivern', 'Janna', 'Jarvan IV', 'Jax', 'Jayce', 'Jhin', 'Jinx',
-            'K\'Sante', 'Kai\'Sa', 'Kalista', 'Karma', 'Karthus', 'Kassadin', 'Katarina', 'Kayle',
-            'Kayn', 'Kennen', 'Kha\'Zix', 'Kindred', 'Kled', 'Kog\'Maw', 'LeBlanc', 'Lee Sin',
-            'Leona', 'Lillia', 'Lissandra', 'Lucian', 'Lulu', 'Lux', 'Malphite', 'Malzahar',
-            'Maokai', 'Master Yi', 'Milio', 'Miss Fortune', 'Mordekaiser', 'Morgana', 'Naafiri',
-            'Nami', 'Nasus', 'Nautilus', 'Neeko', 'Nidalee', 'Nilah', 'Nocturne', 'Nunu & Willump',
-            'Olaf', 'Orianna', 'Ornn', 'Pantheon', 'Poppy', 'Pyke', 'Qiyana', 'Quinn', 'Rakan',
-            'Rammus', 'Rek\'Sai', 'Rell', 'Renata Glasc', 'Renekton', 'Rengar', 'Riven', 'Rumble',
-            'Ryze', 'Samira', 'Sejuani', 'Senna', 'Seraphine', 'Sett', 'Shaco', 'Shen', 'Shyvana',
-            'Singed', 'Sion', 'Sivir', 'Skarner', 'Sona', 'Soraka', 'Swain', 'Sylas', 'Syndra',
-            'Tahm Kench', 'Taliyah', 'Talon', 'Taric', 'Teemo', 'Thresh', 'Tristana', 'Trundle',
-            'Tryndamere', 'Twisted Fate', 'Twitch', 'Udyr', 'Urgot', 'Varus', 'Vayne', 'Veigar',
-            'Vel\'Koz', 'Vex', 'Vi', 'Viego', 'Viktor', 'Vladimir', 'Volibear', 'Warwick', 'Wukong',
-            'Xayah', 'Xerath', 'Xin Zhao', 'Yasuo', 'Yone', 'Yorick', 'Yuumi', 'Zac', 'Zed', 'Zeri',
-            'Ziggs', 'Zilean', 'Zoe', 'Zyra', 'Briar', 'Hwei', 'Smolder'
-        ],
-        'roles': ['Assassin', 'Fighter', 'Mage', 'Marksman', 'Support', 'Tank'],
-        'role_mapping': {
-            # Assassins
-            'Akali': 'Assassin', 'Evelynn': 'Assassin', 'Fizz': 'Assassin', 'Kassadin': 'Assassin',
-            'Katarina': 'Assassin', 'Kha\'Zix': 'Assassin', 'LeBlanc': 'Assassin', 'Nocturne': 'Assassin',
-            'Pyke': 'Assassin', 'Qiyana': 'Assassin', 'Rengar': 'Assassin', 'Shaco': 'Assassin',
-            'Talon': 'Assassin', 'Zed': 'Assassin', 'Naafiri': 'Assassin',
-            
-            # Fighters
-            'Aatrox': 'Fighter', 'Camille': 'Fighter', 'Darius': 'Fighter', 'Fiora': 'Fighter',
-            'Garen': 'Fighter', 'Gnar': 'Fighter', 'Gwen': 'Fighter', 'Irelia': 'Fighter',
-            'Jax': 'Fighter', 'Jayce': 'Fighter', 'K\'Sante': 'Fighter', 'Kayn': 'Fighter',
-            'Kled': 'Fighter', 'Lillia': 'Fighter', 'Lucian': 'Fighter', 'Mordekaiser': 'Fighter',
-            'Nasus': 'Fighter', 'Olaf': 'Fighter', 'Pantheon': 'Fighter', 'Poppy': 'Fighter',
-            'Renekton': 'Fighter', 'Riven': 'Fighter', 'Sett': 'Fighter', 'Sylas': 'Fighter',
-            'Trundle': 'Fighter', 'Tryndamere': 'Fighter', 'Udyr': 'Fighter', 'Urgot': 'Fighter',
-            'Vi': 'Fighter', 'Volibear': 'Fighter', 'Warwick': 'Fighter', 'Wukong': 'Fighter',
-            'Xin Zhao': 'Fighter', 'Yasuo': 'Fighter', 'Yone': 'Fighter', 'Yorick': 'Fighter',
-            'Briar': 'Fighter',
-            
-            # Mages
-            'Ahri': 'Mage', 'Anivia': 'Mage', 'Annie': 'Mage', 'Aurelion Sol': 'Mage',
-            'Azir': 'Mage', 'Brand': 'Mage', 'Cassiopeia': 'Mage', 'Corki': 'Mage',
-            'Diana': 'Mage', 'Ekko': 'Mage', 'Elise': 'Mage', 'Fiddlesticks': 'Mage',
-            'Galio': 'Mage', 'Gragas': 'Mage', 'Heimerdinger': 'Mage', 'Karma': 'Mage',
-            'Karthus': 'Mage', 'Kennen': 'Mage', 'Leona': 'Mage', 'Lissandra': 'Mage',
-            'Lux': 'Mage', 'Malzahar': 'Mage', 'Morgana': 'Mage', 'Neeko': 'Mage',
-            'Nidalee': 'Mage', 'Orianna': 'Mage', 'Rumble': 'Mage', 'Ryze': 'Mage',
-            'Seraphine': 'Mage', 'Swain': 'Mage', 'Syndra': 'Mage', 'Taliyah': 'Mage',
-            'Twisted Fate': 'Mage', 'Veigar': 'Mage', 'Vel\'Koz': 'Mage', 'Vex': 'Mage',
-            'Viktor': 'Mage', 'Vladimir': 'Mage', 'Xerath': 'Mage', 'Ziggs': 'Mage',
-            'Zilean': 'Mage', 'Zoe': 'Mage', 'Zyra': 'Mage', 'Hwei': 'Mage',
-            
-            # Marksmen
-            'Akshan': 'Marksman', 'Aphelios': 'Marksman', 'Ashe': 'Marksman', 'Caitlyn': 'Marksman',
-            'Draven': 'Marksman', 'Ezreal': 'Marksman', 'Jhin': 'Marksman', 'Jinx': 'Marksman',
-            'Kai\'Sa': 'Marksman', 'Kalista': 'Marksman', 'Kindred': 'Marksman', 'Kog\'Maw': 'Marksman',
-            'Lucian': 'Marksman', 'Miss Fortune': 'Marksman', 'Nilah': 'Marksman', 'Quinn': 'Marksman',
-            'Samira': 'Marksman', 'Sivir': 'Marksman', 'Tristana': 'Marksman', 'Twitch': 'Marksman',
-            'Varus': 'Marksman', 'Vayne': 'Marksman', 'Xayah': 'Marksman', 'Zeri': 'Marksman',
-            'Smolder': 'Marksman',
-            
-            # Supports
-            'Alistar': 'Support', 'Bard': 'Support', 'Blitzcrank': 'Support', 'Braum': 'Support',
-            'Janna': 'Support', 'Karma': 'Support', 'Leona': 'Support', 'Lulu': 'Support',
-            'Milio': 'Support', 'Nami': 'Support', 'Rakan': 'Support', 'Renata Glasc': 'Support',
-            'Senna': 'Support', 'Seraphine': 'Support', 'Sona': 'Support', 'Soraka': 'Support',
-            'Taric': 'Support', 'Thresh': 'Support', 'Yuumi': 'Support', 'Zilean': 'Support',
-            
-            # Tanks
-            'Amumu': 'Tank', 'Cho\'Gath': 'Tank', 'Dr. Mundo': 'Tank', 'Galio': 'Tank',
-            'Gragas': 'Tank', 'Hecarim': 'Tank', 'Illaoi': 'Tank', 'Jarvan IV': 'Tank',
-            'Malphite': 'Tank', 'Maokai': 'Tank', 'Nautilus': 'Tank', 'Nunu & Willump': 'Tank',
-            'Ornn': 'Tank', 'Poppy': 'Tank', 'Rammus': 'Tank', 'Rell': 'Tank', 'Sejuani': 'Tank',
-            'Shen': 'Tank', 'Sion': 'Tank', 'Skarner': 'Tank', 'Tahm Kench': 'Tank',
-            'Thresh': 'Tank', 'Volibear': 'Tank', 'Zac': 'Tank'
-        }
+    'team': {  # One use drafts a whole squad
+        'user': {'burst': 2, 'rate': 1 / COMMAND_COOLDOWN},
+        'guild': {'burst': 10, 'rate': 1},
     },
-    'rivals': {
-        'characters': [
-            # Vanguards
-            'Captain America', 'Doctor Strange', 'Groot', 'Hulk', 'Magneto', 'Peni Parker',
-            'The Thing', 'Thor', 'Venom',
-            # Duelists
-            'Black Panther', 'Black Widow', 'Hawkeye', 'Hela', 'Human Torch', 'Iron Fist',
-            'Iron Man', 'Magik', 'Mister Fantastic', 'Moon Knight', 'Namor', 'Psylocke',
-            'Scarlet Witch', 'Spider-Man', 'Squirrel Girl', 'Star-Lord', 'Storm',
-            'The Punisher', 'Winter Soldier', 'Wolverine',
-            # Strategists
-            'Adam Warlock', 'Cloak & Dagger', 'Invisible Woman', 'Jeff the Land Shark',
-            'Loki', 'Luna Snow', 'Mantis', 'Rocket Raccoon'
-        ],
-        'roles': ['Vanguard', 'Duelist', 'Strategist'],
-        'role_mapping': {
-            # Vanguards
-            'Captain America': 'Vanguard',
-            'Doctor Strange': 'Vanguard',
-            'Groot': 'Vanguard',
-            'Hulk': 'Vanguard',
-            'Magneto': 'Vanguard',
-            'Peni Parker': 'Vanguard',
-            'The Thing': 'Vanguard',
-            'Thor': 'Vanguard',
-            'Venom': 'Vanguard',
-            # Duelists
-            'Black Panther': 'Duelist',
-            'Black Widow': 'Duelist',
-            'Hawkeye': 'Duelist',
-            'Hela': 'Duelist',
-            'Human Torch': 'Duelist',
-            'Iron Fist': 'Duelist',
-            'Iron Man': 'Duelist',
-            'Magik': 'Duelist',
-            'Mister Fantastic': 'Duelist',
-            'Moon Knight': 'Duelist',
-            'Namor': 'Duelist',
-            'Psylocke': 'Duelist',
-            'Scarlet Witch': 'Duelist',
-            'Spider-Man': 'Duelist',
-            'Squirrel Girl': 'Duelist',
-            'Star-Lord': 'Duelist',
-            'Storm': 'Duelist',
-            'The Punisher': 'Duelist',
-            'Winter Soldier': 'Duelist',
-            'Wolverine': 'Duelist',
-            # Strategists
-            'Adam Warlock': 'Strategist',
-            'Cloak & Dagger': 'Strategist',
-            'Invisible Woman': 'Strategist',
-            'Jeff the Land Shark': 'Strategist',
-            'Loki': 'Strategist',
-            'Luna Snow': 'Strategist',
-            'Mantis': 'Strategist',
-            'Rocket Raccoon': 'Strategist'
-        }
-    }
-}
-
-# Character descriptions and additional information
-CHARACTER_INFO = {
-    'apex': {
-        'Alter': {
-            'description': 'A mysterious character with unique abilities',
-            'difficulty': 'Medium',
-            'release_date': '2024'
-        },
-        'Ash': {
-            'description': 'A former Apex Predator turned mercenary',
-            'difficulty': 'Medium',
-            'release_date': '2021'
-        },
-        # ... Add descriptions for other Apex characters
+    'stats': {  # One page per use, but windowed pages sum the pick log
+        'user': {'burst': 2, 'rate': 1 / 10},
+        'guild': {'burst': 10, 'rate': 1},
+    },
+    'favorite': {
+        'user': {'burst': 5, 'rate': 1 / 2},
+    },
+    'favorites': {
+        'user': {'burst': 2, 'rate': 1 / 5},
+    },
+    'help': {
+        'user': {'burst': 2, 'rate': 1 / 10},
     },
-    'overwatch': {
-        'Ana': {
-            'description': 'A skilled sniper and healer',
-            'difficulty': 'Hard',
-            'release_date': '2016'
-        },
-        'Ashe': {
-            'description': 'A sharpshooter with a powerful rifle',
-            'difficulty': 'Medium',
-            'release_date': '2018'
-        },
-        # ... Add descriptions for other Overwatch characters
-    }
 }
 
-# Game-specific settings and configurations
-GAME_SETTINGS = {
-    'apex': {
-        'max_team_size': 3,
-        'game_modes': ['Battle Royale', 'Arena', 'Control'],
-        'update_frequency': 'Seasonal'
-    },
-    'overwatch': {
-        'max_team_size': 5,
-        'game_modes': ['Quick Play', 'Competitive', 'Arcade'],
-        'update_frequency': 'Monthly'
-    }
+# Sharding. The bot runs as an AutoShardedBot; launcher.py can split the
+# shards over several worker processes that share DATABASE_PATH. The 'auto'
+# rate limit backend then shares limits between the workers.
+SHARDING_ENABLED = True
+SHARD_HEALTH_INTERVAL = 30  # Seconds between per-shard health reports
+SHARD_HEALTH_STALE_AFTER = 120  # Seconds without a report before a shard counts as stale
+LAUNCHER_RESTART_DELAY = 5  # Seconds before restarting a crashed worker (doubles per crash)
+LAUNCHER_MAX_RESTART_DELAY = 300  # Upper bound for the restart delay
+
+# Logging. Records are written by a background thread (see
+# utils/logging_setup.py). Launcher workers other than 0 log to their own
+# file, e.g. logs/battlebuddy-worker1.log.
+LOG_PATH = 'logs/battlebuddy.log'
+LOG_LEVEL = 'INFO'
+LOG_FORMAT = 'text'  # 'text' or 'json' (one JSON object per line)
+LOG_MAX_BYTES = 10 * 1024 * 1024  # Size at which the log file is rotated
+LOG_BACKUP_COUNT = 5  # Rotated log files kept
+
+# Metrics. Command and query latency histograms are served in the Prometheus
+# text format at http://METRICS_HOST:METRICS_PORT/metrics; launcher worker N
+# uses METRICS_PORT + N. Set METRICS_PORT to None to disable the endpoint.
+METRICS_HOST = '127.0.0.1'
+METRICS_PORT = 9108
+
+# Slash command admission. Discord fails interactions that are not answered
+# within 3 seconds, so commands still working after COMMAND_DEFER_AFTER
+# seconds defer their response and answer with a follow-up.
+COMMAND_WORKERS = 256  # Commands run at the same time per process
+COMMAND_QUEUE_SIZE = 512  # Commands that may wait for a slot; more are rejected as busy
+COMMAND_DEFER_AFTER = 2.0  # Seconds before a command's response is deferred
+
+# File storing the hash of the last synced slash command tree
+COMMAND_SYNC_STATE_PATH = 'command_sync.json'
+
+# Database settings
+DATABASE_PATH = 'battlebuddy.db'  # Path to the SQLite database file
+PICK_FLUSH_INTERVAL = 5  # Seconds a character pick may stay buffered before it is written
+PICK_FLUSH_MAX_PENDING = 50  # Buffered picks that force a write (max picks lost on a crash)
+DATABASE_POOL_SIZE = 4  # Maximum number of open SQLite connections
+DATABASE_CACHED_STATEMENTS = 128  # Prepared statements cached per connection
+
+# PRAGMAs applied to every SQLite connection
+DATABASE_PRAGMAS = {
+    'journal_mode': 'WAL',  # Readers don't block the writer and vice versa
+    'synchronous': 'NORMAL',  # Safe with WAL, avoids an fsync per commit
+    'cache_size': -8000,  # Page cache size (negative values are KiB)
+    'mmap_size': 67108864,  # Bytes of the database file to memory-map
+    'busy_timeout': 5000,  # Milliseconds to wait for a lock before failing
 }
 
+# Pick history used by /stats time windows. Raw pick events are rolled up
+# into hourly totals, which are later merged into daily totals.
+PICK_ROLLUP_INTERVAL = 600  # Seconds between rollup runs
+PICK_HOURLY_RETENTION = 2 * 24 * 3600  # Seconds hourly totals are kept before merging into days
+PICK_DAILY_RETENTION = 90 * 24 * 3600  # Seconds daily totals are kept (longest usable window)
+
+# Weighted selection modes for /who and /random
+SELECTION_FAVORITE_BOOST = 3.0  # Weight of a favorite character relative to the rest
+SELECTION_FRESH_BOOST = 4.0  # Extra weight for a character nobody picked for SELECTION_FRESH_HORIZON
+SELECTION_FRESH_HORIZON = 7 * 24 * 3600  # Seconds after a pick until a character counts as fresh
+SELECTION_AVOID_LAST = 3  # Recent picks per user excluded by the avoid_recent mode
+SELECTION_REBUILD_INTERVAL = 60  # Minimum seconds between rebuilds of the fresh mode tables
+
+# Per-user favorites cache
+FAVORITES_CACHE_SIZE = 10000  # Maximum number of users whose favorites are cached
+FAVORITES_CACHE_TTL = 300  # Seconds cached favorites stay valid
+FAVORITES_CHANGES_INTERVAL = 1  # Seconds between checks for favorites changed by other workers
+
+# /stats pagination
+STATS_PAGE_SIZE = 15  # Characters shown per /stats page
+STATS_PAGE_CACHE_TTL = 30  # Seconds a rendered /stats page is reused
+# Serve all-time /stats from in-memory rankings seeded at startup. Ignored
+# when launcher.py runs several workers, since each worker only sees its
+# own picks; /stats then reads SQLite.
+STATS_IN_MEMORY = True
+
+# Game roster: characters, roles, role mappings, character info and game
+# settings. Kept in a data file so it can be edited while the bot runs; the
+# bot reloads it when the file changes (see roster_store.py).
+ROSTER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'roster.json')
+ROSTER_RELOAD_INTERVAL = 10  # Seconds between checks for a changed roster file
+
 # Error messages and responses
 ERROR_MESSAGES = {
     'invalid_game': 'Invalid game selected. Please choose from the available games.',
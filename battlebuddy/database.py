@@ -6,14 +6,160 @@ This module provides database operations for:
 1. Tracking character pick statistics across different games
 2. Managing user's favorite characters
 3. Maintaining pick history and usage patterns
+
+Character picks are buffered in memory and written back to SQLite in
+batches (see ``Database.record_character_pick``), so a busy command does
+not pay for a commit on every roll. Reads do not flush the buffer, so
+statistics can trail the latest rolls by up to ``pick_flush_interval``
+seconds; only the writer flushes. With ``rankings`` enabled, all-time
+statistics are instead served from in-memory ``Rankings`` that count every
+pick as it is recorded (see rankings.py).
+
+Picks are counted per guild as well as across all guilds. Per-guild rows
+refer to games and characters by small integer IDs (tables ``games`` and
+``characters``) instead of repeating their names, so tens of thousands of
+guilds stay compact.
+
+Connections come from a bounded ``ConnectionPool`` that reuses a thread's
+connection and applies the configured PRAGMAs (WAL journaling by default)
+once per connection instead of opening a new connection for every query.
+
+Query methods are decorated with ``timed_query`` and record their latency
+when the database is given a ``Metrics`` registry.
 """
 import sqlite3
 import logging
+import threading
+import time
 from datetime import datetime
-from typing import List, Tuple, Optional
+from typing import Any, Dict, Iterable, List, Tuple, Optional
+
+from metrics import Metrics, timed_query
+from migrations import migrate
+from rankings import ALL_GUILDS, Rankings
+from utils.cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Guild ID of picks made outside a guild, e.g. in direct messages
+NO_GUILD = 0
+
+# PRAGMAs applied to every pooled connection unless overridden
+DEFAULT_PRAGMAS: Dict[str, Any] = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+}
+
+class PooledConnection:
+    """Context manager for a connection checked out of a ``ConnectionPool``.
+    
+    Behaves like ``with sqlite3.connect(...) as conn``: the transaction is
+    committed on success and rolled back on error. The connection is then
+    handed back to the pool instead of being discarded.
+    """
+    
+    def __init__(self, pool: 'ConnectionPool'):
+        self.pool = pool
+        self.conn: Optional[sqlite3.Connection] = None
+    
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn = self.pool.acquire()
+        return self.conn
+    
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.conn.commit()
+            else:
+                self.conn.rollback()
+        finally:
+            self.pool.release(self.conn)
+        return False
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections with per-thread reuse.
+    
+    At most ``max_connections`` connections are open at once; a thread that
+    needs one while all are busy waits for a release. Each thread remembers
+    the connection it used last and gets it back if it is still idle, so the
+    worker threads of ``AsyncDatabase`` keep their own connection and its
+    prepared statement cache warm.
+    """
+    
+    def __init__(self, db_path: str, max_connections: int = 4,
+                 pragmas: Optional[Dict[str, Any]] = None, cached_statements: int = 128):
+        """Create an empty pool.
+        
+        Args:
+            db_path (str): Path to the SQLite database file
+            max_connections (int): Maximum number of open connections
+            pragmas (Optional[Dict[str, Any]]): PRAGMAs to run on each new
+                connection, defaults to ``DEFAULT_PRAGMAS``
+            cached_statements (int): Size of each connection's prepared
+                statement cache
+        """
+        self.db_path = db_path
+        self.max_connections = max(1, max_connections)
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self.cached_statements = cached_statements
+        self._idle: List[sqlite3.Connection] = []
+        self._all: List[sqlite3.Connection] = []
+        self._available = threading.Condition()
+        self._local = threading.local()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new connection and apply the configured PRAGMAs."""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+    
+    def acquire(self) -> sqlite3.Connection:
+        """Check out a connection, preferring the one this thread used last.
+        
+        Returns:
+            sqlite3.Connection: A connection owned by the caller until released
+        """
+        preferred = getattr(self._local, 'conn', None)
+        with self._available:
+            while True:
+                if preferred is not None and preferred in self._idle:
+                    self._idle.remove(preferred)
+                    return preferred
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if len(self._all) < self.max_connections:
+                    conn = self._connect()
+                    self._all.append(conn)
+                    break
+                self._available.wait()
+        self._local.conn = conn
+        return conn
+    
+    def release(self, conn: sqlite3.Connection):
+        """Return a connection to the pool."""
+        with self._available:
+            self._idle.append(conn)
+            self._available.notify()
+    
+    def connection(self) -> PooledConnection:
+        """Return a context manager that checks out a connection."""
+        return PooledConnection(self)
+    
+    def close(self):
+        """Close every connection owned by the pool."""
+        with self._available:
+            for conn in self._all:
+                conn.close()
+            self._all.clear()
+            self._idle.clear()
+
 class Database:
     """Database handler for BattleBuddy bot.
     
@@ -23,28 +169,89 @@ class Database:
     - Database initialization and connection handling
     """
     
-    def __init__(self, db_path='battlebuddy.db'):
+    def __init__(self, db_path='battlebuddy.db', pick_flush_interval: float = 0.0,
+                 pick_flush_threshold: int = 1, pool_size: int = 4,
+                 pragmas: Optional[Dict[str, Any]] = None, cached_statements: int = 128,
+                 favorites_cache_size: int = 10_000, favorites_cache_ttl: float = 300.0,
+                 favorite_changes_interval: float = 0.0,
+                 hourly_retention: int = 2 * DAY, daily_retention: int = 90 * DAY,
+                 rankings: bool = False, metrics: Optional[Metrics] = None):
         """Initialize database connection and create necessary tables.
         
         Args:
             db_path (str): Path to the SQLite database file
+            pick_flush_interval (float): Maximum number of seconds a recorded
+                pick may stay buffered before it is written to the database
+            pick_flush_threshold (int): Number of buffered picks that forces
+                a flush. The default of 1 writes every pick through immediately.
+            pool_size (int): Maximum number of pooled connections
+            pragmas (Optional[Dict[str, Any]]): PRAGMAs applied to each
+                connection, defaults to ``DEFAULT_PRAGMAS``
+            cached_statements (int): Prepared statement cache size per connection
+            favorites_cache_size (int): Maximum number of users whose favorites are cached
+            favorites_cache_ttl (float): Seconds a user's cached favorites stay valid
+            favorite_changes_interval (float): Minimum seconds between checks
+                for favorites changed by other processes. Until the next
+                check, cached favorites are used without a query. The
+                default of 0 checks on every read.
+            hourly_retention (int): Seconds hourly pick rollups are kept before
+                being merged into daily rollups
+            daily_retention (int): Seconds daily pick rollups are kept
+            rankings (bool): Serve all-time statistics from in-memory
+                rankings seeded at startup. Only enable this when no other
+                process records picks in the same database; their picks
+                would be missing until a restart.
+            metrics (Optional[Metrics]): Records the latency of every query
+                method when given
         """
         self.db_path = db_path
+        self.metrics = metrics
+        self.pool = ConnectionPool(db_path, pool_size, pragmas, cached_statements)
+        self.pick_flush_interval = pick_flush_interval
+        self.pick_flush_threshold = max(1, pick_flush_threshold)
+        self.hourly_retention = hourly_retention
+        self.daily_retention = daily_retention
+        
+        # Write-behind buffer for character picks
+        # Format: {(guild_id, game, character): [pending picks, last picked Unix time]}
+        self._pending_picks: Dict[Tuple[int, str, str], list] = {}
+        self._pending_events: List[Tuple[Optional[int], int, str, str, int]] = []
+        self._pending_count = 0
+        self._last_flush = time.monotonic()
+        self._pick_lock = threading.Lock()
+        
+        # Per-user favorites, invalidated on every write in any process
+        self.favorites_cache = TTLCache(maxsize=favorites_cache_size, ttl=favorites_cache_ttl)
+        self._favorites_generation = 0
+        self._favorites_lock = threading.Lock()
+        self.favorite_changes_interval = favorite_changes_interval
         self.init_db()
+        # Last favorite_changes row this process has applied to its cache
+        self._favorite_changes_seen = self._last_favorite_change()
+        self._favorite_changes_checked = time.monotonic()
+        # Integer IDs of every (game, character) picks were recorded for
+        self._character_ids = self.load_character_ids()
+        self.rankings: Optional[Rankings] = self.load_rankings() if rankings else None
 
-    def get_connection(self):
-        """Create and return a database connection.
+    def get_connection(self) -> PooledConnection:
+        """Check out a pooled database connection.
+        
+        Use it as ``with db.get_connection() as conn:``; the transaction is
+        committed when the block exits and the connection goes back to
+        the pool.
         
         Returns:
-            sqlite3.Connection: Database connection object
+            PooledConnection: Context manager yielding a sqlite3.Connection
         """
-        return sqlite3.connect(self.db_path)
+        return self.pool.connection()
 
     def init_db(self):
-        """Initialize the database with required tables.
+        """Create the database tables or upgrade them to the current schema.
         
-        Creates two main tables:
+        The schema is versioned with ``PRAGMA user_version`` and upgraded
+        by ``migrations.migrate``. Tables:
         1. character_stats: Tracks pick statistics for each character
+           across all guilds
            - game: The game name
            - character: Character name
            - picks: Number of times picked
@@ -55,66 +262,292 @@ class Database:
            - game: Game name
            - character: Character name
            - added_at: When the favorite was added
+           
+        3. games and characters: Integer IDs of every game and character
+           picks were recorded for
+
+        4. guild_stats: Pick counts per guild and character ID
+
+        5. pick_events: One row per pick (user, guild, character ID and
+           Unix time), compacted into pick_rollups_hourly and
+           pick_rollups_daily by ``compact_pick_events``. Rollups are kept
+           per guild and for ``ALL_GUILDS``.
+
+        6. shard_health: Latest health report of every gateway shard, written
+           by whichever bot process runs it
+
+        7. favorite_changes: Users whose favorites changed, filled by
+           triggers so every process can invalidate its favorites cache
         """
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                # Create character statistics table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS character_stats (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        game TEXT NOT NULL,
-                        character TEXT NOT NULL,
-                        picks INTEGER DEFAULT 0,
-                        last_picked TIMESTAMP,
-                        UNIQUE(game, character)
-                    )
-                ''')
-                
-                # Create user favorites table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS user_favorites (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id INTEGER NOT NULL,
-                        game TEXT NOT NULL,
-                        character TEXT NOT NULL,
-                        added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        UNIQUE(user_id, game, character)
-                    )
-                ''')
-                
-                conn.commit()
-                logger.info("Database tables initialized successfully")
+                version = migrate(conn)
+                logger.info("Database tables initialized successfully (schema version %s)", version)
         except sqlite3.Error as e:
-            logger.error(f"Error initializing database: {e}")
+            logger.error("Error initializing database: %s", e)
             raise
 
-    def record_character_pick(self, game: str, character: str):
+    def record_character_pick(self, game: str, character: str,
+                              user_id: Optional[int] = None, guild_id: Optional[int] = None):
         """Record a character pick in the statistics.
         
         Args:
             game (str): The game name (e.g., 'apex', 'overwatch')
             character (str): The character name that was picked
+            user_id (Optional[int]): Discord user who rolled the pick
+            guild_id (Optional[int]): Discord server the pick was rolled in
             
         Note:
-            Uses SQLite's UPSERT functionality to either insert a new record
-            or increment the pick count for existing records
+            Picks are accumulated in memory per (guild, game, character) and
+            written back with batched UPSERTs once ``pick_flush_threshold``
+            picks are pending or ``pick_flush_interval`` seconds have passed
+            since the last flush. Because the flush runs as soon as the
+            threshold is reached, a crash can lose at most
+            ``pick_flush_threshold`` picks.
+            Call ``flush_picks`` or ``close`` on shutdown to persist them.
+        """
+        self.record_character_picks(game, [character], user_id, guild_id)
+
+    @timed_query
+    def record_character_picks(self, game: str, characters: List[str],
+                               user_id: Optional[int] = None, guild_id: Optional[int] = None):
+        """Record several picks of one game at once, e.g. a drafted team.
+        
+        All picks enter the buffer together, so they are written in the same
+        flush transaction.
+        
+        Args:
+            game (str): The game name
+            characters (List[str]): The characters that were picked
+            user_id (Optional[int]): Discord user who rolled the picks
+            guild_id (Optional[int]): Discord server the picks were rolled in
         """
+        now = int(time.time())
+        guild_id = NO_GUILD if guild_id is None else guild_id
+        with self._pick_lock:
+            for character in characters:
+                self._pending_events.append((user_id, guild_id, game, character, now))
+                entry = self._pending_picks.get((guild_id, game, character))
+                if entry is None:
+                    self._pending_picks[(guild_id, game, character)] = [1, now]
+                else:
+                    entry[0] += 1
+                    entry[1] = now
+                self._pending_count += 1
+                if self.rankings is not None:
+                    self.rankings.record(guild_id, game, character)
+            due = (self._pending_count >= self.pick_flush_threshold or
+                   time.monotonic() - self._last_flush >= self.pick_flush_interval)
+        if due:
+            self.flush_picks()
+
+    @timed_query
+    def flush_picks(self) -> int:
+        """Write all buffered character picks to the database.
+        
+        All pending picks and their pick events are written in one
+        transaction using ``executemany``: the per-guild counts to
+        guild_stats and their sums to character_stats. If the write fails
+        the picks are put back into the buffer so a later flush can retry them.
+        
+        Returns:
+            int: Number of picks written
+        """
+        with self._pick_lock:
+            if not self._pending_picks:
+                self._last_flush = time.monotonic()
+                return 0
+            pending, self._pending_picks = self._pending_picks, {}
+            events, self._pending_events = self._pending_events, []
+            count, self._pending_count = self._pending_count, 0
+            self._last_flush = time.monotonic()
+        
+        # All-guild totals are the sums of the per-guild counts
+        totals: Dict[Tuple[str, str], list] = {}
+        for (_, game, character), (picks, picked_at) in pending.items():
+            total = totals.setdefault((game, character), [0, 0])
+            total[0] += picks
+            total[1] = max(total[1], picked_at)
+        rows = [(game, character, picks, datetime.utcfromtimestamp(picked_at).strftime('%Y-%m-%d %H:%M:%S'))
+                for (game, character), (picks, picked_at) in totals.items()]
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute('''
+                new_ids = self._assign_character_ids(cursor, totals)
+                character_ids = {**self._character_ids, **new_ids}
+                cursor.executemany('''
                     INSERT INTO character_stats (game, character, picks, last_picked)
-                    VALUES (?, ?, 1, CURRENT_TIMESTAMP)
-                    ON CONFLICT(game, character) DO UPDATE 
-                    SET picks = picks + 1, last_picked = CURRENT_TIMESTAMP
-                ''', (game, character))
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(game, character) DO UPDATE
+                    SET picks = picks + excluded.picks, last_picked = excluded.last_picked
+                ''', rows)
+                cursor.executemany('''
+                    INSERT INTO guild_stats (guild_id, character_id, picks, last_picked)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(guild_id, character_id) DO UPDATE
+                    SET picks = picks + excluded.picks, last_picked = excluded.last_picked
+                ''', [(guild_id, character_ids[game, character], picks, picked_at)
+                      for (guild_id, game, character), (picks, picked_at) in pending.items()])
+                cursor.executemany('''
+                    INSERT INTO pick_events (user_id, guild_id, character_id, picked_at)
+                    VALUES (?, ?, ?, ?)
+                ''', [(user_id, guild_id, character_ids[game, character], picked_at)
+                      for user_id, guild_id, game, character, picked_at in events])
                 conn.commit()
+            # IDs are only cached once the transaction that created them committed
+            self._character_ids.update(new_ids)
+        except sqlite3.Error as e:
+            logger.error("Error recording character pick: %s", e)
+            with self._pick_lock:
+                for key, (picks, picked_at) in pending.items():
+                    entry = self._pending_picks.setdefault(key, [0, picked_at])
+                    entry[0] += picks
+                self._pending_events[:0] = events
+                self._pending_count += count
+            raise
+        return count
+
+    def _assign_character_ids(self, cursor: sqlite3.Cursor,
+                              keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+        """Look up or create the IDs of characters that are not cached yet.
+
+        Another process sharing the database may have created them already,
+        in which case its IDs are reused.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor of the flush transaction
+            keys (Iterable[Tuple[str, str]]): (game, character) pairs
+
+        Returns:
+            Dict[Tuple[str, str], int]: IDs of the pairs that were not cached
+        """
+        new_ids: Dict[Tuple[str, str], int] = {}
+        for game, character in keys:
+            if (game, character) in self._character_ids:
+                continue
+            cursor.execute('INSERT INTO games (name) VALUES (?) ON CONFLICT(name) DO NOTHING', (game,))
+            cursor.execute('''
+                INSERT INTO characters (game_id, name)
+                SELECT id, ? FROM games WHERE name = ?
+                ON CONFLICT(game_id, name) DO NOTHING
+            ''', (character, game))
+            cursor.execute('''
+                SELECT characters.id FROM characters
+                JOIN games ON games.id = characters.game_id
+                WHERE games.name = ? AND characters.name = ?
+            ''', (game, character))
+            new_ids[game, character] = cursor.fetchone()[0]
+        return new_ids
+
+    @timed_query
+    def load_character_ids(self) -> Dict[Tuple[str, str], int]:
+        """Read the IDs of every known game and character.
+
+        Returns:
+            Dict[Tuple[str, str], int]: Character ID per (game, character)
+        """
+        try:
+            with self.get_connection() as conn:
+                rows = conn.execute('''
+                    SELECT games.name, characters.name, characters.id FROM characters
+                    JOIN games ON games.id = characters.game_id
+                ''').fetchall()
+        except sqlite3.Error as e:
+            logger.error("Error loading character IDs: %s", e)
+            raise
+        return {(game, character): character_id for game, character, character_id in rows}
+
+    @timed_query
+    def load_rankings(self) -> Rankings:
+        """Build in-memory pick rankings from the stored statistics.
+
+        Returns:
+            Rankings: Rankings seeded with the pick counts of every guild
+                and across all guilds
+        """
+        rankings = Rankings()
+        rankings.seed(ALL_GUILDS, self.get_character_stats())
+        try:
+            with self.get_connection() as conn:
+                rows = conn.execute('''
+                    SELECT guild_id, games.name, characters.name, picks FROM guild_stats
+                    JOIN characters ON characters.id = character_id
+                    JOIN games ON games.id = characters.game_id
+                ''')
+                for guild_id, game, character, picks in rows:
+                    rankings.add(guild_id, game, character, picks)
+        except sqlite3.Error as e:
+            logger.error("Error loading pick rankings: %s", e)
+            raise
+        return rankings
+
+    @property
+    def pending_picks(self) -> int:
+        """int: Number of recorded picks not yet written to the database."""
+        return self._pending_count
+
+    def close(self):
+        """Flush any buffered picks and close pooled connections.
+        
+        Call this when the bot shuts down.
+        """
+        try:
+            self.flush_picks()
+        finally:
+            self.pool.close()
+
+    @timed_query
+    def report_shard_health(self, worker_id: int, pid: int,
+                            shards: List[Tuple[int, str, Optional[float], int]],
+                            now: Optional[float] = None):
+        """Store the latest health of the shards run by one process.
+        
+        Args:
+            worker_id (int): Launcher worker number (0 when run directly)
+            pid (int): Process ID of the bot process
+            shards (List[Tuple[int, str, Optional[float], int]]):
+                (shard_id, status, latency_ms, guilds) per shard
+            now (Optional[float]): Report time, defaults to the clock
+        """
+        updated_at = int(time.time() if now is None else now)
+        try:
+            with self.get_connection() as conn:
+                conn.executemany('''
+                    INSERT INTO shard_health
+                        (shard_id, worker_id, pid, status, latency_ms, guilds, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(shard_id) DO UPDATE SET
+                        worker_id = excluded.worker_id,
+                        pid = excluded.pid,
+                        status = excluded.status,
+                        latency_ms = excluded.latency_ms,
+                        guilds = excluded.guilds,
+                        updated_at = excluded.updated_at
+                ''', [(shard_id, worker_id, pid, status, latency_ms, guilds, updated_at)
+                      for shard_id, status, latency_ms, guilds in shards])
         except sqlite3.Error as e:
-            logger.error(f"Error recording character pick: {e}")
+            logger.error("Error reporting shard health: %s", e)
+            raise
+    
+    @timed_query
+    def get_shard_health(self) -> List[Tuple]:
+        """Retrieve the latest health report of every shard.
+        
+        Returns:
+            List[Tuple]: (shard_id, worker_id, pid, status, latency_ms, guilds,
+                         updated_at) ordered by shard ID
+        """
+        try:
+            with self.get_connection() as conn:
+                return conn.execute('''
+                    SELECT shard_id, worker_id, pid, status, latency_ms, guilds, updated_at
+                    FROM shard_health ORDER BY shard_id
+                ''').fetchall()
+        except sqlite3.Error as e:
+            logger.error("Error retrieving shard health: %s", e)
             raise
 
+    @timed_query
     def get_character_stats(self, game: Optional[str] = None) -> List[Tuple]:
         """Retrieve character pick statistics, optionally filtered by game.
         
@@ -123,53 +556,227 @@ class Database:
             
         Returns:
             List[Tuple]: List of tuples containing (character, picks) or (game, character, picks)
-                        depending on whether game filter is applied
+                        depending on whether game filter is applied, most picked first
         """
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor()
                 if game:
-                    cursor.execute('''
-                        SELECT character, picks FROM character_stats
-                        WHERE game = ? ORDER BY picks DESC
-                    ''', (game,))
-                else:
-                    cursor.execute('''
-                        SELECT game, character, picks FROM character_stats
-                        ORDER BY game, picks DESC
-                    ''')
+                    return conn.execute('''
+                        SELECT character, picks FROM character_stats WHERE game = ?
+                        ORDER BY picks DESC, character
+                    ''', (game,)).fetchall()
+                return conn.execute('''
+                    SELECT game, character, picks FROM character_stats
+                    ORDER BY game, picks DESC, character
+                ''').fetchall()
+        except sqlite3.Error as e:
+            logger.error("Error retrieving character stats: %s", e)
+            raise
+
+    @timed_query
+    def get_character_stats_page(self, game: Optional[str] = None,
+                                 after: Optional[Tuple[str, int, str]] = None,
+                                 limit: int = 15,
+                                 since: Optional[int] = None,
+                                 guild_id: Optional[int] = None) -> List[Tuple[str, str, int]]:
+        """Retrieve one page of character statistics from the database.
+        
+        Rows are ordered by game, then picks (highest first), then character
+        name. Pages use keyset pagination: instead of an OFFSET, the next
+        page starts after the last row of the previous one, so every page
+        costs the same no matter how deep into the table it is.
+        
+        Args:
+            game (Optional[str]): If provided, only this game's stats
+            after (Optional[Tuple[str, int, str]]): (game, picks, character)
+                of the last row on the previous page, None for the first page
+            limit (int): Maximum number of rows to return
+            since (Optional[int]): If provided, only count picks made at or
+                after this Unix time. Served from the pick rollups, so picks
+                older than the hourly retention are counted by whole days.
+            guild_id (Optional[int]): If provided, only count picks made in
+                this guild, otherwise picks from every guild
+            
+        Returns:
+            List[Tuple[str, str, int]]: (game, character, picks) tuples
+            
+        Note:
+            All-time pages are read from the in-memory rankings when they
+            are enabled, and include buffered picks. Otherwise buffered
+            picks are not flushed first; that is left to the writer, so a
+            page can miss up to ``pick_flush_interval`` seconds of picks.
+        """
+        if since is None and self.rankings is not None:
+            with self._pick_lock:
+                return self.rankings.page(game, after, limit,
+                                          ALL_GUILDS if guild_id is None else guild_id)
+        conditions = []
+        params: List[Any] = []
+        if since is None and guild_id is None:
+            source = 'character_stats'
+        else:
+            if since is None:
+                counts = 'SELECT character_id, picks FROM guild_stats WHERE guild_id = ?'
+                params.append(guild_id)
+            else:
+                # Each pick lives in exactly one of the three tiers at a time.
+                # Rollups keep separate rows for all guilds, events are summed.
+                events = 'WHERE picked_at >= ?' if guild_id is None else 'WHERE guild_id = ? AND picked_at >= ?'
+                counts = f'''
+                    SELECT character_id, SUM(picks) AS picks FROM (
+                        SELECT character_id, COUNT(*) AS picks FROM pick_events
+                        {events} GROUP BY character_id
+                        UNION ALL
+                        SELECT character_id, picks FROM pick_rollups_hourly
+                        WHERE guild_id = ? AND bucket >= ?
+                        UNION ALL
+                        SELECT character_id, picks FROM pick_rollups_daily
+                        WHERE guild_id = ? AND bucket >= ?
+                    ) GROUP BY character_id
+                '''
+                rollup_guild = ALL_GUILDS if guild_id is None else guild_id
+                if guild_id is not None:
+                    params.append(guild_id)
+                params.extend([since, rollup_guild, since - since % HOUR,
+                               rollup_guild, since - since % DAY])
+            source = f'''(
+                SELECT games.name AS game, characters.name AS character, counts.picks AS picks
+                FROM ({counts}) AS counts
+                JOIN characters ON characters.id = counts.character_id
+                JOIN games ON games.id = characters.game_id
+            )'''
+        if game:
+            conditions.append('game = ?')
+            params.append(game)
+        if after is not None:
+            last_game, last_picks, last_character = after
+            conditions.append('''(game > ? OR (game = ? AND (picks < ? OR
+                (picks = ? AND character > ?))))''')
+            params.extend([last_game, last_game, last_picks, last_picks, last_character])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT game, character, picks FROM {source}
+                    {where}
+                    ORDER BY game, picks DESC, character
+                    LIMIT ?
+                ''', (*params, limit))
                 return cursor.fetchall()
         except sqlite3.Error as e:
-            logger.error(f"Error retrieving character stats: {e}")
+            logger.error("Error retrieving character stats page: %s", e)
             raise
 
-    def add_favorite(self, user_id: int, game: str, character: str):
+    @timed_query
+    def compact_pick_events(self, now: Optional[float] = None) -> int:
+        """Roll pick events up into hourly and daily totals.
+        
+        1. Events from completed hours are summed into pick_rollups_hourly,
+           once per guild and once for ``ALL_GUILDS``, and deleted
+        2. Hourly rows older than ``hourly_retention`` are summed into
+           pick_rollups_daily and deleted
+        3. Daily rows older than ``daily_retention`` are deleted
+        4. favorite_changes rows older than twice the favorites cache TTL
+           are deleted; every cache entry from before them has expired
+        
+        Everything runs in one transaction, so a window query never sees a
+        pick in two tiers at once.
+        
+        Args:
+            now (Optional[float]): Current Unix time, defaults to the clock
+            
+        Returns:
+            int: Number of pick events rolled up
+        """
+        self.flush_picks()
+        now = int(time.time() if now is None else now)
+        hour_start = now - now % HOUR
+        hourly_cutoff = now - self.hourly_retention
+        daily_cutoff = now - self.daily_retention
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                # Grouping by bucket first lets the window index find old events
+                cursor.execute('''
+                    INSERT INTO pick_rollups_hourly (guild_id, bucket, character_id, picks)
+                    SELECT guild_id, picked_at - picked_at % ?, character_id, COUNT(*)
+                    FROM pick_events WHERE picked_at < ?
+                    GROUP BY 2, 1, 3
+                    ON CONFLICT(guild_id, bucket, character_id) DO UPDATE
+                    SET picks = picks + excluded.picks
+                ''', (HOUR, hour_start))
+                cursor.execute('''
+                    INSERT INTO pick_rollups_hourly (guild_id, bucket, character_id, picks)
+                    SELECT ?, picked_at - picked_at % ?, character_id, COUNT(*)
+                    FROM pick_events WHERE picked_at < ?
+                    GROUP BY 2, 3
+                    ON CONFLICT(guild_id, bucket, character_id) DO UPDATE
+                    SET picks = picks + excluded.picks
+                ''', (ALL_GUILDS, HOUR, hour_start))
+                cursor.execute('DELETE FROM pick_events WHERE picked_at < ?', (hour_start,))
+                rolled_up = cursor.rowcount
+                
+                # Only move whole days so a day is never split across tiers
+                day_cutoff = hourly_cutoff - hourly_cutoff % DAY
+                cursor.execute('''
+                    INSERT INTO pick_rollups_daily (guild_id, bucket, character_id, picks)
+                    SELECT guild_id, bucket - bucket % ?, character_id, SUM(picks)
+                    FROM pick_rollups_hourly WHERE bucket < ?
+                    GROUP BY 2, 1, 3
+                    ON CONFLICT(guild_id, bucket, character_id) DO UPDATE
+                    SET picks = picks + excluded.picks
+                ''', (DAY, day_cutoff))
+                cursor.execute('DELETE FROM pick_rollups_hourly WHERE bucket < ?', (day_cutoff,))
+                cursor.execute('DELETE FROM pick_rollups_daily WHERE bucket < ?',
+                               (daily_cutoff - daily_cutoff % DAY,))
+                cursor.execute('DELETE FROM favorite_changes WHERE changed_at < ?',
+                               (now - 2 * self.favorites_cache.ttl,))
+        except sqlite3.Error as e:
+            logger.error("Error compacting pick events: %s", e)
+            raise
+        if rolled_up:
+            logger.info("Rolled up %s pick events", rolled_up)
+        return rolled_up
+
+    @timed_query
+    def add_favorite(self, user_id: int, game: str, character: str) -> bool:
         """Add a character to a user's favorites.
         
         Args:
             user_id (int): Discord user ID
             game (str): Game name
             character (str): Character name to add as favorite
+            
+        Returns:
+            bool: True if added, False if it was already a favorite
         """
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
-                    INSERT INTO user_favorites (user_id, game, character)
+                    INSERT OR IGNORE INTO user_favorites (user_id, game, character)
                     VALUES (?, ?, ?)
                 ''', (user_id, game, character))
-                conn.commit()
+                changed = cursor.rowcount == 1
         except sqlite3.Error as e:
-            logger.error(f"Error adding favorite: {e}")
+            logger.error("Error adding favorite: %s", e)
             raise
+        # Invalidate after the commit so no reader can re-cache the old list
+        self._invalidate_favorites(user_id)
+        return changed
 
-    def remove_favorite(self, user_id: int, game: str, character: str):
+    @timed_query
+    def remove_favorite(self, user_id: int, game: str, character: str) -> bool:
         """Remove a character from a user's favorites.
         
         Args:
             user_id (int): Discord user ID
             game (str): Game name
             character (str): Character name to remove from favorites
+            
+        Returns:
+            bool: True if removed, False if it was not a favorite
         """
         try:
             with self.get_connection() as conn:
@@ -178,14 +785,106 @@ class Database:
                     DELETE FROM user_favorites
                     WHERE user_id = ? AND game = ? AND character = ?
                 ''', (user_id, game, character))
-                conn.commit()
+                changed = cursor.rowcount == 1
         except sqlite3.Error as e:
-            logger.error(f"Error removing favorite: {e}")
+            logger.error("Error removing favorite: %s", e)
             raise
+        self._invalidate_favorites(user_id)
+        return changed
 
+    @timed_query
+    def toggle_favorite(self, user_id: int, game: str, character: str) -> bool:
+        """Add a character to a user's favorites, or remove it if present.
+        
+        The delete and the conditional insert run in one transaction on one
+        connection, so the toggle is atomic and needs no prior lookup.
+        
+        Args:
+            user_id (int): Discord user ID
+            game (str): Game name
+            character (str): Character name to toggle
+            
+        Returns:
+            bool: True if the character is now a favorite, False if it was removed
+        """
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    DELETE FROM user_favorites
+                    WHERE user_id = ? AND game = ? AND character = ?
+                ''', (user_id, game, character))
+                added = cursor.rowcount == 0
+                if added:
+                    cursor.execute('''
+                        INSERT INTO user_favorites (user_id, game, character)
+                        VALUES (?, ?, ?)
+                    ''', (user_id, game, character))
+        except sqlite3.Error as e:
+            logger.error("Error toggling favorite: %s", e)
+            raise
+        self._invalidate_favorites(user_id)
+        return added
+
+    def _invalidate_favorites(self, user_id: int):
+        """Drop a user's cached favorites after a write."""
+        with self._favorites_lock:
+            self._favorites_generation += 1
+            self.favorites_cache.pop(user_id)
+
+    def _last_favorite_change(self) -> int:
+        """Return the ID of the newest row in favorite_changes."""
+        with self.get_connection() as conn:
+            return conn.execute('SELECT COALESCE(MAX(id), 0) FROM favorite_changes').fetchone()[0]
+
+    def _apply_favorite_changes(self):
+        """Drop users whose favorites changed since the last check from the cache.
+
+        Other bot processes sharing the database cannot invalidate this
+        process's cache directly, so their writes are read back from the
+        favorite_changes log, which triggers fill on every write.
+        """
+        with self._favorites_lock:
+            seen = self._favorite_changes_seen
+        checked = time.monotonic()
+        with self.get_connection() as conn:
+            changes = conn.execute('SELECT id, user_id FROM favorite_changes WHERE id > ?',
+                                   (seen,)).fetchall()
+        self._favorite_changes_checked = checked
+        if not changes:
+            return
+        with self._favorites_lock:
+            self._favorites_generation += 1
+            for _, user_id in changes:
+                self.favorites_cache.pop(user_id)
+            self._favorite_changes_seen = max(self._favorite_changes_seen, changes[-1][0])
+
+    def favorite_changes_due(self) -> bool:
+        """Return whether a check for favorites changed by other processes is due."""
+        return time.monotonic() - self._favorite_changes_checked >= self.favorite_changes_interval
+
+    def get_cached_favorites(self, user_id: int) -> Optional[List[Tuple[str, str]]]:
+        """Get a user's favorites from the cache only.
+        
+        Does not check for writes by other processes; ``get_favorites``
+        does that before using the cache once a check is due.
+        
+        Returns:
+            Optional[List[Tuple[str, str]]]: The favorites, or None if not cached
+        """
+        with self._favorites_lock:
+            favorites = self.favorites_cache.get(user_id)
+        return list(favorites) if favorites is not None else None
+
+    @timed_query
     def get_favorites(self, user_id: int) -> List[Tuple[str, str]]:
         """Get all favorite characters for a user.
         
+        Results are cached per user until the user's favorites change, in
+        this or any other process, or the cache entry expires. Changes made
+        by other processes are picked up within ``favorite_changes_interval``
+        seconds.
+        
         Args:
             user_id (int): Discord user ID
             
@@ -193,13 +892,31 @@ class Database:
             List[Tuple[str, str]]: List of (game, character) tuples
         """
         try:
+            if self.favorite_changes_due():
+                self._apply_favorite_changes()
+            cached = self.get_cached_favorites(user_id)
+            if cached is not None:
+                return cached
+            with self._favorites_lock:
+                generation = self._favorites_generation
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT game, character FROM user_favorites
                     WHERE user_id = ?
+                    ORDER BY game, character
                 ''', (user_id,))
-                return cursor.fetchall()
+                favorites = cursor.fetchall()
         except sqlite3.Error as e:
-            logger.error(f"Error retrieving favorites: {e}")
-            raise 
\ No newline at end of file
+            logger.error("Error retrieving favorites: %s", e)
+            raise
+        with self._favorites_lock:
+            # Skip caching if a write happened while we were reading
+            if generation == self._favorites_generation:
+                self.favorites_cache.set(user_id, tuple(favorites))
+        return favorites
+
+    @timed_query
+    def get_user_favorites(self, user_id: int) -> List[Tuple[str, str]]:
+        """Alias of ``get_favorites``."""
+        return self.get_favorites(user_id)
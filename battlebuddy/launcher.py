@@ -0,0 +1,207 @@
+"""
+Multi-process launcher for BattleBuddy Discord bot.
+
+Runs the bot as several worker processes, each owning a contiguous range
+of gateway shards, so the bot can use more than one core. Workers share
+the SQLite database (WAL mode, additive pick UPSERTs and per-process write
+buffers keep concurrent writers safe). Only worker 0 syncs slash commands
+and compacts pick events.
+
+The launcher restarts workers that crash (with exponential backoff),
+forwards Ctrl+C / SIGTERM to them, and periodically logs shards whose
+health reports are missing or unhealthy.
+
+Usage:
+    python launcher.py --workers 4 [--shard-count 16] [--force-sync]
+    python launcher.py --status
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+import discord
+from dotenv import load_dotenv
+
+from config import (
+    DATABASE_PATH, LAUNCHER_MAX_RESTART_DELAY, LAUNCHER_RESTART_DELAY, RATE_LIMIT_BACKEND,
+    SHARD_HEALTH_INTERVAL, SHARD_HEALTH_STALE_AFTER
+)
+from database import Database
+from sharding import format_health, shard_ranges, worker_env
+
+logger = logging.getLogger(__name__)
+
+BOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bot.py')
+
+async def recommended_shard_count(token: str) -> int:
+    """Ask Discord how many shards the bot should use."""
+    client = discord.Client(intents=discord.Intents.none())
+    try:
+        await client.login(token)
+        shards, _, _ = await client.http.get_bot_gateway()
+        return shards
+    finally:
+        await client.close()
+
+class Worker:
+    """One bot process and its restart bookkeeping."""
+
+    def __init__(self, worker_id: int, shard_count: int, shard_ids: List[int], force_sync: bool,
+                 worker_count: int = 1):
+        self.worker_id = worker_id
+        self.shard_count = shard_count
+        self.shard_ids = shard_ids
+        self.worker_count = worker_count
+        self.force_sync = force_sync
+        self.process: Optional[subprocess.Popen] = None
+        self.restart_delay = LAUNCHER_RESTART_DELAY
+        self.restart_at = 0.0
+
+    def start(self):
+        """Start the worker process."""
+        args = [sys.executable, BOT_PATH]
+        if self.worker_id != 0:
+            args.append('--no-maintenance')
+        elif self.force_sync:
+            args.append('--force-sync')
+            # Only force the first start, not every restart
+            self.force_sync = False
+        self.process = subprocess.Popen(args, env=worker_env(self.worker_id, self.shard_count,
+                                                             self.shard_ids, self.worker_count))
+        self.started_at = time.monotonic()
+        logger.info("Started worker %s (pid %s) for shards %s-%s of %s", self.worker_id,
+                    self.process.pid, self.shard_ids[0], self.shard_ids[-1], self.shard_count)
+
+    def poll(self, now: float) -> bool:
+        """Restart the worker if it crashed and its backoff has passed.
+
+        Returns:
+            bool: False once the worker has exited cleanly and should stay down
+        """
+        if self.process is None:
+            if now >= self.restart_at:
+                self.start()
+            return True
+        code = self.process.poll()
+        if code is None:
+            # Reset the backoff once a worker has stayed up for a while
+            if now - self.started_at > LAUNCHER_MAX_RESTART_DELAY:
+                self.restart_delay = LAUNCHER_RESTART_DELAY
+            return True
+        if code == 0:
+            logger.info("Worker %s exited cleanly", self.worker_id)
+            return False
+        logger.error("Worker %s exited with code %s, restarting in %ss",
+                     self.worker_id, code, self.restart_delay)
+        self.process = None
+        self.restart_at = now + self.restart_delay
+        self.restart_delay = min(self.restart_delay * 2, LAUNCHER_MAX_RESTART_DELAY)
+        return True
+
+    def stop(self):
+        """Ask the worker process to shut down.
+
+        Sends SIGTERM, which the bot handles like Ctrl+C: it disconnects and
+        flushes its buffered picks before exiting.
+        """
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+
+def check_health(db: Database, now: float):
+    """Log shards that have not reported recently or are not ready."""
+    for shard_id, worker_id, _, status, _, _, updated_at in db.get_shard_health():
+        if now - updated_at > SHARD_HEALTH_STALE_AFTER:
+            logger.warning("Shard %s (worker %s) has not reported for %.0fs",
+                           shard_id, worker_id, now - updated_at)
+        elif status != 'ready':
+            logger.warning("Shard %s (worker %s) is %s", shard_id, worker_id, status)
+
+def supervise(workers: List[Worker], db: Database):
+    """Run workers until they all exit or the launcher is stopped."""
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for worker in workers:
+        worker.start()
+    next_health_check = time.time() + SHARD_HEALTH_STALE_AFTER
+    running = list(workers)
+    while running and not stopping:
+        time.sleep(1)
+        running = [worker for worker in running if worker.poll(time.monotonic())]
+        if time.time() >= next_health_check:
+            next_health_check = time.time() + SHARD_HEALTH_INTERVAL
+            try:
+                check_health(db, time.time())
+            except Exception as e:
+                logger.error("Error checking shard health: %s", e)
+
+    logger.info("Stopping workers")
+    for worker in workers:
+        worker.stop()
+    for worker in workers:
+        if worker.process is None:
+            continue
+        try:
+            worker.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            logger.warning("Worker %s did not stop, killing it", worker.worker_id)
+            worker.process.kill()
+
+def main(argv: Optional[List[str]] = None):
+    """Parse arguments and run the launcher."""
+    parser = argparse.ArgumentParser(description="Run BattleBuddy as several sharded worker processes.")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes (default: CPU count)")
+    parser.add_argument('--shard-count', type=int,
+                        help="total number of shards (default: Discord's recommendation)")
+    parser.add_argument('--force-sync', action='store_true',
+                        help="sync slash commands with Discord even if they look unchanged")
+    parser.add_argument('--status', action='store_true',
+                        help="print the last reported health of every shard and exit")
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    db = Database(DATABASE_PATH, pool_size=1)
+    try:
+        if args.status:
+            print(format_health(db.get_shard_health(), stale_after=SHARD_HEALTH_STALE_AFTER))
+            return
+
+        shard_count = args.shard_count
+        if shard_count is None:
+            load_dotenv()
+            token = os.getenv('DISCORD_TOKEN')
+            if not token:
+                parser.error("DISCORD_TOKEN is required to look up the shard count; "
+                             "pass --shard-count instead")
+            shard_count = asyncio.run(recommended_shard_count(token))
+            logger.info("Discord recommends %s shard(s)", shard_count)
+        # Every worker needs at least one shard
+        shard_count = max(shard_count, args.workers)
+
+        if args.workers > 1 and RATE_LIMIT_BACKEND == 'memory':
+            logger.warning("RATE_LIMIT_BACKEND is 'memory', so each of the %s workers enforces "
+                           "its own rate limits; use 'auto' or 'sqlite' to share them", args.workers)
+        workers = [Worker(worker_id, shard_count, shard_ids, args.force_sync, args.workers)
+                   for worker_id, shard_ids in enumerate(shard_ranges(shard_count, args.workers))]
+        supervise(workers, db)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
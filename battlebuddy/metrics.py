@@ -0,0 +1,331 @@
+"""
+In-process metrics for BattleBuddy Discord bot.
+
+Records latency histograms with error counts for:
+
+1. Every slash command, end to end (``timed_command``)
+2. The time each command spent waiting on the database and on Discord
+   API calls (``phase``), so slow commands can be attributed
+3. How many commands had to defer their response (``record_deferred``)
+4. Every ``Database`` query method (``timed_query``)
+
+Recording an observation is a bucket bisect and a few additions under a
+lock, a few microseconds per command. Histograms use fixed buckets, so
+memory does not grow with traffic. They can be read with
+``Metrics.render_prometheus`` (served over HTTP by
+``start_metrics_server``) or summarized with ``Metrics.command_summary``.
+"""
+import asyncio
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+# Upper bounds in seconds, from a cached lookup to a slow Discord call
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Phases of a command that are timed separately
+PHASES = ('db', 'discord')
+
+class Histogram:
+    """Latency histogram with fixed buckets and an error count.
+
+    Safe to update from several threads.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        # One count per bucket plus the +Inf bucket; not cumulative
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, error: bool = False):
+        """Record one observation."""
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += seconds
+            if error:
+                self.errors += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        """Return a consistent (counts, sum, errors) copy."""
+        with self._lock:
+            return list(self.counts), self.sum, self.errors
+
+    @property
+    def count(self) -> int:
+        """Number of observations."""
+        return sum(self.counts)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating within its bucket.
+
+        Returns:
+            float: The estimate in seconds, 0.0 without observations. Values
+                in the +Inf bucket are reported as the largest bound.
+        """
+        counts, _, _ = self.snapshot()
+        total = sum(counts)
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            if seen + count >= rank and count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+class CommandSummary(NamedTuple):
+    """Latency and error figures of one command."""
+    command: str
+    count: int
+    errors: int
+    p50: float
+    p95: float
+    p99: float
+    mean_db: float
+    mean_discord: float
+    deferred: int
+
+class _CommandRun:
+    """Phase timings of the command running in the current task."""
+    __slots__ = ('phases', 'failed', 'deferred')
+
+    def __init__(self):
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.failed = False
+        self.deferred = False
+
+_current_command: ContextVar[Optional[_CommandRun]] = ContextVar('battlebuddy_command', default=None)
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Add the time spent in the block to a phase of the running command.
+
+    Outside a timed command this does nothing.
+    """
+    run = _current_command.get()
+    if run is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        run.phases[name] = run.phases.get(name, 0.0) + perf_counter() - start
+
+def record_error():
+    """Count the running command as failed even though it handled the error."""
+    run = _current_command.get()
+    if run is not None:
+        run.failed = True
+
+def record_deferred():
+    """Count the running command as deferred past the response deadline."""
+    run = _current_command.get()
+    if run is not None:
+        run.deferred = True
+
+class Metrics:
+    """Registry of command and query histograms."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.started = time.time()
+        self.commands: Dict[str, Histogram] = {}
+        self.command_phases: Dict[Tuple[str, str], Histogram] = {}
+        self.queries: Dict[str, Histogram] = {}
+        self.deferred: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, table: dict, key) -> Histogram:
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table.setdefault(key, Histogram(self.buckets))
+        return histogram
+
+    def observe_command(self, command: str, seconds: float,
+                        phases: Optional[Dict[str, float]] = None, error: bool = False,
+                        deferred: bool = False):
+        """Record one run of a command and the time it spent in each phase."""
+        self._histogram(self.commands, command).observe(seconds, error)
+        if deferred:
+            with self._lock:
+                self.deferred[command] = self.deferred.get(command, 0) + 1
+        for name, phase_seconds in (phases or {}).items():
+            self._histogram(self.command_phases, (command, name)).observe(phase_seconds)
+
+    def observe_query(self, method: str, seconds: float, error: bool = False):
+        """Record one call of a database method."""
+        self._histogram(self.queries, method).observe(seconds, error)
+
+    def command_summary(self) -> List[CommandSummary]:
+        """Summarize every command that has run, busiest first."""
+        summaries = []
+        for command, histogram in self.commands.items():
+            counts, _, errors = histogram.snapshot()
+            count = sum(counts)
+            means = {}
+            for name in PHASES:
+                phase_histogram = self.command_phases.get((command, name))
+                if phase_histogram is None:
+                    means[name] = 0.0
+                else:
+                    phase_counts, phase_sum, _ = phase_histogram.snapshot()
+                    means[name] = phase_sum / max(1, sum(phase_counts))
+            summaries.append(CommandSummary(
+                command, count, errors, histogram.quantile(0.5), histogram.quantile(0.95),
+                histogram.quantile(0.99), means['db'], means['discord'],
+                self.deferred.get(command, 0)))
+        summaries.sort(key=lambda summary: summary.count, reverse=True)
+        return summaries
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = [
+            '# HELP battlebuddy_uptime_seconds Seconds since metrics collection started',
+            '# TYPE battlebuddy_uptime_seconds gauge',
+            f'battlebuddy_uptime_seconds {time.time() - self.started:.3f}',
+        ]
+        self._render_family(lines, 'battlebuddy_command_seconds', 'Slash command latency',
+                            [({'command': command}, histogram)
+                             for command, histogram in sorted(self.commands.items())],
+                            errors_help='Slash commands that failed')
+        lines.append('# HELP battlebuddy_command_deferred_total '
+                     'Slash commands that deferred their response because they ran long')
+        lines.append('# TYPE battlebuddy_command_deferred_total counter')
+        with self._lock:
+            deferred = sorted(self.deferred.items())
+        lines.extend(f'battlebuddy_command_deferred_total{{command="{_escape(command)}"}} {count}'
+                     for command, count in deferred)
+        self._render_family(lines, 'battlebuddy_command_phase_seconds',
+                            'Time slash commands spent waiting on the database or Discord',
+                            [({'command': command, 'phase': name}, histogram)
+                             for (command, name), histogram in sorted(self.command_phases.items())])
+        self._render_family(lines, 'battlebuddy_db_seconds', 'Database method latency',
+                            [({'method': method}, histogram)
+                             for method, histogram in sorted(self.queries.items())],
+                            errors_help='Database method calls that raised')
+        return '\n'.join(lines) + '\n'
+
+    def _render_family(self, lines: List[str], name: str, help_text: str,
+                       series: List[Tuple[Dict[str, str], Histogram]],
+                       errors_help: Optional[str] = None):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        errors = []
+        for labels, histogram in series:
+            counts, total, error_count = histogram.snapshot()
+            label_text = ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{name}_bucket{{{label_text},le="{le}"}} {cumulative}')
+            lines.append(f'{name}_sum{{{label_text}}} {total!r}')
+            lines.append(f'{name}_count{{{label_text}}} {cumulative}')
+            errors.append(f'{name[:-len("_seconds")]}_errors_total{{{label_text}}} {error_count}')
+        if errors_help:
+            errors_name = f'{name[:-len("_seconds")]}_errors_total'
+            lines.append(f'# HELP {errors_name} {errors_help}')
+            lines.append(f'# TYPE {errors_name} counter')
+            lines.extend(errors)
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def timed_command(func: Callable) -> Callable:
+    """Decorate a slash command callback to record its latency.
+
+    The command is recorded under the callback's name in the ``metrics``
+    registry of ``interaction.client`` (the bot), if it has one.
+    Exceptions, and errors the callback handles itself and reports with
+    ``record_error``, count as failures. Responses deferred with
+    ``record_deferred`` are counted too.
+    """
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(interaction, *args, **kwargs):
+        metrics = getattr(interaction.client, 'metrics', None)
+        if metrics is None:
+            return await func(interaction, *args, **kwargs)
+        run = _CommandRun()
+        token = _current_command.set(run)
+        start = perf_counter()
+        try:
+            return await func(interaction, *args, **kwargs)
+        except BaseException:
+            run.failed = True
+            raise
+        finally:
+            elapsed = perf_counter() - start
+            _current_command.reset(token)
+            metrics.observe_command(name, elapsed, run.phases, run.failed, run.deferred)
+    return wrapper
+
+def timed_query(func: Callable) -> Callable:
+    """Decorate a method to record its latency in its object's ``metrics``.
+
+    The object's ``metrics`` attribute may be None to disable recording.
+    """
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        metrics = self.metrics
+        if metrics is None:
+            return func(self, *args, **kwargs)
+        start = perf_counter()
+        try:
+            result = func(self, *args, **kwargs)
+        except BaseException:
+            metrics.observe_query(name, perf_counter() - start, error=True)
+            raise
+        metrics.observe_query(name, perf_counter() - start)
+        return result
+    return wrapper
+
+async def start_metrics_server(metrics: Metrics, host: str, port: int) -> asyncio.AbstractServer:
+    """Serve ``GET /metrics`` in the Prometheus text format.
+
+    Bind it to a local address; the endpoint has no authentication.
+    """
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Skip the headers
+            while True:
+                line = await asyncio.wait_for(reader.readline(), timeout=5)
+                if line in (b'\r\n', b'\n', b''):
+                    break
+            parts = request.split()
+            if len(parts) >= 2 and parts[0] == b'GET' and parts[1].split(b'?')[0] in (b'/', b'/metrics'):
+                status, body = '200 OK', metrics.render_prometheus().encode()
+            else:
+                status, body = '404 Not Found', b'Not Found\n'
+            writer.write(
+                f'HTTP/1.1 {status}\r\n'
+                'Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n'
+                f'Content-Length: {len(body)}\r\n'
+                'Connection: close\r\n\r\n'.encode() + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
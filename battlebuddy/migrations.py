@@ -0,0 +1,376 @@
+"""
+Schema migrations for the BattleBuddy SQLite database.
+
+The schema version is stored in ``PRAGMA user_version``. ``MIGRATIONS``
+lists every schema change in order; a database at version N has had the
+first N applied, and ``migrate`` applies the rest, each in its own
+transaction together with the version bump. New schema changes are added
+as a new function at the end of the list, never by editing an old one.
+
+Databases created before migrations existed are at version 0. The first
+migration creates the tables with ``IF NOT EXISTS``, so it is safe to run
+on them; later migrations rebuild tables that older versions of the bot
+created with a different layout.
+"""
+import logging
+import sqlite3
+from typing import Callable, List, Set
+
+logger = logging.getLogger(__name__)
+
+def _columns(cursor: sqlite3.Cursor, table: str) -> Set[str]:
+    cursor.execute(f"PRAGMA table_info({table})")
+    return {row[1] for row in cursor.fetchall()}
+
+def _create_tables(cursor: sqlite3.Cursor):
+    """Version 1: the tables as they were before versioned migrations.
+
+    Older versions of the bot created ``character_stats`` without the
+    ``last_picked`` column, so it is added if missing.
+    """
+    # Pick statistics per character
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS character_stats (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            game TEXT NOT NULL,
+            character TEXT NOT NULL,
+            picks INTEGER DEFAULT 0,
+            last_picked TIMESTAMP,
+            UNIQUE(game, character)
+        )
+    ''')
+    if 'last_picked' not in _columns(cursor, 'character_stats'):
+        cursor.execute("ALTER TABLE character_stats ADD COLUMN last_picked TIMESTAMP")
+
+    # Favorite characters per user
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_favorites (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            game TEXT NOT NULL,
+            character TEXT NOT NULL,
+            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(user_id, game, character)
+        )
+    ''')
+
+    # Append-only log of individual picks, rolled up periodically
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pick_events (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER,
+            guild_id INTEGER,
+            game TEXT NOT NULL,
+            character TEXT NOT NULL,
+            picked_at INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_pick_events_picked_at
+        ON pick_events (picked_at)
+    ''')
+
+    # Pick counts per hour and per day, keyed by bucket start time
+    for table in ('pick_rollups_hourly', 'pick_rollups_daily'):
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                bucket INTEGER NOT NULL,
+                game TEXT NOT NULL,
+                character TEXT NOT NULL,
+                picks INTEGER NOT NULL,
+                PRIMARY KEY (bucket, game, character)
+            ) WITHOUT ROWID
+        ''')
+
+    # Latest health report of every gateway shard
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS shard_health (
+            shard_id INTEGER PRIMARY KEY,
+            worker_id INTEGER NOT NULL,
+            pid INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            latency_ms REAL,
+            guilds INTEGER NOT NULL,
+            updated_at INTEGER NOT NULL
+        )
+    ''')
+
+def _converge_and_index(cursor: sqlite3.Cursor):
+    """Version 2: one schema for every database, and indexes for the hot queries.
+
+    1. ``character_stats`` tables created by the old ``bot.py`` (keyed by
+       game and character, nullable columns, no ``id``) are rebuilt with
+       the layout above
+    2. ``user_favorites`` is rebuilt with its uniqueness constraint as the
+       named index ``idx_user_favorites_user``, which covers the lookup of
+       a user's favorites in (game, character) order
+    3. ``idx_character_stats_ranking`` covers the ranking and /stats page
+       queries, which read rows in (game, picks DESC, character) order
+    4. ``idx_pick_events_window`` replaces ``idx_pick_events_picked_at`` and
+       also covers the windowed /stats query and the hourly rollup
+    """
+    if 'id' not in _columns(cursor, 'character_stats'):
+        cursor.execute('''
+            CREATE TABLE character_stats_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                game TEXT NOT NULL,
+                character TEXT NOT NULL,
+                picks INTEGER DEFAULT 0,
+                last_picked TIMESTAMP,
+                UNIQUE(game, character)
+            )
+        ''')
+        cursor.execute('''
+            INSERT INTO character_stats_new (game, character, picks, last_picked)
+            SELECT game, character, COALESCE(picks, 0), last_picked FROM character_stats
+            WHERE game IS NOT NULL AND character IS NOT NULL
+        ''')
+        cursor.execute("DROP TABLE character_stats")
+        cursor.execute("ALTER TABLE character_stats_new RENAME TO character_stats")
+
+    added_at = 'added_at' if 'added_at' in _columns(cursor, 'user_favorites') else 'CURRENT_TIMESTAMP'
+    cursor.execute('''
+        CREATE TABLE user_favorites_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            game TEXT NOT NULL,
+            character TEXT NOT NULL,
+            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute(f'''
+        INSERT INTO user_favorites_new (user_id, game, character, added_at)
+        SELECT user_id, game, character, {added_at} FROM user_favorites
+        WHERE user_id IS NOT NULL AND game IS NOT NULL AND character IS NOT NULL
+    ''')
+    cursor.execute("DROP TABLE user_favorites")
+    cursor.execute("ALTER TABLE user_favorites_new RENAME TO user_favorites")
+    cursor.execute('''
+        CREATE UNIQUE INDEX idx_user_favorites_user
+        ON user_favorites (user_id, game, character)
+    ''')
+
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_character_stats_ranking
+        ON character_stats (game, picks DESC, character)
+    ''')
+
+    cursor.execute("DROP INDEX IF EXISTS idx_pick_events_picked_at")
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_pick_events_window
+        ON pick_events (picked_at, game, character)
+    ''')
+
+def _partition_by_guild(cursor: sqlite3.Cursor):
+    """Version 3: pick counts per guild, keyed by integer game and character IDs.
+
+    1. ``games`` and ``characters`` give every name picks were recorded
+       under a small integer ID, so per-guild rows do not repeat the names
+    2. ``pick_events`` and both rollup tables store the character ID and
+       the guild. Existing rollups had no guild and become the all-guilds
+       rows (guild ID -1); events without a guild get guild ID 0.
+    3. ``guild_stats`` holds all-time pick counts per guild, seeded from the
+       events still in the log (older picks were never attributed to a guild)
+    """
+    cursor.execute("CREATE TABLE games (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)")
+    cursor.execute('''
+        CREATE TABLE characters (
+            id INTEGER PRIMARY KEY,
+            game_id INTEGER NOT NULL REFERENCES games (id),
+            name TEXT NOT NULL,
+            UNIQUE (game_id, name)
+        )
+    ''')
+    names = '''
+        SELECT game, character FROM character_stats
+        UNION SELECT game, character FROM pick_events
+        UNION SELECT game, character FROM pick_rollups_hourly
+        UNION SELECT game, character FROM pick_rollups_daily
+    '''
+    cursor.execute(f"INSERT INTO games (name) SELECT DISTINCT game FROM ({names}) ORDER BY game")
+    cursor.execute(f'''
+        INSERT INTO characters (game_id, name)
+        SELECT games.id, named.character FROM ({names}) AS named
+        JOIN games ON games.name = named.game
+        ORDER BY games.id, named.character
+    ''')
+    # Joins a table with game and character names to the new character IDs
+    by_name = '''
+        JOIN games ON games.name = old.game
+        JOIN characters ON characters.game_id = games.id AND characters.name = old.character
+    '''
+
+    cursor.execute("ALTER TABLE pick_events RENAME TO pick_events_old")
+    cursor.execute('''
+        CREATE TABLE pick_events (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER,
+            guild_id INTEGER NOT NULL,
+            character_id INTEGER NOT NULL,
+            picked_at INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute(f'''
+        INSERT INTO pick_events (id, user_id, guild_id, character_id, picked_at)
+        SELECT old.id, old.user_id, COALESCE(old.guild_id, 0), characters.id, old.picked_at
+        FROM pick_events_old AS old {by_name}
+    ''')
+    cursor.execute("DROP TABLE pick_events_old")
+    # Covers the all-guilds window and compaction
+    cursor.execute('''
+        CREATE INDEX idx_pick_events_window
+        ON pick_events (picked_at, guild_id, character_id)
+    ''')
+    # Covers the window of one guild
+    cursor.execute('''
+        CREATE INDEX idx_pick_events_guild
+        ON pick_events (guild_id, picked_at, character_id)
+    ''')
+
+    for table in ('pick_rollups_hourly', 'pick_rollups_daily'):
+        cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+        cursor.execute(f'''
+            CREATE TABLE {table} (
+                guild_id INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                character_id INTEGER NOT NULL,
+                picks INTEGER NOT NULL,
+                PRIMARY KEY (guild_id, bucket, character_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute(f'''
+            INSERT INTO {table} (guild_id, bucket, character_id, picks)
+            SELECT -1, old.bucket, characters.id, old.picks FROM {table}_old AS old {by_name}
+        ''')
+        cursor.execute(f"DROP TABLE {table}_old")
+        # Compaction merges and expires rollups by age across all guilds
+        cursor.execute(f"CREATE INDEX idx_{table}_bucket ON {table} (bucket)")
+
+    cursor.execute('''
+        CREATE TABLE guild_stats (
+            guild_id INTEGER NOT NULL,
+            character_id INTEGER NOT NULL,
+            picks INTEGER NOT NULL,
+            last_picked INTEGER NOT NULL,
+            PRIMARY KEY (guild_id, character_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        INSERT INTO guild_stats (guild_id, character_id, picks, last_picked)
+        SELECT guild_id, character_id, COUNT(*), MAX(picked_at) FROM pick_events
+        GROUP BY guild_id, character_id
+    ''')
+
+def _log_favorite_changes(cursor: sqlite3.Cursor):
+    """Version 4: log which users' favorites changed, for other processes' caches.
+
+    Triggers add a row to ``favorite_changes`` in the same transaction as
+    every insert into or delete from ``user_favorites``, whichever process
+    or code path made it. Each process reads the rows it has not seen yet
+    to drop those users from its favorites cache.
+    """
+    cursor.execute('''
+        CREATE TABLE favorite_changes (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            changed_at INTEGER NOT NULL
+        )
+    ''')
+    # Old rows are pruned by age
+    cursor.execute("CREATE INDEX idx_favorite_changes_changed_at ON favorite_changes (changed_at)")
+    for event, row in (('INSERT', 'NEW'), ('DELETE', 'OLD')):
+        cursor.execute(f'''
+            CREATE TRIGGER log_favorite_{event.lower()} AFTER {event} ON user_favorites
+            BEGIN
+                INSERT INTO favorite_changes (user_id, changed_at)
+                VALUES ({row}.user_id, CAST(strftime('%s', 'now') AS INTEGER));
+            END
+        ''')
+
+def _never_reuse_favorite_change_ids(cursor: sqlite3.Cursor):
+    """Version 5: stop favorite_changes from reusing the IDs of pruned rows.
+
+    Processes remember the highest ``favorite_changes`` ID they have
+    applied. Without ``AUTOINCREMENT`` SQLite restarts at 1 once pruning
+    deletes every row, so new changes would never be seen. The table is
+    rebuilt with ``AUTOINCREMENT``, keeping its rows and IDs.
+    """
+    for event in ('insert', 'delete'):
+        cursor.execute(f"DROP TRIGGER log_favorite_{event}")
+    cursor.execute("ALTER TABLE favorite_changes RENAME TO favorite_changes_old")
+    cursor.execute('''
+        CREATE TABLE favorite_changes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            changed_at INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO favorite_changes (id, user_id, changed_at)
+        SELECT id, user_id, changed_at FROM favorite_changes_old
+    ''')
+    cursor.execute("DROP TABLE favorite_changes_old")
+    cursor.execute("CREATE INDEX idx_favorite_changes_changed_at ON favorite_changes (changed_at)")
+    for event, row in (('INSERT', 'NEW'), ('DELETE', 'OLD')):
+        cursor.execute(f'''
+            CREATE TRIGGER log_favorite_{event.lower()} AFTER {event} ON user_favorites
+            BEGIN
+                INSERT INTO favorite_changes (user_id, changed_at)
+                VALUES ({row}.user_id, CAST(strftime('%s', 'now') AS INTEGER));
+            END
+        ''')
+
+# Every schema change in order; the schema version is the number applied
+MIGRATIONS: List[Callable[[sqlite3.Cursor], None]] = [
+    _create_tables,
+    _converge_and_index,
+    _partition_by_guild,
+    _log_favorite_changes,
+    _never_reuse_favorite_change_ids,
+]
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    """Return the number of migrations applied to a database."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn: sqlite3.Connection,
+            migrations: List[Callable[[sqlite3.Cursor], None]] = MIGRATIONS) -> int:
+    """Apply the migrations a database has not had yet.
+
+    Each migration runs in its own ``BEGIN IMMEDIATE`` transaction, so
+    several bot processes starting at once apply it only once, and a
+    failed migration leaves the database at the previous version.
+
+    Args:
+        conn (sqlite3.Connection): Connection to migrate, not in a transaction
+        migrations (List[Callable]): Migrations in order, ``MIGRATIONS`` by default
+
+    Returns:
+        int: The schema version after migrating
+
+    Raises:
+        RuntimeError: If the database was migrated by a newer version of the bot
+    """
+    conn.commit()
+    version = schema_version(conn)
+    if version > len(migrations):
+        raise RuntimeError(f"Database schema version {version} is newer than this bot "
+                           f"supports ({len(migrations)})")
+    while version < len(migrations):
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while we waited for the lock
+            version = schema_version(conn)
+            if version < len(migrations):
+                migration = migrations[version]
+                migration(cursor)
+                version += 1
+                cursor.execute(f"PRAGMA user_version = {version}")
+                logger.info("Migrated database to schema version %s: %s",
+                            version, migration.__doc__.splitlines()[0])
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return version
@@ -0,0 +1,183 @@
+"""
+In-memory pick rankings for BattleBuddy Discord bot.
+
+All-time ``/stats`` pages used to sort ``character_stats`` (or a guild's
+``guild_stats`` rows) in SQLite on every call. Instead, ``Database`` can
+keep a ``Rankings`` object that is seeded from SQLite once at startup and
+updated on every recorded pick, so those pages are served from memory.
+
+Each game's ranking is a doubly linked list of buckets in pick-count order
+(the structure used by O(1) LFU caches). Recording a pick moves a character
+one bucket up, which is O(1) for single picks, and the top K characters
+are read by walking down from the highest bucket in O(K). Characters that
+share a pick count are kept sorted by name, so rankings are ordered exactly
+like the ``ORDER BY picks DESC, character`` queries and accept the same
+keyset cursors.
+
+Rankings are kept per guild and for ``ALL_GUILDS``. They only see the picks
+of the process that keeps them, so they are not used when ``launcher.py``
+runs several workers.
+"""
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Guild ID of the rows and rankings that count picks from every guild
+ALL_GUILDS = -1
+
+class _Bucket:
+    """All characters of one game that share a pick count."""
+    __slots__ = ('picks', 'characters', 'higher', 'lower')
+
+    def __init__(self, picks: float):
+        self.picks = picks
+        # Sorted, so ties rank by name
+        self.characters: List[str] = []
+        self.higher: Optional['_Bucket'] = None
+        self.lower: Optional['_Bucket'] = None
+
+class GameRanking:
+    """Characters of one game ordered by pick count, then name."""
+
+    def __init__(self):
+        # Sentinels: a bottom bucket for 0 picks and a top one that is never reached
+        self._bottom = _Bucket(0)
+        self._top = _Bucket(float('inf'))
+        self._bottom.higher = self._top
+        self._top.lower = self._bottom
+        self._bucket_of: Dict[str, _Bucket] = {}
+
+    def add(self, character: str, picks: int = 1):
+        """Add picks to a character, inserting it if it is new.
+
+        Args:
+            character (str): Character name
+            picks (int): Number of picks to add
+        """
+        old = self._bucket_of.get(character, self._bottom)
+        target = old.picks + picks
+        if old is not self._bottom:
+            del old.characters[bisect_left(old.characters, character)]
+
+        node = old
+        while node.higher.picks <= target:
+            node = node.higher
+        if node.picks != target:
+            bucket = _Bucket(target)
+            bucket.lower, bucket.higher = node, node.higher
+            node.higher.lower = bucket
+            node.higher = bucket
+            node = bucket
+        insort(node.characters, character)
+        self._bucket_of[character] = node
+
+        if old is not self._bottom and not old.characters:
+            old.lower.higher = old.higher
+            old.higher.lower = old.lower
+
+    def picks(self, character: str) -> int:
+        """Return a character's pick count (0 if never picked)."""
+        bucket = self._bucket_of.get(character)
+        return bucket.picks if bucket else 0
+
+    def __iter__(self) -> Iterator[Tuple[str, int]]:
+        """Yield (character, picks) from most to least picked."""
+        return self.after(None)
+
+    def after(self, cursor: Optional[Tuple[int, str]]) -> Iterator[Tuple[str, int]]:
+        """Yield (character, picks) that rank below ``cursor``.
+
+        Args:
+            cursor (Optional[Tuple[int, str]]): (picks, character) of the
+                last entry already seen, None to start from the top
+        """
+        node = self._top.lower
+        start = 0
+        if cursor is not None:
+            last_picks, last_character = cursor
+            bucket = self._bucket_of.get(last_character)
+            if bucket is not None and bucket.picks == last_picks:
+                node = bucket
+            else:
+                while node.picks > last_picks:
+                    node = node.lower
+            if node.picks == last_picks:
+                start = bisect_right(node.characters, last_character)
+        while node is not self._bottom:
+            for character in node.characters[start:]:
+                yield character, node.picks
+            node = node.lower
+            start = 0
+
+    def top(self, k: int) -> List[Tuple[str, int]]:
+        """Return the ``k`` most picked characters as (character, picks)."""
+        result = []
+        if k <= 0:
+            return result
+        for entry in self:
+            result.append(entry)
+            if len(result) == k:
+                break
+        return result
+
+    def __len__(self) -> int:
+        return len(self._bucket_of)
+
+class Rankings:
+    """Pick rankings for every game, per guild and across all guilds."""
+
+    def __init__(self):
+        # Format: {guild_id: {game: GameRanking}}
+        self.guilds: Dict[int, Dict[str, GameRanking]] = {}
+
+    def add(self, guild_id: int, game: str, character: str, picks: int = 1):
+        """Add picks to one guild's ranking only, e.g. when seeding."""
+        games = self.guilds.get(guild_id)
+        if games is None:
+            games = self.guilds[guild_id] = {}
+        ranking = games.get(game)
+        if ranking is None:
+            ranking = games[game] = GameRanking()
+        ranking.add(character, picks)
+
+    def seed(self, guild_id: int, rows: Iterable[Tuple[str, str, int]]):
+        """Add stored (game, character, picks) rows to one guild's rankings."""
+        for game, character, picks in rows:
+            self.add(guild_id, game, character, picks)
+
+    def record(self, guild_id: int, game: str, character: str, picks: int = 1):
+        """Count new picks in their guild and across all guilds."""
+        self.add(guild_id, game, character, picks)
+        self.add(ALL_GUILDS, game, character, picks)
+
+    def top(self, game: str, k: int, guild_id: int = ALL_GUILDS) -> List[Tuple[str, int]]:
+        """Return a game's ``k`` most picked characters as (character, picks)."""
+        ranking = self.guilds.get(guild_id, {}).get(game)
+        return ranking.top(k) if ranking else []
+
+    def page(self, game: Optional[str] = None, after: Optional[Tuple[str, int, str]] = None,
+             limit: int = 15, guild_id: int = ALL_GUILDS) -> List[Tuple[str, str, int]]:
+        """Return a page in the same shape as ``Database.get_character_stats_page``.
+
+        Args:
+            game (Optional[str]): If provided, only this game's stats
+            after (Optional[Tuple[str, int, str]]): (game, picks, character)
+                of the last row on the previous page, None for the first page
+            limit (int): Maximum number of rows to return
+            guild_id (int): Guild whose picks are counted, ``ALL_GUILDS`` for all
+
+        Returns:
+            List[Tuple[str, str, int]]: (game, character, picks) ordered by
+                game, then picks (highest first), then character
+        """
+        games = self.guilds.get(guild_id, {})
+        rows: List[Tuple[str, str, int]] = []
+        for name in sorted(games) if game is None else [game]:
+            ranking = games.get(name)
+            if ranking is None or (after is not None and name < after[0]):
+                continue
+            cursor = after[1:] if after is not None and name == after[0] else None
+            for character, picks in ranking.after(cursor):
+                if len(rows) == limit:
+                    return rows
+                rows.append((name, character, picks))
+        return rows
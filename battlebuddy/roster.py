@@ -0,0 +1,222 @@
+"""
+Precompiled roster index for BattleBuddy Discord bot.
+
+The roster lives in a data file (``data/roster.json`` by default, see
+``config.ROSTER_PATH``) with three sections:
+
+- ``characters``: per game, the ``characters`` list, ``roles`` list and
+  ``role_mapping`` from character to role
+- ``character_info``: optional per-game character descriptions
+- ``game_settings``: optional per-game settings such as ``max_team_size``
+  and ``role_quotas``
+
+The raw data is convenient to edit but slow to query: filtering by role
+means scanning every character, and user input has to be re-cased before
+each lookup. This module compiles it once into an immutable ``RosterIndex``
+holding:
+
+1. Per-game character tuples
+2. Per-(game, role) character tuples
+3. Case-insensitive lookups for game, role and character names
+
+so commands can validate input and look up a role's characters in
+constant time. Building the index also validates the roster and logs any problems.
+"""
+import json
+import logging
+import random
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class RosterError(ValueError):
+    """Raised when a roster file cannot be read or is malformed."""
+
+class GameIndex(NamedTuple):
+    """Lookup tables for a single game."""
+    name: str
+    characters: Tuple[str, ...]
+    roles: Tuple[str, ...]
+    by_role: Mapping[str, Tuple[str, ...]]
+    role_of: Mapping[str, str]
+    character_lookup: Mapping[str, str]
+    role_lookup: Mapping[str, str]
+    settings: Mapping[str, Any] = MappingProxyType({})
+    info: Mapping[str, Mapping[str, Any]] = MappingProxyType({})
+
+    def find_character(self, name: str) -> Optional[str]:
+        """Return the canonical spelling of a character name, ignoring case."""
+        return self.character_lookup.get(name.strip().lower())
+
+    def find_role(self, name: str) -> Optional[str]:
+        """Return the canonical spelling of a role name, ignoring case."""
+        return self.role_lookup.get(name.strip().lower())
+
+class RosterIndex(NamedTuple):
+    """Immutable index over every game in the roster."""
+    games: Mapping[str, GameIndex]
+    game_names: Tuple[str, ...]
+    problems: Tuple[str, ...]
+
+    def find_game(self, name: str) -> Optional[GameIndex]:
+        """Return the index for a game, ignoring case."""
+        return self.games.get(name.strip().lower())
+
+    def random_game(self) -> GameIndex:
+        """Pick a random game."""
+        return self.games[random.choice(self.game_names)]
+
+def validate_roster(characters: Dict[str, dict]) -> List[str]:
+    """Check a ``CHARACTERS``-style dict for inconsistencies.
+
+    Args:
+        characters (Dict[str, dict]): Roster to validate
+
+    Returns:
+        List[str]: Human-readable descriptions of every problem found
+    """
+    problems = []
+    for game, data in characters.items():
+        names = data.get('characters', [])
+        roles = set(data.get('roles', []))
+        mapping = data.get('role_mapping', {})
+        seen = set()
+        for name in names:
+            if name.lower() in seen:
+                problems.append(f"{game}: duplicate character '{name}'")
+            seen.add(name.lower())
+            if name not in mapping:
+                problems.append(f"{game}: character '{name}' is missing from role_mapping")
+        for name, role in mapping.items():
+            if name not in names:
+                problems.append(f"{game}: role_mapping entry '{name}' is not a listed character")
+            if role not in roles:
+                problems.append(f"{game}: character '{name}' has unknown role '{role}'")
+    return problems
+
+def _check_structure(data: Any):
+    """Raise ``RosterError`` unless ``data`` has the shape described above."""
+    def require(condition: bool, message: str):
+        if not condition:
+            raise RosterError(message)
+
+    def is_str_list(value: Any) -> bool:
+        return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+    require(isinstance(data, dict), "roster must be an object")
+    characters = data.get('characters')
+    require(isinstance(characters, dict) and characters, "'characters' must be a non-empty object")
+    for game, entry in characters.items():
+        require(isinstance(entry, dict), f"{game}: entry must be an object")
+        require(is_str_list(entry.get('characters')) and entry['characters'],
+                f"{game}: 'characters' must be a non-empty list of names")
+        require(is_str_list(entry.get('roles')), f"{game}: 'roles' must be a list of names")
+        mapping = entry.get('role_mapping')
+        require(isinstance(mapping, dict) and
+                all(isinstance(role, str) for role in mapping.values()),
+                f"{game}: 'role_mapping' must map characters to role names")
+    for section in ('character_info', 'game_settings'):
+        value = data.get(section, {})
+        require(isinstance(value, dict) and all(isinstance(entry, dict) for entry in value.values()),
+                f"'{section}' must map games to objects")
+    for game, settings in data.get('game_settings', {}).items():
+        size = settings.get('max_team_size', 1)
+        require(isinstance(size, int) and size > 0, f"{game}: 'max_team_size' must be a positive integer")
+        quotas = settings.get('role_quotas', {})
+        require(isinstance(quotas, dict) and
+                all(isinstance(quota, int) and quota >= 0 for quota in quotas.values()),
+                f"{game}: 'role_quotas' must map roles to non-negative integers")
+
+def read_roster_file(path: str) -> Dict[str, Any]:
+    """Read and structurally check a roster data file.
+
+    Files ending in ``.toml`` are parsed as TOML (Python 3.11+), anything
+    else as JSON.
+
+    Args:
+        path (str): Path to the roster file
+
+    Returns:
+        Dict[str, Any]: The parsed roster data
+
+    Raises:
+        RosterError: If the file cannot be read, parsed or is malformed
+    """
+    try:
+        if path.endswith('.toml'):
+            try:
+                import tomllib
+            except ImportError:
+                raise RosterError("TOML roster files need Python 3.11 or newer") from None
+            with open(path, 'rb') as roster_file:
+                data = tomllib.load(roster_file)
+        else:
+            with open(path, encoding='utf-8') as roster_file:
+                data = json.load(roster_file)
+    except RosterError:
+        raise
+    except (OSError, ValueError) as e:
+        raise RosterError(f"Could not read roster file {path}: {e}") from e
+    _check_structure(data)
+    return data
+
+def build_roster_index(characters: Dict[str, dict],
+                       game_settings: Optional[Dict[str, dict]] = None,
+                       character_info: Optional[Dict[str, dict]] = None) -> RosterIndex:
+    """Compile the ``characters`` section of a roster into a ``RosterIndex``.
+
+    Characters without a role mapping stay selectable without a role
+    filter but are left out of every per-role tuple.
+
+    Args:
+        characters (Dict[str, dict]): Roster to compile
+        game_settings (Optional[Dict[str, dict]]): Per-game settings
+        character_info (Optional[Dict[str, dict]]): Per-game character info
+
+    Returns:
+        RosterIndex: The compiled index
+    """
+    game_settings = game_settings or {}
+    character_info = character_info or {}
+    games = {}
+    for game, data in characters.items():
+        names = tuple(data['characters'])
+        roles = tuple(data['roles'])
+        role_of = {name: data['role_mapping'][name] for name in names if name in data['role_mapping']}
+        by_role = {role: tuple(name for name in names if role_of.get(name) == role) for role in roles}
+        games[game.lower()] = GameIndex(
+            name=game,
+            characters=names,
+            roles=roles,
+            by_role=MappingProxyType(by_role),
+            role_of=MappingProxyType(role_of),
+            character_lookup=MappingProxyType({name.lower(): name for name in names}),
+            role_lookup=MappingProxyType({role.lower(): role for role in roles}),
+            settings=MappingProxyType(dict(game_settings.get(game, {}))),
+            info=MappingProxyType(dict(character_info.get(game, {}))),
+        )
+    return RosterIndex(
+        games=MappingProxyType(games),
+        game_names=tuple(games),
+        problems=tuple(validate_roster(characters)),
+    )
+
+def load_roster(path: str) -> RosterIndex:
+    """Read, validate and compile a roster file, logging any problems.
+
+    Args:
+        path (str): Path to the roster file
+
+    Returns:
+        RosterIndex: The compiled index
+
+    Raises:
+        RosterError: If the file cannot be read, parsed or is malformed
+    """
+    data = read_roster_file(path)
+    roster = build_roster_index(data['characters'], data.get('game_settings'),
+                                data.get('character_info'))
+    for problem in roster.problems:
+        logger.warning("Roster config problem: %s", problem)
+    return roster
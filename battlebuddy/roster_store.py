@@ -0,0 +1,99 @@
+"""
+Hot-reloadable roster for BattleBuddy Discord bot.
+
+``RosterStore`` holds the current ``RosterSnapshot``: the compiled roster
+plus everything derived from it (autocomplete indexes and prebuilt
+responses). When the roster file's modification time changes, the file is
+read, validated and compiled on a worker thread, and the new snapshot then
+replaces the old one with a single assignment on the event loop.
+
+Commands read ``store.current`` once and use that snapshot throughout, so a
+reload never changes the roster under a command that is already running.
+A file that fails to load is logged and the previous roster stays active.
+"""
+import asyncio
+import logging
+import os
+from typing import NamedTuple, Optional, Tuple
+
+from autocomplete import RosterAutocomplete, build_autocomplete
+from roster import RosterError, RosterIndex, load_roster
+from templates import ResponseTemplates, build_templates
+
+logger = logging.getLogger(__name__)
+
+class RosterSnapshot(NamedTuple):
+    """A roster and the lookup structures built from it."""
+    roster: RosterIndex
+    autocomplete: RosterAutocomplete
+    templates: ResponseTemplates
+
+def build_snapshot(roster: RosterIndex) -> RosterSnapshot:
+    """Build every roster-derived structure for a roster."""
+    return RosterSnapshot(roster, build_autocomplete(roster), build_templates(roster))
+
+class RosterStore:
+    """The active roster snapshot, reloaded when its file changes."""
+
+    def __init__(self, path: str):
+        """Load the roster file.
+
+        Args:
+            path (str): Path to the roster data file
+
+        Raises:
+            RosterError: If the initial roster cannot be loaded
+        """
+        self.path = path
+        self._file_stamp = self._stamp()
+        self.current = build_snapshot(load_roster(path))
+
+    def _stamp(self) -> Optional[Tuple[int, int]]:
+        """Return the file's (mtime_ns, size), or None if it is missing."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def load_if_changed(self) -> Optional[RosterSnapshot]:
+        """Build a new snapshot if the file changed since it was last read.
+
+        This blocks on file I/O and compiling, so run it off the event loop.
+        It does not swap the snapshot in; see ``swap``.
+
+        Returns:
+            Optional[RosterSnapshot]: The new snapshot, or None if the file
+                is unchanged, missing or invalid
+        """
+        stamp = self._stamp()
+        if stamp is None or stamp == self._file_stamp:
+            return None
+        # Remember the stamp even if loading fails, so a broken file is only
+        # reported once; the next save changes the stamp and is retried
+        self._file_stamp = stamp
+        try:
+            return build_snapshot(load_roster(self.path))
+        except RosterError as e:
+            logger.error("Keeping the current roster: %s", e)
+            return None
+
+    def swap(self, snapshot: RosterSnapshot):
+        """Make ``snapshot`` the current roster."""
+        self.current = snapshot
+        logger.info("Reloaded roster from %s: %s characters in %s games", self.path,
+                    sum(len(game.characters) for game in snapshot.roster.games.values()),
+                    len(snapshot.roster.game_names))
+
+    async def refresh(self) -> bool:
+        """Reload the roster on a worker thread if its file changed.
+
+        Returns:
+            bool: Whether a new roster was swapped in
+        """
+        loop = asyncio.get_running_loop()
+        snapshot = await loop.run_in_executor(None, self.load_if_changed)
+        if snapshot is None:
+            return False
+        self.swap(snapshot)
+        return True
@@ -0,0 +1,298 @@
+"""
+Weighted character selection for BattleBuddy Discord bot.
+
+Besides uniform picks, ``/who`` and ``/random`` support selection modes
+that reweight characters:
+
+1. ``favorites``: the user's favorite characters are more likely
+2. ``fresh``: characters nobody has picked recently are more likely
+3. ``avoid_recent``: the user's last few picks are excluded
+
+Reweighting the candidate list on every draw costs O(n), which adds up for
+League's 165+ champions. Instead, ``SelectionEngine`` caches a Walker/Vose
+alias table per (game, role, mode[, user]) and draws from it in O(1). A
+table is rebuilt lazily, on the next draw after its weights change, and
+tables that change on every pick (``fresh``) are rebuilt at most once per
+``rebuild_interval``. Exclusions are applied by rejection sampling, which
+stays O(1) on average as long as the excluded characters carry a small
+share of the weight.
+
+The engine does not hold a roster. Every draw is given the ``GameIndex``
+from the roster snapshot the command started with, and a cached table is
+only reused for the same snapshot's characters, so a roster reload in the
+middle of a command never changes what it draws from.
+"""
+import random
+import time
+from collections import OrderedDict, deque
+from typing import (Callable, Deque, Dict, FrozenSet, Hashable, Iterable, List,
+                    Mapping, Optional, Sequence, Tuple)
+
+from roster import GameIndex
+
+# Selection modes
+UNIFORM = 'uniform'
+FAVORITES = 'favorites'
+FRESH = 'fresh'
+AVOID_RECENT = 'avoid_recent'
+MODES = (UNIFORM, FAVORITES, FRESH, AVOID_RECENT)
+
+# Draws to try before falling back to filtering out the excluded characters
+_MAX_REJECTIONS = 16
+
+class AliasTable:
+    """Constant-time sampling from a fixed discrete distribution.
+
+    Built with Vose's alias method in O(n). Each slot holds a probability
+    and an alias: a draw picks a slot uniformly, then keeps it with that
+    probability or takes its alias otherwise.
+    """
+    __slots__ = ('items', 'weights', '_probability', '_alias')
+
+    def __init__(self, items: Sequence[str], weights: Sequence[float]):
+        """Build the table.
+
+        Args:
+            items (Sequence[str]): Values to draw
+            weights (Sequence[float]): Non-negative weight of each item
+
+        Raises:
+            ValueError: If there are no items, the lengths differ, a weight
+                is negative or every weight is zero
+        """
+        count = len(items)
+        if count == 0 or len(weights) != count:
+            raise ValueError("Alias table needs one weight per item and at least one item")
+        if any(weight < 0 for weight in weights):
+            raise ValueError("Alias table weights must not be negative")
+        total = float(sum(weights))
+        if total <= 0:
+            raise ValueError("Alias table needs at least one positive weight")
+
+        self.items = tuple(items)
+        self.weights = tuple(weights)
+        scaled = [weight * count / total for weight in weights]
+        probability = [1.0] * count
+        alias = list(range(count))
+        small = [i for i, value in enumerate(scaled) if value < 1.0]
+        large = [i for i, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            low, high = small.pop(), large.pop()
+            probability[low] = scaled[low]
+            alias[low] = high
+            scaled[high] -= 1.0 - scaled[low]
+            (small if scaled[high] < 1.0 else large).append(high)
+        # Whatever is left is 1.0 up to rounding error and keeps probability 1
+        self._probability = probability
+        self._alias = alias
+
+    def sample(self, rng: random.Random = random) -> str:
+        """Draw one item."""
+        position = rng.random() * len(self.items)
+        slot = int(position)
+        if position - slot >= self._probability[slot]:
+            slot = self._alias[slot]
+        return self.items[slot]
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+class SelectionEngine:
+    """Draws characters from a roster using the configured selection modes."""
+
+    def __init__(self, favorite_boost: float = 3.0,
+                 fresh_boost: float = 4.0, fresh_horizon: float = 7 * 86400,
+                 avoid_last: int = 3, rebuild_interval: float = 60.0,
+                 max_tables: int = 4096, clock: Callable[[], float] = time.time,
+                 rng: random.Random = random):
+        """Create the engine.
+
+        Args:
+            favorite_boost (float): Weight of a favorite relative to other
+                characters in ``favorites`` mode
+            fresh_boost (float): Extra weight in ``fresh`` mode for a
+                character not picked for ``fresh_horizon`` seconds; it
+                grows linearly from 0 right after a pick
+            fresh_horizon (float): Seconds after which a character counts
+                as fully fresh
+            avoid_last (int): Number of the user's recent picks excluded in
+                ``avoid_recent`` mode
+            rebuild_interval (float): Minimum seconds between rebuilds of a
+                ``fresh`` table
+            max_tables (int): Maximum number of cached alias tables; per-user
+                tables are evicted least recently used first
+            clock (Callable[[], float]): Wall-clock time source in seconds
+            rng (random.Random): Random number source
+        """
+        self.favorite_boost = favorite_boost
+        self.fresh_boost = fresh_boost
+        self.fresh_horizon = fresh_horizon
+        self.avoid_last = avoid_last
+        self.rebuild_interval = rebuild_interval
+        self.max_tables = max_tables
+        self.clock = clock
+        self.rng = rng
+        # key -> (version, built_at, table, candidates the table was built from)
+        self._tables: 'OrderedDict[Hashable, Tuple[Hashable, float, AliasTable, Sequence[str]]]' = \
+            OrderedDict()
+        self._last_picked: Dict[str, Dict[str, float]] = {}
+        self._pick_versions: Dict[str, int] = {}
+        self._recent: Dict[int, Deque[Tuple[str, str]]] = {}
+        self.rebuilds = 0
+
+    def record_pick(self, game: str, character: str, user_id: Optional[int] = None):
+        """Tell the engine a character was picked.
+
+        Updates the pick times used by ``fresh`` mode and the user's recent
+        picks used by ``avoid_recent`` mode.
+        """
+        self._last_picked.setdefault(game, {})[character] = self.clock()
+        self._pick_versions[game] = self._pick_versions.get(game, 0) + 1
+        if user_id is not None and self.avoid_last > 0:
+            recent = self._recent.get(user_id)
+            if recent is None:
+                recent = self._recent[user_id] = deque(maxlen=self.avoid_last)
+            recent.append((game, character))
+
+    def recent_picks(self, user_id: int, game: str) -> FrozenSet[str]:
+        """Return the user's recent picks in a game."""
+        return frozenset(character for picked_game, character in self._recent.get(user_id, ())
+                         if picked_game == game)
+
+    def pick(self, game_index: GameIndex, role: Optional[str] = None, mode: str = UNIFORM,
+             user_id: Optional[int] = None, favorites: Iterable[str] = ()) -> str:
+        """Draw a character.
+
+        Args:
+            game_index (GameIndex): Game to draw from, taken from the roster
+                snapshot the command uses
+            role (Optional[str]): Canonical role to restrict the draw to
+            mode (str): One of ``MODES``
+            user_id (Optional[int]): User the pick is for; needed for the
+                ``favorites`` and ``avoid_recent`` modes
+            favorites (Iterable[str]): The user's favorite characters in
+                this game, for ``favorites`` mode
+
+        Returns:
+            str: The chosen character
+
+        Raises:
+            ValueError: If ``mode`` is unknown
+        """
+        candidates = game_index.by_role[role] if role else game_index.characters
+
+        if mode == UNIFORM:
+            return self.rng.choice(candidates)
+        if mode == AVOID_RECENT:
+            exclude = self.recent_picks(user_id, game_index.name) if user_id is not None else frozenset()
+            return self._draw_excluding(candidates, exclude)
+        if mode == FAVORITES:
+            favored = frozenset(
+                name for name in favorites
+                if (game_index.role_of.get(name) == role if role
+                    else name.lower() in game_index.character_lookup)
+            )
+            if not favored:
+                return self.rng.choice(candidates)
+            table = self._table((game_index.name, role, FAVORITES, user_id), candidates, favored,
+                                lambda: self._favorite_weights(candidates, favored))
+            return table.sample(self.rng)
+        if mode == FRESH:
+            table = self._fresh_table(game_index.name, role, candidates)
+            return table.sample(self.rng)
+        raise ValueError(f"Unknown selection mode '{mode}'")
+
+    def draft_team(self, game_index: GameIndex, size: int,
+                   quotas: Optional[Mapping[str, int]] = None) -> List[Tuple[str, str]]:
+        """Draw a team of distinct characters with balanced roles in one pass.
+
+        Slots go first to roles below their quota (largest shortfall first),
+        then to whichever roles have the fewest members so far, ties broken
+        at random. Each role's characters are then sampled without
+        replacement, so the team has no duplicates.
+
+        Args:
+            game_index (GameIndex): Game to draft from
+            size (int): Number of characters to draw
+            quotas (Optional[Mapping[str, int]]): Minimum characters per role
+
+        Returns:
+            List[Tuple[str, str]]: (character, role) pairs grouped by role
+
+        Raises:
+            ValueError: If ``size`` is not positive or exceeds the number of
+                characters with a role
+        """
+        available = {role: len(game_index.by_role[role])
+                     for role in game_index.roles if game_index.by_role[role]}
+        if size < 1 or size > sum(available.values()):
+            raise ValueError(f"Cannot draft a team of {size} from {game_index.name}")
+        quotas = {role: quota for role, quota in (quotas or {}).items() if role in available}
+
+        counts = dict.fromkeys(available, 0)
+        for _ in range(size):
+            open_roles = [role for role in available if counts[role] < available[role]]
+            short = [role for role in open_roles if counts[role] < quotas.get(role, 0)]
+            if short:
+                role = max(short, key=lambda role: quotas[role] - counts[role])
+            else:
+                fewest = min(counts[role] for role in open_roles)
+                role = self.rng.choice([role for role in open_roles if counts[role] == fewest])
+            counts[role] += 1
+
+        return [(character, role)
+                for role, count in counts.items()
+                for character in self.rng.sample(game_index.by_role[role], count)]
+
+    def _table(self, key: Hashable, candidates: Sequence[str], version: Hashable,
+               weigh: Callable[[], Tuple[Sequence[str], List[float]]]) -> AliasTable:
+        """Return the cached table for ``key``.
+
+        The table is rebuilt if its version changed or it was built from
+        another roster snapshot's ``candidates``.
+        """
+        entry = self._tables.get(key)
+        if entry is not None and entry[0] == version and entry[3] is candidates:
+            self._tables.move_to_end(key)
+            return entry[2]
+        table = AliasTable(*weigh())
+        self.rebuilds += 1
+        self._tables[key] = (version, self.clock(), table, candidates)
+        self._tables.move_to_end(key)
+        while len(self._tables) > self.max_tables:
+            self._tables.popitem(last=False)
+        return table
+
+    def _fresh_table(self, game: str, role: Optional[str], candidates: Sequence[str]) -> AliasTable:
+        key = (game, role, FRESH, None)
+        version = self._pick_versions.get(game, 0)
+        entry = self._tables.get(key)
+        # Picks change fresh weights constantly, so tolerate a slightly stale table
+        if entry is not None and entry[0] != version and entry[3] is candidates and \
+                self.clock() - entry[1] < self.rebuild_interval:
+            version = entry[0]
+        return self._table(key, candidates, version, lambda: self._fresh_weights(game, candidates))
+
+    def _favorite_weights(self, candidates: Sequence[str],
+                          favored: FrozenSet[str]) -> Tuple[Sequence[str], List[float]]:
+        return candidates, [self.favorite_boost if name in favored else 1.0 for name in candidates]
+
+    def _fresh_weights(self, game: str, candidates: Sequence[str]) -> Tuple[Sequence[str], List[float]]:
+        now = self.clock()
+        last_picked = self._last_picked.get(game, {})
+        weights = []
+        for name in candidates:
+            picked_at = last_picked.get(name)
+            freshness = 1.0 if picked_at is None else min(1.0, (now - picked_at) / self.fresh_horizon)
+            weights.append(1.0 + self.fresh_boost * freshness)
+        return candidates, weights
+
+    def _draw_excluding(self, candidates: Sequence[str], exclude: FrozenSet[str]) -> str:
+        """Draw uniformly from ``candidates``, skipping excluded characters."""
+        for _ in range(_MAX_REJECTIONS if exclude else 1):
+            choice = self.rng.choice(candidates)
+            if choice not in exclude:
+                return choice
+        remaining = [name for name in candidates if name not in exclude]
+        # If everything is excluded, ignore the exclusion rather than fail
+        return self.rng.choice(remaining or candidates)
@@ -0,0 +1,140 @@
+"""
+Sharding helpers for BattleBuddy Discord bot.
+
+A single process runs one ``AutoShardedBot`` over every shard. To spread
+the gateway connections over several cores, ``launcher.py`` starts worker
+processes that each run ``bot.py`` for a contiguous range of shard IDs.
+The range is passed through environment variables, read here when
+``bot.py`` builds its bot.
+
+Every worker periodically writes the health of each of its shards to the
+shared database (see ``Database.report_shard_health``) so the launcher can
+show and watch the state of the whole fleet.
+"""
+import os
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+# Environment variables the launcher sets for each worker
+SHARD_COUNT_ENV = 'BATTLEBUDDY_SHARD_COUNT'
+SHARD_IDS_ENV = 'BATTLEBUDDY_SHARD_IDS'
+WORKER_ID_ENV = 'BATTLEBUDDY_WORKER_ID'
+WORKER_COUNT_ENV = 'BATTLEBUDDY_WORKER_COUNT'
+
+class ShardStatus(NamedTuple):
+    """Health of one shard as seen by the process running it."""
+    shard_id: int
+    status: str
+    latency_ms: Optional[float]
+    guilds: int
+
+def shard_ranges(shard_count: int, workers: int) -> List[List[int]]:
+    """Split shard IDs into contiguous, near-equal ranges.
+
+    Args:
+        shard_count (int): Total number of shards
+        workers (int): Number of worker processes
+
+    Returns:
+        List[List[int]]: Shard IDs for each worker
+
+    Raises:
+        ValueError: If there are fewer shards than workers
+    """
+    if workers < 1 or shard_count < workers:
+        raise ValueError(f"Cannot split {shard_count} shard(s) over {workers} worker(s)")
+    base, extra = divmod(shard_count, workers)
+    ranges = []
+    start = 0
+    for worker in range(workers):
+        size = base + (1 if worker < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+def shard_options_from_env(environ: Mapping[str, str] = os.environ) -> Dict[str, object]:
+    """Return ``AutoShardedBot`` shard options set by the launcher.
+
+    Returns:
+        Dict[str, object]: ``shard_count`` and ``shard_ids`` if this process
+            is a launcher worker, otherwise empty (let Discord decide)
+
+    Raises:
+        ValueError: If the variables are malformed
+    """
+    count = environ.get(SHARD_COUNT_ENV)
+    if not count:
+        return {}
+    shard_count = int(count)
+    shard_ids = [int(shard) for shard in environ.get(SHARD_IDS_ENV, '').split(',') if shard.strip()]
+    if not shard_ids or any(not 0 <= shard < shard_count for shard in shard_ids):
+        raise ValueError(f"{SHARD_IDS_ENV} must list shard IDs below {shard_count}")
+    return {'shard_count': shard_count, 'shard_ids': shard_ids}
+
+def worker_count_from_env(environ: Mapping[str, str] = os.environ) -> int:
+    """Return how many worker processes the launcher runs, 1 outside the launcher."""
+    return max(1, int(environ.get(WORKER_COUNT_ENV) or 1))
+
+def worker_env(worker_id: int, shard_count: int, shard_ids: Iterable[int], worker_count: int = 1,
+               base: Mapping[str, str] = os.environ) -> Dict[str, str]:
+    """Return the environment for a launcher worker process."""
+    env = dict(base)
+    env[SHARD_COUNT_ENV] = str(shard_count)
+    env[SHARD_IDS_ENV] = ','.join(str(shard) for shard in shard_ids)
+    env[WORKER_ID_ENV] = str(worker_id)
+    env[WORKER_COUNT_ENV] = str(worker_count)
+    return env
+
+def collect_shard_health(bot, states: Mapping[int, str]) -> List[ShardStatus]:
+    """Describe every shard this process runs.
+
+    Args:
+        bot: The running bot, sharded or not
+        states (Mapping[int, str]): Last gateway event seen per shard
+
+    Returns:
+        List[ShardStatus]: One entry per shard, ordered by shard ID
+    """
+    guilds = Counter(guild.shard_id for guild in bot.guilds)
+    shards = getattr(bot, 'shards', None)
+    if not shards:
+        # Unsharded bot: a single connection reported as shard 0
+        # (on_shard_* events only fire for sharded bots)
+        shard_id = bot.shard_id or 0
+        if bot.is_closed():
+            status = 'disconnected'
+        else:
+            status = 'ready' if bot.is_ready() else 'connecting'
+        return [ShardStatus(shard_id, status, _milliseconds(bot.latency), guilds[shard_id])]
+    statuses = []
+    for shard_id, shard in sorted(shards.items()):
+        status = 'disconnected' if shard.is_closed() else states.get(shard_id, 'connecting')
+        if status == 'ready' and shard.is_ws_ratelimited():
+            status = 'ratelimited'
+        statuses.append(ShardStatus(shard_id, status, _milliseconds(shard.latency), guilds[shard_id]))
+    return statuses
+
+def _milliseconds(latency: float) -> Optional[float]:
+    # discord.py reports inf (or nan) before the first heartbeat is acknowledged
+    if latency != latency or latency == float('inf'):
+        return None
+    return round(latency * 1000, 1)
+
+def format_health(rows: Sequence[Tuple], now: Optional[float] = None,
+                  stale_after: float = 120) -> str:
+    """Render ``Database.get_shard_health`` rows as a text table.
+
+    Shards whose last report is older than ``stale_after`` seconds are
+    marked stale, which usually means their worker is hung or dead.
+    """
+    now = time.time() if now is None else now
+    lines = [f"{'shard':>5} {'worker':>6} {'pid':>7} {'status':<12} {'latency':>9} {'guilds':>7} {'age':>6}"]
+    for shard_id, worker_id, pid, status, latency_ms, guild_count, updated_at in rows:
+        age = now - updated_at
+        if age > stale_after:
+            status = 'stale'
+        latency = '-' if latency_ms is None else f"{latency_ms:.0f}ms"
+        lines.append(f"{shard_id:>5} {worker_id:>6} {pid:>7} {status:<12} {latency:>9} "
+                     f"{guild_count:>7} {age:>5.0f}s")
+    return '\n'.join(lines)
@@ -0,0 +1,114 @@
+"""
+Prebuilt responses for BattleBuddy Discord bot.
+
+Several responses only depend on the roster and config: the whole ``/help``
+embed apart from its footer, the list of available games shown when a game
+is not found, and each game's list of roles. ``build_templates`` renders
+them once per roster, so commands only fill in per-request parts such as
+the footer username.
+"""
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, NamedTuple, Optional
+
+import discord
+
+from config import BOT_DESCRIPTION
+from roster import RosterIndex
+
+HELP_COMMANDS = """
+**Commands:**
+`/who [game] [role] [mode]` - Select a random character from a game (optionally filtered by role)
+`/random [mode]` - Select a random character from any game
+Modes: favor your favorites, favor rarely picked characters, or avoid your recent picks
+`/team [game] [size]` - Draft a role-balanced team without duplicates
+`/stats [game] [window] [scope]` - View character pick statistics for this server or all servers, optionally for a recent window like 7d
+`/favorite [game] [character]` - Add/remove a character from your favorites
+`/favorites` - View your favorite characters
+`/help` - Display this help message
+"""
+
+class EmbedTemplate:
+    """An embed built once and stamped out per request.
+
+    ``discord.Embed.copy`` round-trips through ``to_dict``/``from_dict``;
+    keeping the dict form avoids the ``to_dict`` half on every use.
+    """
+    __slots__ = ('_data',)
+
+    def __init__(self, embed: discord.Embed):
+        """Snapshot an embed.
+
+        Args:
+            embed (discord.Embed): The embed to reuse; later changes to it
+                do not affect the template
+        """
+        self._data: Dict[str, Any] = embed.to_dict()
+        # to_dict shares the embed's field list
+        self._data['fields'] = [dict(field) for field in self._data.get('fields', ())]
+
+    def render(self, footer: Optional[str] = None) -> discord.Embed:
+        """Return a new embed from the template.
+
+        Args:
+            footer (Optional[str]): Footer text to set
+
+        Returns:
+            discord.Embed: An embed that can be modified freely
+        """
+        data = dict(self._data)
+        # from_dict keeps the list and set_field_at edits fields in place,
+        # so give each embed its own copies
+        data['fields'] = [dict(field) for field in data['fields']]
+        if footer is not None:
+            data['footer'] = {'text': footer}
+        return discord.Embed.from_dict(data)
+
+class ResponseTemplates(NamedTuple):
+    """Responses prebuilt from a roster."""
+    help: EmbedTemplate
+    game_list: str
+    role_lists: Mapping[str, str]
+
+    def help_embed(self, user_name: str) -> discord.Embed:
+        """Return the ``/help`` embed for a user."""
+        return self.help.render(f"Requested by {user_name}")
+
+    def game_not_found(self, game: str) -> str:
+        """Return the message for an unknown game name."""
+        return f"Game '{game}' not found. Available games: {self.game_list}"
+
+    def role_not_found(self, role: str, game: str) -> str:
+        """Return the message for an unknown role of a canonical game."""
+        return f"Role '{role}' not found for {game}. Available roles: {self.role_lists[game]}"
+
+def build_templates(roster: RosterIndex) -> ResponseTemplates:
+    """Prebuild every roster-dependent response.
+
+    Call again whenever the roster changes.
+
+    Args:
+        roster (RosterIndex): Roster the responses describe
+
+    Returns:
+        ResponseTemplates: The prebuilt responses
+    """
+    role_lists = {game.name: ', '.join(game.roles) for game in roster.games.values()}
+
+    embed = discord.Embed(
+        title="BattleBuddy Help",
+        description=BOT_DESCRIPTION,
+        color=discord.Color.blue()
+    )
+    embed.add_field(name="Commands", value=HELP_COMMANDS, inline=False)
+    games_text = "**Supported Games:**\n" + "".join(
+        f"\n**{game.name.capitalize()}**\nRoles: {role_lists[game.name]}\n"
+        f"Characters: {len(game.characters)}"
+        for game in roster.games.values()
+    )
+    embed.add_field(name="Games", value=games_text, inline=False)
+
+    return ResponseTemplates(
+        help=EmbedTemplate(embed),
+        game_list=', '.join(roster.game_names),
+        role_lists=MappingProxyType(role_lists),
+    )
@@ -0,0 +1,11 @@
+"""
+Shared helpers for the unit tests.
+"""
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
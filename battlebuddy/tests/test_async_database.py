@@ -0,0 +1,77 @@
+"""
+Unit tests for the async database facade.
+"""
+import os
+import threading
+import unittest
+from async_database import AsyncDatabase
+from database import Database
+
+class TestAsyncDatabase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        """Set up test database."""
+        self.test_db_path = 'test_async_battlebuddy.db'
+        self.db = AsyncDatabase(Database(self.test_db_path))
+
+    def tearDown(self):
+        """Clean up test database."""
+        self.db.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.test_db_path + suffix):
+                os.remove(self.test_db_path + suffix)
+
+    async def test_queries_run_off_the_event_loop(self):
+        """Test that reads and writes run on the worker threads."""
+        threads = []
+        original = self.db.database.record_character_pick
+
+        def record(game, character, user_id=None, guild_id=None):
+            threads.append(threading.current_thread().name)
+            original(game, character)
+
+        self.db.database.record_character_pick = record
+        await self.db.record_character_pick('game1', 'char1')
+        await self.db.record_character_pick('game1', 'char1')
+        self.assertTrue(all(name.startswith('battlebuddy-db-writer') for name in threads))
+        self.assertEqual(await self.db.get_character_stats_page('game1'), [('game1', 'char1', 2)])
+
+    async def test_ranked_stats_skip_the_threads(self):
+        """Test that all-time stats pages come from the rankings on the event loop."""
+        ranked = AsyncDatabase(Database(self.test_db_path, rankings=True))
+        self.addCleanup(ranked.close)
+        threads = []
+        original = ranked.database.get_character_stats_page
+
+        def page(*args):
+            threads.append(threading.current_thread())
+            return original(*args)
+
+        ranked.database.get_character_stats_page = page
+        await ranked.record_character_pick('game1', 'char1', guild_id=2)
+        self.assertEqual(await ranked.get_character_stats_page(guild_id=2), [('game1', 'char1', 1)])
+        self.assertEqual(await ranked.get_character_stats_page(since=0), [('game1', 'char1', 1)])
+        self.assertIs(threads[0], threading.current_thread())
+        self.assertIsNot(threads[1], threading.current_thread())
+
+    async def test_favorites(self):
+        """Test favorites round trip through the facade."""
+        await self.db.add_favorite(1, 'game1', 'char1')
+        self.assertEqual(await self.db.get_favorites(1), [('game1', 'char1')])
+        await self.db.remove_favorite(1, 'game1', 'char1')
+        self.assertEqual(await self.db.get_favorites(1), [])
+
+    async def test_cached_favorites_skip_the_threads(self):
+        """Test that cached favorites are answered on the event loop between change checks."""
+        db = AsyncDatabase(Database(self.test_db_path, favorite_changes_interval=3600))
+        self.addCleanup(db.close)
+        await db.add_favorite(1, 'game1', 'char1')
+        self.assertEqual(await db.get_favorites(1), [('game1', 'char1')])
+
+        def unexpected(*args):
+            raise AssertionError("cached favorites went to a reader thread")
+
+        db.database.get_favorites = unexpected
+        self.assertEqual(await db.get_favorites(1), [('game1', 'char1')])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+"""
+Unit tests for the autocomplete indexes.
+"""
+import unittest
+from autocomplete import MAX_CHOICES, NameIndex, build_autocomplete
+from config import ROSTER_PATH
+from roster import load_roster
+
+AUTOCOMPLETE = build_autocomplete(load_roster(ROSTER_PATH))
+
+class TestNameIndex(unittest.TestCase):
+    def setUp(self):
+        """Set up a small index."""
+        self.index = NameIndex(['Lee Sin', 'Singed', 'Sion', 'Kai\'Sa', 'Wraith', 'Dr. Mundo'])
+
+    def test_prefix_before_word_matches(self):
+        """Test that name prefixes rank before word prefixes."""
+        self.assertEqual(self.index.search('si'), ['Singed', 'Sion', 'Lee Sin'])
+        self.assertEqual(self.index.search('MUN'), ['Dr. Mundo'])
+        self.assertEqual(self.index.search('sa'), ['Kai\'Sa'])
+
+    def test_fuzzy_fallback(self):
+        """Test that typos fall back to trigram matches."""
+        self.assertEqual(self.index.search('wriath'), ['Wraith'])
+        self.assertEqual(self.index.search('kaisa'), ['Kai\'Sa'])
+        self.assertEqual(self.index.search('zzzz'), [])
+
+    def test_empty_query_and_limit(self):
+        """Test that an empty query lists names up to the limit."""
+        self.assertEqual(self.index.search('', limit=2), ['Lee Sin', 'Singed'])
+        self.assertEqual(len(AUTOCOMPLETE.characters['lol'].search('')), MAX_CHOICES)
+
+class TestRosterAutocomplete(unittest.TestCase):
+    def test_roster_searches(self):
+        """Test game, role and character suggestions for the shipped roster."""
+        self.assertEqual(AUTOCOMPLETE.games.search('ov'), ['overwatch'])
+        self.assertEqual(AUTOCOMPLETE.search_roles('APEX', 're'), ['Recon'])
+        self.assertEqual(AUTOCOMPLETE.search_roles(None, 're'), [])
+        self.assertIn('Wraith', AUTOCOMPLETE.search_characters('apex', 'wr'))
+        # Without a game, every game's characters are searched
+        self.assertIn('Ana', AUTOCOMPLETE.search_characters(None, 'an'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+"""
+Unit tests for the TTL cache.
+"""
+import unittest
+from tests.helpers import FakeClock
+from utils.cache import TTLCache
+
+class TestTTLCache(unittest.TestCase):
+    def setUp(self):
+        """Set up a cache driven by a fake clock."""
+        self.clock = FakeClock()
+        self.cache = TTLCache(maxsize=2, ttl=10, clock=self.clock)
+
+    def test_expiry(self):
+        """Test that entries expire after their TTL."""
+        self.cache.set('a', 1)
+        self.assertEqual(self.cache.get('a'), 1)
+        self.clock.now += 10
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted when full."""
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.cache.get('a')
+        self.cache.set('c', 3)
+        self.assertIn('a', self.cache)
+        self.assertNotIn('b', self.cache)
+        self.assertIn('c', self.cache)
+
+if __name__ == '__main__':
+    unittest.main()
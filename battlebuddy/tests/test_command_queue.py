@@ -0,0 +1,131 @@
+"""
+Unit tests for command admission and deferred responses.
+"""
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+from command_queue import CommandQueue, QueueFull, auto_defer, respond
+from metrics import Metrics, timed_command
+
+class FakeResponse:
+    def __init__(self):
+        self.sent = []
+        self.deferred = False
+        self.deferred_ephemeral = None
+
+    def is_done(self):
+        return self.deferred or bool(self.sent)
+
+    async def send_message(self, *args, **kwargs):
+        self.sent.append(args)
+
+    async def defer(self, *, ephemeral=False, thinking=False):
+        await asyncio.sleep(0.01)
+        self.deferred = thinking
+        self.deferred_ephemeral = ephemeral
+
+class FakeFollowup:
+    def __init__(self):
+        self.sent = []
+        self.ephemeral = []
+
+    async def send(self, *args, ephemeral=False, **kwargs):
+        self.sent.append(args)
+        self.ephemeral.append(ephemeral)
+
+class TestCommandQueue(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.metrics = Metrics()
+        self.client = SimpleNamespace(metrics=self.metrics,
+                                      command_queue=CommandQueue(workers=1, max_waiting=1, defer_after=0.05))
+
+    def interaction(self):
+        interaction = SimpleNamespace(client=self.client, response=FakeResponse(), followup=FakeFollowup(),
+                                      deleted=0)
+
+        async def delete_original_response():
+            interaction.deleted += 1
+        interaction.delete_original_response = delete_original_response
+        return interaction
+
+    async def test_slow_commands_are_deferred(self):
+        """Test a command past its budget defers and answers with a follow-up"""
+        @timed_command
+        @auto_defer
+        async def who(interaction, delay):
+            await asyncio.sleep(delay)
+            await respond(interaction, "done")
+
+        fast, slow = self.interaction(), self.interaction()
+        await who(fast, 0)
+        await who(slow, 0.1)
+        self.assertEqual((fast.response.sent, fast.followup.sent), ([("done",)], []))
+        self.assertTrue(slow.response.deferred)
+        self.assertEqual((slow.response.sent, slow.followup.sent), ([], [("done",)]))
+        summary, = self.metrics.command_summary()
+        self.assertEqual((summary.count, summary.deferred, summary.errors), (2, 1, 0))
+        self.assertIn('battlebuddy_command_deferred_total{command="who"} 1',
+                      self.metrics.render_prometheus().splitlines())
+
+    async def test_deferred_responses_keep_their_visibility(self):
+        """Test a follow-up of the other visibility replaces the "thinking" message"""
+        @auto_defer
+        async def who(interaction, ephemeral):
+            await asyncio.sleep(0.1)
+            await respond(interaction, "first", ephemeral=ephemeral)
+            await respond(interaction, "second", ephemeral=ephemeral)
+
+        @auto_defer(ephemeral=True)
+        async def botstats(interaction):
+            await asyncio.sleep(0.1)
+            await respond(interaction, "stats", ephemeral=True)
+
+        public, private, admin = self.interaction(), self.interaction(), self.interaction()
+        await who(public, False)
+        await who(private, True)
+        await botstats(admin)
+        self.assertEqual((public.response.deferred_ephemeral, public.deleted), (False, 0))
+        self.assertEqual(public.followup.ephemeral, [False, False])
+        self.assertEqual((private.response.deferred_ephemeral, private.deleted), (False, 1))
+        self.assertEqual(private.followup.ephemeral, [True, True])
+        self.assertEqual((admin.response.deferred_ephemeral, admin.deleted), (True, 0))
+        self.assertEqual(admin.followup.sent, [("stats",)])
+
+    async def test_full_queue_rejects_commands(self):
+        """Test commands beyond the running and waiting limits are turned away"""
+        release = asyncio.Event()
+
+        @timed_command
+        @auto_defer
+        async def stats(interaction):
+            await release.wait()
+            await respond(interaction, "stats")
+
+        interactions = [self.interaction() for _ in range(3)]
+        tasks = [asyncio.create_task(stats(interaction)) for interaction in interactions]
+        await asyncio.sleep(0)
+        queue = self.client.command_queue
+        self.assertEqual((queue.running, queue.waiting, queue.rejected), (1, 1, 1))
+        release.set()
+        await asyncio.gather(*tasks)
+
+        self.assertEqual([interaction.response.sent for interaction in interactions[:2]],
+                         [[("stats",)], [("stats",)]])
+        self.assertIn("busy", interactions[2].response.sent[0][0])
+        self.assertEqual((queue.running, queue.waiting), (0, 0))
+        self.assertEqual(self.metrics.command_summary()[0].errors, 1)
+
+    async def test_slot_limits_concurrency(self):
+        """Test a full queue raises QueueFull only once the waiting room is full"""
+        queue = CommandQueue(workers=1, max_waiting=0, defer_after=1)
+        self.assertIsNone(queue._slots, "created outside the bot's event loop")
+        async with queue.slot():
+            with self.assertRaises(QueueFull):
+                async with queue.slot():
+                    pass
+        async with queue.slot():
+            self.assertEqual(queue.running, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Unit tests for hash-based slash command sync.
+"""
+import os
+import tempfile
+import unittest
+from typing import Optional
+from unittest import mock
+
+import discord
+from discord import app_commands
+
+from command_sync import CommandSyncer, command_tree_hash
+
+def make_tree(description="Pick a character", reverse=False):
+    """Build a tree with two commands, registered in either order."""
+    tree = app_commands.CommandTree(discord.Client(intents=discord.Intents.none()))
+
+    @app_commands.command(name="who", description=description)
+    async def who(interaction: discord.Interaction, game: str, role: Optional[str] = None):
+        pass
+
+    @app_commands.command(name="help", description="Show help")
+    async def help(interaction: discord.Interaction):
+        pass
+
+    for command in ((help, who) if reverse else (who, help)):
+        tree.add_command(command)
+    return tree
+
+class TestCommandTreeHash(unittest.TestCase):
+    def test_deterministic(self):
+        """Test that the hash ignores registration order but not content."""
+        self.assertEqual(command_tree_hash(make_tree()), command_tree_hash(make_tree(reverse=True)))
+        self.assertNotEqual(command_tree_hash(make_tree()),
+                            command_tree_hash(make_tree(description="Something else")))
+
+class TestCommandSyncer(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.state_path = os.path.join(directory.name, 'command_sync.json')
+
+    def syncer(self, tree, force=False):
+        syncer = CommandSyncer(tree, self.state_path, force=force)
+        syncer.tree.sync = mock.AsyncMock(return_value=[object(), object()])
+        return syncer
+
+    async def test_skips_unchanged_tree(self):
+        """Test that only changed trees are synced."""
+        first = self.syncer(make_tree())
+        self.assertEqual(await first.sync(), 2)
+        self.assertIsNone(await first.sync())
+        first.tree.sync.assert_awaited_once()
+
+        # A new process with the same commands skips too
+        second = self.syncer(make_tree(reverse=True))
+        self.assertIsNone(await second.sync())
+        second.tree.sync.assert_not_awaited()
+
+        changed = self.syncer(make_tree(description="Something else"))
+        self.assertEqual(await changed.sync(), 2)
+
+    async def test_force(self):
+        """Test that a forced sync happens once even if unchanged."""
+        await self.syncer(make_tree()).sync()
+        forced = self.syncer(make_tree(), force=True)
+        self.assertEqual(await forced.sync(), 2)
+        self.assertIsNone(await forced.sync())
+
+    async def test_unreadable_state(self):
+        """Test that a corrupt state file just causes a sync."""
+        with open(self.state_path, 'w') as state_file:
+            state_file.write('not json')
+        with self.assertLogs('command_sync', 'WARNING'):
+            self.assertEqual(await self.syncer(make_tree()).sync(), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+"""
+Unit tests for the cooldown store.
+"""
+import unittest
+from tests.helpers import FakeClock
+from utils.cooldown import CooldownStore
+
+class TestCooldownStore(unittest.TestCase):
+    def setUp(self):
+        """Set up a store driven by a fake clock."""
+        self.clock = FakeClock()
+        self.store = CooldownStore(resolution=1.0, wheel_size=8, max_entries=3, clock=self.clock)
+
+    def test_check_and_set(self):
+        """Test that a cooldown blocks until it expires."""
+        self.assertEqual(self.store.check_and_set(1, 5), 0)
+        self.clock.now += 2
+        self.assertAlmostEqual(self.store.check_and_set(1, 5), 3)
+        self.clock.now += 3
+        self.assertEqual(self.store.check_and_set(1, 5), 0)
+
+    def test_expired_entries_are_evicted(self):
+        """Test that expired cooldowns are dropped as the wheel turns."""
+        self.store.set(1, 2)
+        self.store.set(2, 5)
+        self.clock.now += 4
+        stats = self.store.stats()
+        self.assertEqual((stats.size, stats.expired), (1, 1))
+        self.clock.now += 100
+        stats = self.store.stats()
+        self.assertEqual((stats.size, stats.wheel_entries, stats.expired), (0, 0, 2))
+
+    def test_long_cooldown_survives_wheel_turns(self):
+        """Test cooldowns longer than the wheel span are not dropped early."""
+        self.store.set(1, 20)
+        for _ in range(19):
+            self.clock.now += 1
+            self.assertGreater(self.store.remaining(1), 0)
+        self.clock.now += 2
+        self.assertEqual(self.store.remaining(1), 0)
+        self.assertEqual(len(self.store), 0)
+
+    def test_reset_supersedes_old_entry(self):
+        """Test that restarting a cooldown ignores the old expiry."""
+        self.store.set(1, 2)
+        self.store.set(1, 6)
+        self.clock.now += 3
+        self.assertGreater(self.store.remaining(1), 0)
+        self.assertEqual(self.store.stats().expired, 0)
+
+    def test_max_entries(self):
+        """Test that the oldest cooldown is evicted when the store is full."""
+        for user_id in range(4):
+            self.store.set(user_id, 10)
+        stats = self.store.stats()
+        self.assertEqual((stats.size, stats.evicted), (3, 1))
+        self.assertEqual(self.store.remaining(0), 0)
+        self.assertGreater(self.store.remaining(3), 0)
+
+if __name__ == '__main__':
+    unittest.main()
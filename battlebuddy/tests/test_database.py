@@ -3,8 +3,16 @@ Unit tests for the database module.
 """
 import unittest
 import os
+import random
 import sqlite3
-from database import Database
+import threading
+import time
+from unittest import mock
+from database import ALL_GUILDS, DAY, HOUR, NO_GUILD, ConnectionPool, Database
+
+# Rollup rows with the character name instead of its ID
+ROLLUPS = 'SELECT guild_id, bucket, characters.name, picks FROM'
+BY_NAME = 'JOIN characters ON characters.id = character_id'
 
 class TestDatabase(unittest.TestCase):
     def setUp(self):
@@ -14,8 +22,10 @@ class TestDatabase(unittest.TestCase):
 
     def tearDown(self):
         """Clean up test database."""
-        if os.path.exists(self.test_db_path):
-            os.remove(self.test_db_path)
+        self.db.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.test_db_path + suffix):
+                os.remove(self.test_db_path + suffix)
 
     def test_init_db(self):
         """Test database initialization."""
@@ -84,6 +94,86 @@ class TestDatabase(unittest.TestCase):
         favorites = self.db.get_user_favorites(user_id)
         self.assertEqual(len(favorites), 0)
 
+    def test_toggle_favorite(self):
+        """Test toggling favorites on and off."""
+        self.assertTrue(self.db.toggle_favorite(1, 'game1', 'char1'))
+        self.assertEqual(self.db.get_favorites(1), [('game1', 'char1')])
+        self.assertFalse(self.db.toggle_favorite(1, 'game1', 'char1'))
+        self.assertEqual(self.db.get_favorites(1), [])
+
+    def test_favorites_cache(self):
+        """Test that favorites are cached and invalidated on write."""
+        self.db.add_favorite(1, 'game1', 'char1')
+        self.assertIsNone(self.db.get_cached_favorites(1))
+        self.assertEqual(self.db.get_favorites(1), [('game1', 'char1')])
+        self.assertEqual(self.db.get_cached_favorites(1), [('game1', 'char1')])
+        
+        # Reads are served from the cache
+        hits = self.db.favorites_cache.hits
+        self.assertEqual(self.db.get_favorites(1), [('game1', 'char1')])
+        self.assertEqual(self.db.favorites_cache.hits, hits + 1)
+        
+        self.db.toggle_favorite(1, 'game1', 'char2')
+        self.assertIsNone(self.db.get_cached_favorites(1))
+        self.assertEqual(self.db.get_favorites(1), [('game1', 'char1'), ('game1', 'char2')])
+    
+    def test_favorites_cache_across_processes(self):
+        """Test that a write through another Database invalidates this one's cache."""
+        other = Database(self.test_db_path)
+        self.addCleanup(other.close)
+        self.db.add_favorite(1, 'game1', 'char1')
+        self.db.add_favorite(2, 'game1', 'char1')
+        self.assertEqual(self.db.get_favorites(1), [('game1', 'char1')])
+        self.assertEqual(self.db.get_favorites(2), [('game1', 'char1')])
+        
+        other.toggle_favorite(1, 'game1', 'char1')
+        self.assertEqual(self.db.get_favorites(1), [])
+        # Users whose favorites did not change stay cached
+        self.assertEqual(self.db.get_cached_favorites(2), [('game1', 'char1')])
+        
+        # The change log is pruned once every cache entry from before it expired
+        self.db.compact_pick_events(time.time() + 2 * self.db.favorites_cache.ttl + 1)
+        with self.db.get_connection() as conn:
+            self.assertEqual(conn.execute('SELECT COUNT(*) FROM favorite_changes').fetchone()[0], 0)
+
+    def test_favorites_cache_across_processes_after_pruning(self):
+        """Test that IDs of pruned favorite changes are not reused."""
+        other = Database(self.test_db_path)
+        self.addCleanup(other.close)
+        self.db.add_favorite(1, 'game1', 'char1')
+        self.db.add_favorite(1, 'game1', 'char2')
+        self.assertEqual(self.db.get_favorites(1), [('game1', 'char1'), ('game1', 'char2')])
+        other.compact_pick_events(time.time() + 2 * other.favorites_cache.ttl + 1)
+        
+        other.toggle_favorite(1, 'game1', 'char1')
+        self.assertEqual(self.db.get_favorites(1), [('game1', 'char2')])
+
+    def test_favorite_changes_interval(self):
+        """Test that cached favorites skip SQLite until a change check is due."""
+        now = [1000.0]
+        with mock.patch('database.time.monotonic', lambda: now[0]):
+            db = Database(self.test_db_path, favorite_changes_interval=10)
+            self.addCleanup(db.close)
+            other = Database(self.test_db_path)
+            self.addCleanup(other.close)
+            db.add_favorite(1, 'game1', 'char1')
+            self.assertEqual(db.get_favorites(1), [('game1', 'char1')])
+            
+            other.toggle_favorite(1, 'game1', 'char2')
+            statements = []
+            with db.get_connection() as conn:
+                conn.set_trace_callback(statements.append)
+            self.assertFalse(db.favorite_changes_due())
+            self.assertEqual(db.get_favorites(1), [('game1', 'char1')])
+            self.assertEqual(statements, [])
+            
+            now[0] += 10
+            self.assertTrue(db.favorite_changes_due())
+            self.assertEqual(db.get_favorites(1), [('game1', 'char1'), ('game1', 'char2')])
+            self.assertFalse(db.favorite_changes_due())
+            with db.get_connection() as conn:
+                conn.set_trace_callback(None)
+
     def test_get_character_stats(self):
         """Test getting character statistics."""
         # Record some picks
@@ -99,7 +189,273 @@ class TestDatabase(unittest.TestCase):
         # Test getting game-specific stats
         game1_stats = self.db.get_character_stats('game1')
         self.assertEqual(len(game1_stats), 2)
-        self.assertEqual(game1_stats[0][2], 2)  # char1 should have 2 picks
+        self.assertEqual(game1_stats[0][1], 2)  # char1 should have 2 picks
+
+    def test_buffered_character_picks(self):
+        """Test that picks are batched until the flush threshold is reached."""
+        db = Database(self.test_db_path, pick_flush_interval=3600, pick_flush_threshold=3)
+        self.addCleanup(db.close)
+        db.record_character_pick('game1', 'char1')
+        db.record_character_pick('game1', 'char1')
+        self.assertEqual(db.pending_picks, 2)
+        
+        # Nothing has been written yet
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM character_stats')
+            self.assertEqual(cursor.fetchone()[0], 0)
+        
+        # Reaching the threshold writes the whole batch
+        db.record_character_pick('game1', 'char2')
+        self.assertEqual(db.pending_picks, 0)
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT character, picks, last_picked FROM character_stats
+                ORDER BY character
+            ''')
+            rows = cursor.fetchall()
+        self.assertEqual([row[:2] for row in rows], [('char1', 2), ('char2', 1)])
+        self.assertIsNotNone(rows[0][2])
+
+    def test_record_character_picks(self):
+        """Test that a batch of picks is written in one flush."""
+        db = Database(self.test_db_path, pick_flush_interval=3600, pick_flush_threshold=3)
+        self.addCleanup(db.close)
+        db.flush_picks()
+        with mock.patch.object(db, 'flush_picks', wraps=db.flush_picks) as flush:
+            db.record_character_picks('game1', ['a', 'b', 'c', 'd'], user_id=1, guild_id=2)
+        flush.assert_called_once()
+        self.assertEqual(db.pending_picks, 0)
+        with db.get_connection() as conn:
+            self.assertEqual(conn.execute('SELECT COUNT(*) FROM character_stats').fetchone()[0], 4)
+            self.assertEqual(conn.execute('SELECT COUNT(*) FROM pick_events').fetchone()[0], 4)
+
+    def test_flush_on_close_not_read(self):
+        """Test that close() persists buffered picks and reads leave them buffered."""
+        db = Database(self.test_db_path, pick_flush_interval=3600, pick_flush_threshold=100)
+        self.addCleanup(db.close)
+        db.record_character_pick('game1', 'char1')
+        self.assertEqual(db.get_character_stats('game1'), [])
+        self.assertEqual(db.get_character_stats_page('game1'), [])
+        self.assertEqual(db.pending_picks, 1)
+        
+        db.record_character_pick('game1', 'char1')
+        db.close()
+        self.assertEqual(db.pending_picks, 0)
+        reopened = Database(self.test_db_path)
+        self.addCleanup(reopened.close)
+        self.assertEqual(reopened.get_character_stats('game1'), [('char1', 2)])
+
+    def test_legacy_schema_upgrade(self):
+        """Test that a database created without last_picked is upgraded."""
+        self.db.close()
+        self.tearDown()
+        conn = sqlite3.connect(self.test_db_path)
+        conn.execute('''
+            CREATE TABLE character_stats (
+                game TEXT,
+                character TEXT,
+                picks INTEGER DEFAULT 0,
+                PRIMARY KEY (game, character)
+            )
+        ''')
+        conn.commit()
+        conn.close()
+        
+        self.db = Database(self.test_db_path)
+        self.db.record_character_pick('game1', 'char1')
+        self.assertEqual(self.db.get_character_stats('game1'), [('char1', 1)])
+
+    def test_character_stats_pages(self):
+        """Test keyset pagination over character stats."""
+        for game, character, picks in (('game1', 'a', 3), ('game1', 'b', 1), ('game1', 'c', 3),
+                                       ('game2', 'd', 2), ('game2', 'e', 5)):
+            for _ in range(picks):
+                self.db.record_character_pick(game, character)
+        
+        pages = []
+        cursor = None
+        while True:
+            page = self.db.get_character_stats_page(after=cursor, limit=2)
+            if not page:
+                break
+            pages.append(page)
+            cursor = (page[-1][0], page[-1][2], page[-1][1])
+        self.assertEqual(pages, [
+            [('game1', 'a', 3), ('game1', 'c', 3)],
+            [('game1', 'b', 1), ('game2', 'e', 5)],
+            [('game2', 'd', 2)],
+        ])
+        self.assertEqual(self.db.get_character_stats_page('game2', limit=5),
+                         [('game2', 'e', 5), ('game2', 'd', 2)])
+        self.assertEqual(self.db.get_character_stats_page('game1', ('game1', 3, 'c'), 5),
+                         [('game1', 'b', 1)])
+
+    def test_character_stats_from_rankings(self):
+        """Test in-memory rankings serve the same pages as SQLite, buffered picks included."""
+        rng = random.Random(7)
+        for _ in range(300):
+            self.db.record_character_pick(f"game{rng.randrange(3)}", f"char{rng.randrange(12)}",
+                                          guild_id=rng.choice((1, 2, None)))
+        ranked = Database(self.test_db_path, pick_flush_interval=3600, pick_flush_threshold=100,
+                          rankings=True)
+        self.addCleanup(ranked.close)
+        ranked.record_character_pick('game0', 'char0', guild_id=2)
+        self.db.record_character_pick('game0', 'char0', guild_id=2)
+        self.assertEqual(ranked.pending_picks, 1)
+        
+        for game, guild_id in ((None, None), ('game1', None), (None, 2), ('game2', NO_GUILD)):
+            with self.subTest(game=game, guild_id=guild_id):
+                cursor = None
+                while True:
+                    expected = self.db.get_character_stats_page(game, cursor, 5, guild_id=guild_id)
+                    self.assertEqual(ranked.get_character_stats_page(game, cursor, 5, guild_id=guild_id),
+                                     expected)
+                    if not expected:
+                        break
+                    cursor = (expected[-1][0], expected[-1][2], expected[-1][1])
+        self.assertEqual(ranked.pending_picks, 1)
+
+    def _pick_at(self, timestamp, game, character, times=1, guild_id=2):
+        with mock.patch('database.time.time', return_value=timestamp):
+            for _ in range(times):
+                self.db.record_character_pick(game, character, user_id=1, guild_id=guild_id)
+    
+    def test_pick_events_and_rollups(self):
+        """Test that pick events are rolled up without losing picks."""
+        now = 100 * DAY + 5 * HOUR + 600
+        self._pick_at(now - 30 * DAY, 'game1', 'a', 2)
+        self._pick_at(now - 3 * DAY, 'game1', 'b')
+        self._pick_at(now - 3 * HOUR, 'game1', 'a')
+        self._pick_at(now - 60, 'game1', 'b', 3)
+        self.db.flush_picks()
+        
+        with self.db.get_connection() as conn:
+            events = conn.execute('SELECT user_id, guild_id, COUNT(*) FROM pick_events').fetchone()
+        self.assertEqual(events, (1, 2, 7))
+        
+        self.assertEqual(self.db.compact_pick_events(now), 4)
+        with self.db.get_connection() as conn:
+            self.assertEqual(conn.execute('SELECT COUNT(*) FROM pick_events').fetchone()[0], 3)
+            hourly = conn.execute(f'{ROLLUPS} pick_rollups_hourly {BY_NAME} ORDER BY 1').fetchall()
+            daily = conn.execute(f'{ROLLUPS} pick_rollups_daily {BY_NAME} ORDER BY 1, 2').fetchall()
+        hour = now - now % HOUR
+        self.assertEqual(hourly, [(ALL_GUILDS, hour - 3 * HOUR, 'a', 1), (2, hour - 3 * HOUR, 'a', 1)])
+        day = now - now % DAY
+        self.assertEqual(daily, [(ALL_GUILDS, day - 30 * DAY, 'a', 2), (ALL_GUILDS, day - 3 * DAY, 'b', 1),
+                                 (2, day - 30 * DAY, 'a', 2), (2, day - 3 * DAY, 'b', 1)])
+        
+        # Compacting again is a no-op, and old days expire
+        self.assertEqual(self.db.compact_pick_events(now), 0)
+        self.db.daily_retention = 7 * DAY
+        self.db.compact_pick_events(now)
+        with self.db.get_connection() as conn:
+            daily = conn.execute(f'{ROLLUPS} pick_rollups_daily {BY_NAME} ORDER BY 1').fetchall()
+        self.assertEqual(daily, [(ALL_GUILDS, day - 3 * DAY, 'b', 1), (2, day - 3 * DAY, 'b', 1)])
+        
+        # All-time totals are unaffected by compaction
+        self.assertEqual(self.db.get_character_stats_page('game1'),
+                         [('game1', 'b', 4), ('game1', 'a', 3)])
+    
+    def test_windowed_character_stats(self):
+        """Test counting only picks inside a time window."""
+        now = 100 * DAY + 5 * HOUR + 600
+        self._pick_at(now - 10 * DAY, 'game1', 'a', 5)
+        self._pick_at(now - 3 * DAY, 'game1', 'b', 2)
+        self._pick_at(now - 3 * HOUR, 'game1', 'a')
+        self._pick_at(now - 60, 'game1', 'c', 3)
+        self._pick_at(now - 60, 'game2', 'd')
+        
+        def window(seconds, game=None, after=None):
+            return self.db.get_character_stats_page(game, after, 10, since=now - seconds)
+        
+        for compacted in (False, True):
+            if compacted:
+                self.db.compact_pick_events(now)
+            with self.subTest(compacted=compacted):
+                self.assertEqual(window(HOUR), [('game1', 'c', 3), ('game2', 'd', 1)])
+                self.assertEqual(window(7 * DAY, 'game1'),
+                                 [('game1', 'c', 3), ('game1', 'b', 2), ('game1', 'a', 1)])
+                self.assertEqual(window(30 * DAY, 'game1', ('game1', 3, 'c')),
+                                 [('game1', 'b', 2)])
+                self.assertEqual(window(30 * DAY, 'game1')[0], ('game1', 'a', 6))
+
+    def test_stats_per_guild(self):
+        """Test that stats are counted per guild and summed across guilds."""
+        now = 100 * DAY + 5 * HOUR + 600
+        self._pick_at(now - 3 * DAY, 'game1', 'a', 2, guild_id=10)
+        self._pick_at(now - 3 * DAY, 'game1', 'b', 1, guild_id=20)
+        self._pick_at(now - 60, 'game1', 'b', 3, guild_id=20)
+        self._pick_at(now - 60, 'game1', 'a', 1, guild_id=None)
+        
+        def page(guild_id, since=None):
+            return self.db.get_character_stats_page('game1', since=since, guild_id=guild_id)
+        
+        self.assertEqual(page(10), [('game1', 'a', 2)])
+        self.assertEqual(page(20), [('game1', 'b', 4)])
+        self.assertEqual(page(NO_GUILD), [('game1', 'a', 1)])
+        self.assertEqual(page(30), [])
+        self.assertEqual(page(None), [('game1', 'b', 4), ('game1', 'a', 3)])
+        for compacted in (False, True):
+            if compacted:
+                self.db.compact_pick_events(now)
+            with self.subTest(compacted=compacted):
+                self.assertEqual(page(10, now - 7 * DAY), [('game1', 'a', 2)])
+                self.assertEqual(page(20, now - HOUR), [('game1', 'b', 3)])
+                self.assertEqual(page(None, now - HOUR), [('game1', 'b', 3), ('game1', 'a', 1)])
+                self.assertEqual(page(None, now - 7 * DAY), [('game1', 'b', 4), ('game1', 'a', 3)])
+    
+    def test_character_ids_survive_restart(self):
+        """Test that a new Database reuses the character IDs already assigned."""
+        self.db.record_character_pick('game1', 'a', guild_id=10)
+        self.db.flush_picks()
+        self.db.close()
+        self.db = Database(self.test_db_path)
+        self.db.record_character_pick('game1', 'a', guild_id=10)
+        self.assertEqual(self.db.get_character_stats_page(guild_id=10), [('game1', 'a', 2)])
+        with self.db.get_connection() as conn:
+            self.assertEqual(conn.execute('SELECT COUNT(*) FROM characters').fetchone()[0], 1)
+    
+    def test_connection_pool(self):
+        """Test that connections are reused and WAL mode is enabled."""
+        with self.db.get_connection() as conn:
+            first = conn
+            cursor = conn.cursor()
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+        with self.db.get_connection() as conn:
+            self.assertIs(conn, first)
+
+    def test_connection_pool_is_bounded(self):
+        """Test that the pool never opens more than its maximum."""
+        pool = ConnectionPool(self.test_db_path, max_connections=2)
+        self.addCleanup(pool.close)
+        first = pool.acquire()
+        second = pool.acquire()
+        acquired = []
+        waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+        waiter.start()
+        waiter.join(0.1)
+        self.assertEqual(acquired, [])
+        
+        pool.release(first)
+        waiter.join(1)
+        self.assertIs(acquired[0], first)
+        pool.release(second)
+        pool.release(first)
+
+    def test_shard_health(self):
+        """Test shard health reports replace earlier ones per shard"""
+        self.db.report_shard_health(0, 100, [(0, 'connecting', None, 0), (1, 'ready', 42.5, 3)], now=1000)
+        self.db.report_shard_health(1, 200, [(2, 'ready', 10.0, 5)], now=1000)
+        self.db.report_shard_health(0, 101, [(0, 'ready', 30.0, 4), (1, 'ready', 40.0, 3)], now=1030)
+
+        self.assertEqual(self.db.get_shard_health(), [
+            (0, 0, 101, 'ready', 30.0, 4, 1030),
+            (1, 0, 101, 'ready', 40.0, 3, 1030),
+            (2, 1, 200, 'ready', 10.0, 5, 1000),
+        ])
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
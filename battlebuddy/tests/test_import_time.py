@@ -0,0 +1,107 @@
+"""
+Unit tests for the startup cost of the bot entry point.
+"""
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from bot import create_bot, load_settings
+
+BATTLEBUDDY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative microseconds ``import bot`` may take; override on slow machines
+IMPORT_BUDGET_US = int(os.getenv('BATTLEBUDDY_IMPORT_BUDGET_US', '150000'))
+
+# Modules that must only be imported once a bot is created or run
+HEAVY_MODULES = ('discord', 'dotenv', 'sqlite3', 'app', 'database')
+
+def import_times(stderr: str) -> dict:
+    """Parse ``-X importtime`` output into cumulative microseconds per module."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+class TestImportTime(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_import_is_light_and_side_effect_free(self):
+        """Test importing bot.py stays within budget and touches nothing"""
+        env = dict(os.environ, PYTHONPATH=BATTLEBUDDY_DIR)
+        env.pop('DISCORD_TOKEN', None)
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import bot'],
+            cwd=self.directory, env=env, capture_output=True, text=True, timeout=60
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        times = import_times(result.stderr)
+        self.assertIn('bot', times)
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, times)
+        self.assertLessEqual(times['bot'], IMPORT_BUDGET_US,
+                             f"import bot took {times['bot']}us (budget {IMPORT_BUDGET_US}us)")
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_launcher_import_leaves_logging_alone(self):
+        """Test importing launcher.py configures no logging handlers"""
+        env = dict(os.environ, PYTHONPATH=BATTLEBUDDY_DIR)
+        result = subprocess.run(
+            [sys.executable, '-c', 'import logging, launcher; print(len(logging.getLogger().handlers))'],
+            cwd=self.directory, env=env, capture_output=True, text=True, timeout=60
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), '0')
+
+    def test_create_bot_is_lazy(self):
+        """Test services are built on first use, not when the bot is created"""
+        path = os.path.join(self.directory, 'test.db')
+        bot = create_bot(load_settings(DATABASE_PATH=path, COMMAND_SYNC_STATE_PATH='sync.json'),
+                         worker_id=2)
+        self.addCleanup(bot.shutdown)
+        self.assertEqual(bot.worker_id, 2)
+        self.assertEqual({command.name for command in bot.tree.get_commands()},
+                         {'who', 'random', 'team', 'stats', 'favorite', 'favorites', 'help', 'botstats'})
+        self.assertFalse(os.path.exists(path))
+        self.assertNotIn('roster_store', vars(bot))
+
+        asyncio.run(bot.setup_hook())
+        self.assertTrue(os.path.exists(path))
+        self.assertIn('roster_store', vars(bot))
+
+    @unittest.skipUnless(hasattr(signal, 'SIGTERM') and os.name == 'posix', "needs POSIX signals")
+    def test_sigterm_closes_the_bot(self):
+        """Test SIGTERM closes the bot so bot.main can flush buffered picks"""
+        bot = create_bot(load_settings(DATABASE_PATH=os.path.join(self.directory, 'test.db'),
+                                       COMMAND_SYNC_STATE_PATH='sync.json'))
+        self.addCleanup(bot.shutdown)
+        closed = []
+
+        async def close():
+            closed.append(True)
+
+        async def run():
+            await bot.setup_hook()
+            bot.close = close
+            os.kill(os.getpid(), signal.SIGTERM)
+            await asyncio.sleep(0.1)
+
+        asyncio.run(run())
+        self.assertEqual(closed, [True])
+
+    def test_unknown_setting(self):
+        """Test misspelled setting overrides are rejected"""
+        with self.assertRaises(AttributeError):
+            load_settings(DATABSE_PATH='x.db')
+
+if __name__ == '__main__':
+    unittest.main()
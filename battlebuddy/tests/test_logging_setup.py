@@ -0,0 +1,78 @@
+"""
+Unit tests for the queued logging setup.
+"""
+import json
+import logging
+import os
+import tempfile
+import unittest
+
+from utils.logging_setup import setup_logging, stop_logging
+
+class TestLoggingSetup(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'logs', 'bot.log')
+        root = logging.getLogger()
+        handlers, level = root.handlers[:], root.level
+        self.addCleanup(setattr, root, 'level', level)
+        self.addCleanup(setattr, root, 'handlers', handlers)
+        self.addCleanup(stop_logging)
+        self.logger = logging.getLogger('test_logging_setup')
+
+    def read_lines(self, path=None):
+        with open(path or self.path, encoding='utf-8') as log_file:
+            return log_file.read().splitlines()
+
+    def test_records_are_written_by_listener(self):
+        """Test records reach the file once the listener is stopped"""
+        setup_logging(self.path, console=False)
+        self.logger.debug("hidden %s", 1)
+        self.logger.info("picked %s in %.1fs", 'Wraith', 0.25)
+        stop_logging()
+        lines = self.read_lines()
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(lines[0].endswith(" - INFO - picked Wraith in 0.2s"))
+
+    def test_message_is_merged_before_queueing(self):
+        """Test later changes to mutable arguments do not alter queued records"""
+        listener = setup_logging(self.path, console=False)
+        listener.stop()  # hold records in the queue
+        picks = ['Wraith']
+        self.logger.info("picks: %s", picks)
+        picks.append('Bloodhound')
+        listener.start()
+        stop_logging()
+        self.assertTrue(self.read_lines()[0].endswith("picks: ['Wraith']"))
+
+    def test_json_format(self):
+        """Test JSON lines include extra fields and tracebacks"""
+        setup_logging(self.path, json_format=True, console=False)
+        self.logger.info("command %s", 'who', extra={'guild_id': 42})
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            self.logger.exception("failed")
+        stop_logging()
+        first, second = (json.loads(line) for line in self.read_lines())
+        self.assertEqual(first['message'], 'command who')
+        self.assertEqual(first['level'], 'INFO')
+        self.assertEqual(first['logger'], 'test_logging_setup')
+        self.assertEqual(first['guild_id'], 42)
+        self.assertNotIn('exc_info', first)
+        self.assertIn('RuntimeError: boom', second['exc_info'])
+
+    def test_rotation(self):
+        """Test the log file is rotated at the size limit"""
+        setup_logging(self.path, console=False, max_bytes=200, backup_count=2)
+        for i in range(30):
+            self.logger.info("line %s", i)
+        stop_logging()
+        self.assertTrue(os.path.exists(self.path + '.1'))
+        self.assertTrue(os.path.exists(self.path + '.2'))
+        self.assertFalse(os.path.exists(self.path + '.3'))
+        self.assertTrue(self.read_lines()[-1].endswith("line 29"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+"""
+Unit tests for command and query metrics.
+"""
+import asyncio
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from database import Database
+from metrics import (
+    Histogram, Metrics, phase, record_error, start_metrics_server, timed_command, timed_query
+)
+
+class TestHistogram(unittest.TestCase):
+    def test_buckets_and_quantiles(self):
+        """Test observations land in the first bucket whose bound they do not exceed"""
+        histogram = Histogram((0.01, 0.1, 1.0))
+        for seconds in (0.005, 0.01, 0.05, 0.05, 5.0):
+            histogram.observe(seconds)
+        histogram.observe(0.5, error=True)
+        counts, total, errors = histogram.snapshot()
+        self.assertEqual(counts, [2, 2, 1, 1])
+        self.assertAlmostEqual(total, 5.615)
+        self.assertEqual(errors, 1)
+        self.assertEqual(histogram.count, 6)
+        # Rank 3 of 6 is halfway through the (0.01, 0.1] bucket
+        self.assertAlmostEqual(histogram.quantile(0.5), 0.055)
+        self.assertEqual(histogram.quantile(0.99), 1.0)
+        self.assertEqual(Histogram().quantile(0.5), 0.0)
+
+class TestMetrics(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.metrics = Metrics(buckets=(0.01, 1.0))
+
+    async def test_timed_command_records_phases_and_errors(self):
+        """Test commands record latency, phase time and failures"""
+        @timed_command
+        async def who(interaction, fail=None):
+            with phase('db'):
+                await asyncio.sleep(0.02)
+            with phase('discord'):
+                pass
+            if fail == 'handled':
+                record_error()
+            elif fail == 'raised':
+                raise RuntimeError(fail)
+            return fail
+
+        interaction = SimpleNamespace(client=SimpleNamespace(metrics=self.metrics))
+        self.assertIsNone(await who(interaction))
+        await who(interaction, fail='handled')
+        with self.assertRaises(RuntimeError):
+            await who(interaction, fail='raised')
+        # Clients without a registry are not recorded
+        await who(SimpleNamespace(client=None))
+
+        summary, = self.metrics.command_summary()
+        self.assertEqual((summary.command, summary.count, summary.errors), ('who', 3, 2))
+        self.assertGreaterEqual(summary.mean_db, 0.02)
+        self.assertLess(summary.mean_discord, summary.mean_db)
+        self.assertGreaterEqual(summary.p50, 0.01)
+
+    async def test_phase_outside_command_is_ignored(self):
+        """Test database time outside a command is not attributed to one"""
+        with phase('db'):
+            pass
+        self.assertEqual(self.metrics.command_summary(), [])
+
+    def test_timed_query(self):
+        """Test query methods record latency and exceptions"""
+        class Store:
+            def __init__(self, metrics):
+                self.metrics = metrics
+
+            @timed_query
+            def lookup(self, key):
+                if key is None:
+                    raise KeyError(key)
+                return key
+
+        self.assertEqual(Store(None).lookup(1), 1)
+        store = Store(self.metrics)
+        self.assertEqual(store.lookup(2), 2)
+        with self.assertRaises(KeyError):
+            store.lookup(None)
+        counts, _, errors = self.metrics.queries['lookup'].snapshot()
+        self.assertEqual((sum(counts), errors), (2, 1))
+
+    def test_database_methods_are_timed(self):
+        """Test a database given a registry records its queries"""
+        with tempfile.TemporaryDirectory() as directory:
+            db = Database(os.path.join(directory, 'test.db'), metrics=self.metrics)
+            db.add_favorite(1, 'apex', 'Wraith')
+            db.get_favorites(1)
+            db.close()
+        self.assertLessEqual({'load_character_ids', 'add_favorite', 'get_favorites', 'flush_picks'},
+                             set(self.metrics.queries))
+
+    def test_render_prometheus(self):
+        """Test histograms are rendered cumulatively with error counters"""
+        self.metrics.observe_command('who', 0.005, {'db': 0.002}, error=False)
+        self.metrics.observe_command('who', 2.0, {'db': 0.5}, error=True)
+        self.metrics.observe_query('get_favorites', 0.001)
+        lines = self.metrics.render_prometheus().splitlines()
+        for expected in (
+            '# TYPE battlebuddy_command_seconds histogram',
+            'battlebuddy_command_seconds_bucket{command="who",le="0.01"} 1',
+            'battlebuddy_command_seconds_bucket{command="who",le="1.0"} 1',
+            'battlebuddy_command_seconds_bucket{command="who",le="+Inf"} 2',
+            'battlebuddy_command_seconds_sum{command="who"} 2.005',
+            'battlebuddy_command_seconds_count{command="who"} 2',
+            'battlebuddy_command_errors_total{command="who"} 1',
+            'battlebuddy_command_phase_seconds_bucket{command="who",phase="db",le="1.0"} 2',
+            'battlebuddy_db_seconds_count{method="get_favorites"} 1',
+            'battlebuddy_db_errors_total{method="get_favorites"} 0',
+        ):
+            self.assertIn(expected, lines)
+        self.assertFalse(any(line.startswith('battlebuddy_command_phase_errors_total') for line in lines))
+
+    async def test_metrics_endpoint(self):
+        """Test the HTTP endpoint serves metrics and rejects other paths"""
+        self.metrics.observe_command('help', 0.001)
+        server = await start_metrics_server(self.metrics, '127.0.0.1', 0)
+        self.addAsyncCleanup(server.wait_closed)
+        self.addCleanup(server.close)
+        port = server.sockets[0].getsockname()[1]
+
+        async def get(path):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+            response = await reader.read()
+            writer.close()
+            await writer.wait_closed()
+            return response.decode()
+
+        response = await get('/metrics')
+        self.assertTrue(response.startswith('HTTP/1.1 200 OK'))
+        self.assertIn('battlebuddy_command_seconds_count{command="help"} 1', response)
+        self.assertTrue((await get('/other')).startswith('HTTP/1.1 404'))
+
+if __name__ == '__main__':
+    unittest.main()
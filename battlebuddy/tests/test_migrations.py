@@ -0,0 +1,239 @@
+"""
+Unit tests for schema migrations and the query plans they enable.
+"""
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from database import Database
+from migrations import MIGRATIONS, migrate, schema_version
+
+def schema(conn):
+    """Describe every table's columns and indexes."""
+    tables = {}
+    for (table,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' "
+                                 "AND name NOT LIKE 'sqlite_%' ORDER BY name"):
+        columns = [row[1:] for row in conn.execute(f"PRAGMA table_info({table})")]
+        indexes = sorted((row[1], row[2], tuple(info[2] for info in conn.execute(f"PRAGMA index_info({row[1]})")))
+                         for row in conn.execute(f"PRAGMA index_list({table})")
+                         if not row[1].startswith('sqlite_autoindex'))
+        tables[table] = (columns, indexes)
+    return tables
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def connect(self, name):
+        conn = sqlite3.connect(os.path.join(self.directory, name))
+        self.addCleanup(conn.close)
+        return conn
+
+    def test_fresh_database(self):
+        """Test a new database is migrated to the latest version once"""
+        conn = self.connect('fresh.db')
+        self.assertEqual(migrate(conn), len(MIGRATIONS))
+        self.assertEqual(schema_version(conn), len(MIGRATIONS))
+        before = schema(conn)
+        self.assertEqual(migrate(conn), len(MIGRATIONS))
+        self.assertEqual(schema(conn), before)
+
+    def test_legacy_schemas_converge(self):
+        """Test databases from the old bot.py and unversioned database.py end up identical"""
+        legacy = self.connect('legacy.db')
+        legacy.execute('''
+            CREATE TABLE character_stats (
+                game TEXT,
+                character TEXT,
+                picks INTEGER DEFAULT 0,
+                PRIMARY KEY (game, character)
+            )
+        ''')
+        legacy.execute('''
+            CREATE TABLE user_favorites (
+                user_id INTEGER,
+                game TEXT,
+                character TEXT,
+                PRIMARY KEY (user_id, game, character)
+            )
+        ''')
+        legacy.execute("INSERT INTO character_stats VALUES ('apex', 'Wraith', 3)")
+        legacy.execute("INSERT INTO user_favorites VALUES (1, 'apex', 'Wraith')")
+        legacy.commit()
+
+        unversioned = self.connect('unversioned.db')
+        MIGRATIONS[0](unversioned.cursor())
+        unversioned.execute("INSERT INTO user_favorites (user_id, game, character) VALUES (1, 'apex', 'Bloodhound')")
+        unversioned.commit()
+        self.assertEqual(schema_version(unversioned), 0)
+
+        fresh = self.connect('fresh.db')
+        for conn in (legacy, unversioned, fresh):
+            migrate(conn)
+        self.assertEqual(schema(legacy), schema(fresh))
+        self.assertEqual(schema(unversioned), schema(fresh))
+        self.assertEqual(legacy.execute("SELECT game, character, picks FROM character_stats").fetchall(),
+                         [('apex', 'Wraith', 3)])
+        self.assertEqual(legacy.execute("SELECT user_id, game, character FROM user_favorites").fetchall(),
+                         [(1, 'apex', 'Wraith')])
+        self.assertIsNotNone(legacy.execute("SELECT added_at FROM user_favorites").fetchone()[0])
+        self.assertEqual(unversioned.execute("SELECT character FROM user_favorites").fetchall(),
+                         [('Bloodhound',)])
+        with self.assertRaises(sqlite3.IntegrityError):
+            legacy.execute("INSERT INTO user_favorites (user_id, game, character) VALUES (1, 'apex', 'Wraith')")
+
+    def test_picks_are_partitioned_by_guild(self):
+        """Test version 2 picks move to integer IDs with their guild"""
+        conn = self.connect('v2.db')
+        migrate(conn, MIGRATIONS[:2])
+        conn.execute("INSERT INTO character_stats (game, character, picks) VALUES ('apex', 'Wraith', 9)")
+        conn.executemany("INSERT INTO pick_events (user_id, guild_id, game, character, picked_at) "
+                         "VALUES (?, ?, ?, ?, ?)",
+                         [(1, 5, 'apex', 'Wraith', 100), (1, 5, 'apex', 'Wraith', 200),
+                          (2, None, 'valorant', 'Jett', 300)])
+        conn.execute("INSERT INTO pick_rollups_hourly (bucket, game, character, picks) "
+                     "VALUES (0, 'apex', 'Bloodhound', 4)")
+        conn.commit()
+
+        self.assertEqual(migrate(conn), len(MIGRATIONS))
+        names = ('JOIN characters ON characters.id = character_id '
+                 'JOIN games ON games.id = characters.game_id')
+        self.assertEqual(conn.execute(f"SELECT guild_id, games.name, characters.name, picks, last_picked "
+                                      f"FROM guild_stats {names} ORDER BY guild_id").fetchall(),
+                         [(0, 'valorant', 'Jett', 1, 300), (5, 'apex', 'Wraith', 2, 200)])
+        self.assertEqual(conn.execute(f"SELECT guild_id, bucket, characters.name, picks "
+                                      f"FROM pick_rollups_hourly {names}").fetchall(),
+                         [(-1, 0, 'Bloodhound', 4)])
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM pick_events").fetchone()[0], 3)
+        self.assertEqual(conn.execute("SELECT picks FROM character_stats").fetchall(), [(9,)])
+
+    def test_favorite_change_ids_survive_rebuild(self):
+        """Test version 5 keeps logged favorite changes and never reuses their IDs"""
+        conn = self.connect('v4.db')
+        migrate(conn, MIGRATIONS[:4])
+        conn.execute("INSERT INTO user_favorites (user_id, game, character) VALUES (1, 'apex', 'Wraith')")
+        conn.execute("INSERT INTO user_favorites (user_id, game, character) VALUES (2, 'apex', 'Wraith')")
+        conn.commit()
+
+        migrate(conn)
+        self.assertEqual(conn.execute("SELECT id, user_id FROM favorite_changes").fetchall(), [(1, 1), (2, 2)])
+        conn.execute("DELETE FROM favorite_changes")
+        conn.execute("DELETE FROM user_favorites WHERE user_id = 1")
+        conn.commit()
+        self.assertEqual(conn.execute("SELECT id, user_id FROM favorite_changes").fetchall(), [(3, 1)])
+
+    def test_failed_migration_rolls_back(self):
+        """Test a failing migration leaves the database at the previous version"""
+        def broken(cursor):
+            cursor.execute("CREATE TABLE half_done (id INTEGER)")
+            raise sqlite3.OperationalError("boom")
+
+        conn = self.connect('broken.db')
+        with self.assertRaises(sqlite3.OperationalError):
+            migrate(conn, MIGRATIONS + [broken])
+        self.assertEqual(schema_version(conn), len(MIGRATIONS))
+        self.assertNotIn('half_done', schema(conn))
+
+    def test_newer_database_is_rejected(self):
+        """Test a database migrated by a newer bot is not touched"""
+        conn = self.connect('newer.db')
+        conn.execute(f"PRAGMA user_version = {len(MIGRATIONS) + 1}")
+        with self.assertRaises(RuntimeError):
+            migrate(conn)
+
+class TestQueryPlans(unittest.TestCase):
+    """Every query the database runs is checked with EXPLAIN QUERY PLAN."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.db = Database(os.path.join(directory.name, 'plans.db'))
+        self.addCleanup(self.db.close)
+        self.db.record_character_pick('apex', 'Wraith', 1, 2)
+
+    def plans(self, call):
+        """Run ``call`` and return the query plans of the statements it executed.
+
+        Plain ``INSERT ... VALUES`` statements have no plan and are skipped.
+        """
+        statements = []
+        with self.db.get_connection() as conn:
+            conn.set_trace_callback(statements.append)
+        try:
+            call()
+        finally:
+            with self.db.get_connection() as conn:
+                conn.set_trace_callback(None)
+        plans = []
+        with self.db.get_connection() as conn:
+            for statement in statements:
+                if statement.split(None, 1)[0].upper() not in ('SELECT', 'INSERT', 'UPDATE', 'DELETE'):
+                    continue
+                plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {statement}")]
+                if plan:
+                    plans.append((statement, plan))
+        self.assertTrue(plans)
+        return plans
+
+    def assertUsesIndex(self, call, index, covering=True, sorted_by_index=True):
+        for statement, plan in self.plans(call):
+            with self.subTest(statement=' '.join(statement.split())[:80]):
+                text = '\n'.join(plan)
+                self.assertIn(f"{'COVERING ' if covering else ''}INDEX {index}", text)
+                if sorted_by_index:
+                    self.assertNotIn('TEMP B-TREE', text)
+
+    def test_stats_queries(self):
+        """Test stats and /stats pages read the ranking index in order"""
+        db = self.db
+        index = 'idx_character_stats_ranking'
+        self.assertUsesIndex(db.get_character_stats, index)
+        self.assertUsesIndex(lambda: db.get_character_stats('apex'), index)
+        self.assertUsesIndex(db.get_character_stats_page, index)
+        self.assertUsesIndex(lambda: db.get_character_stats_page('apex'), index)
+        self.assertUsesIndex(lambda: db.get_character_stats_page(None, ('apex', 3, 'Bangalore')), index)
+        self.assertUsesIndex(lambda: db.get_character_stats_page('apex', ('apex', 3, 'Bangalore')), index)
+
+    def test_windowed_stats_query(self):
+        """Test windowed /stats reads only the window from every tier"""
+        (_, plan), = self.plans(lambda: self.db.get_character_stats_page(since=0))
+        text = '\n'.join(plan)
+        self.assertIn('SEARCH pick_events USING COVERING INDEX idx_pick_events_window (picked_at>?)', text)
+        self.assertIn('SEARCH pick_rollups_hourly USING PRIMARY KEY (guild_id=? AND bucket>?)', text)
+        self.assertIn('SEARCH pick_rollups_daily USING PRIMARY KEY (guild_id=? AND bucket>?)', text)
+
+    def test_guild_stats_queries(self):
+        """Test /stats of one guild reads only that guild's rows"""
+        (_, plan), = self.plans(lambda: self.db.get_character_stats_page(guild_id=2))
+        self.assertIn('SEARCH guild_stats USING PRIMARY KEY (guild_id=?)', plan)
+        (_, plan), = self.plans(lambda: self.db.get_character_stats_page(since=0, guild_id=2))
+        text = '\n'.join(plan)
+        self.assertIn('SEARCH pick_events USING COVERING INDEX idx_pick_events_guild (guild_id=? AND picked_at>?)',
+                      text)
+        self.assertIn('SEARCH pick_rollups_hourly USING PRIMARY KEY (guild_id=? AND bucket>?)', text)
+        self.assertIn('SEARCH pick_rollups_daily USING PRIMARY KEY (guild_id=? AND bucket>?)', text)
+
+    def test_favorites_queries(self):
+        """Test favorites are looked up and changed through the user index"""
+        db = self.db
+        index = 'idx_user_favorites_user'
+        (_, changes), (_, plan) = self.plans(lambda: db.get_favorites(1))
+        self.assertEqual(changes, ['SEARCH favorite_changes USING INTEGER PRIMARY KEY (rowid>?)'])
+        self.assertIn(f'SEARCH user_favorites USING COVERING INDEX {index} (user_id=?)', plan)
+        self.assertUsesIndex(lambda: db.toggle_favorite(1, 'apex', 'Wraith'), index, covering=False)
+        self.assertUsesIndex(lambda: db.remove_favorite(1, 'apex', 'Wraith'), index, covering=False)
+
+    def test_maintenance_queries(self):
+        """Test compaction reads only old rows and shard health is the only scan"""
+        db = self.db
+        for call in (lambda: db.compact_pick_events(now=10 ** 10), db.get_shard_health):
+            for statement, plan in self.plans(call):
+                for step in plan:
+                    if step.startswith('SCAN'):
+                        self.assertEqual(step, 'SCAN shard_health', statement)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+Unit tests for the in-memory pick rankings.
+"""
+import random
+import unittest
+from rankings import ALL_GUILDS, GameRanking, Rankings
+
+class TestGameRanking(unittest.TestCase):
+    def test_order_matches_counts(self):
+        """Test that the ranking stays sorted under random updates."""
+        ranking = GameRanking()
+        counts = {}
+        rng = random.Random(1234)
+        for _ in range(2000):
+            character = f"char{rng.randrange(40)}"
+            picks = rng.choice((1, 1, 1, 3))
+            ranking.add(character, picks)
+            counts[character] = counts.get(character, 0) + picks
+        entries = list(ranking)
+        self.assertEqual(entries, sorted(counts.items(), key=lambda entry: (-entry[1], entry[0])))
+        self.assertEqual(len(ranking), len(counts))
+
+    def test_top(self):
+        """Test top-K reads."""
+        ranking = GameRanking()
+        for character, picks in (('a', 1), ('b', 5), ('d', 3), ('c', 3)):
+            ranking.add(character, picks)
+        self.assertEqual(ranking.top(3), [('b', 5), ('c', 3), ('d', 3)])
+        self.assertEqual(ranking.top(0), [])
+        self.assertEqual(ranking.picks('c'), 3)
+        self.assertEqual(ranking.picks('z'), 0)
+
+    def test_after(self):
+        """Test reads resume after a (picks, character) cursor."""
+        ranking = GameRanking()
+        for character, picks in (('a', 1), ('b', 5), ('c', 3), ('d', 3)):
+            ranking.add(character, picks)
+        self.assertEqual(list(ranking.after((3, 'c'))), [('d', 3), ('a', 1)])
+        # The cursor's character has been picked again since
+        ranking.add('c')
+        self.assertEqual(list(ranking.after((3, 'c'))), [('d', 3), ('a', 1)])
+        self.assertEqual(list(ranking.after((2, 'z'))), [('a', 1)])
+
+    def test_empty_buckets_are_unlinked(self):
+        """Test that moving the only character out of a bucket removes it."""
+        ranking = GameRanking()
+        ranking.add('a')
+        ranking.add('a')
+        ranking.add('b')
+        self.assertEqual(list(ranking), [('a', 2), ('b', 1)])
+        self.assertIs(ranking._bottom.higher.higher.higher, ranking._top)
+
+class TestRankings(unittest.TestCase):
+    def test_guilds(self):
+        """Test picks count in their guild and across all guilds."""
+        rankings = Rankings()
+        rankings.seed(ALL_GUILDS, [('lol', 'Ahri', 2), ('apex', 'Wraith', 1)])
+        rankings.record(5, 'apex', 'Octane')
+        rankings.record(5, 'apex', 'Octane')
+        rankings.record(6, 'apex', 'Wraith')
+        self.assertEqual(rankings.top('apex', 5), [('Octane', 2), ('Wraith', 2)])
+        self.assertEqual(rankings.top('apex', 5, guild_id=5), [('Octane', 2)])
+        self.assertEqual(rankings.top('valorant', 5), [])
+
+    def test_pages(self):
+        """Test pages have the Database.get_character_stats_page shape and cursors."""
+        rankings = Rankings()
+        rankings.seed(ALL_GUILDS, [('lol', 'Ahri', 2), ('apex', 'Wraith', 1), ('apex', 'Octane', 2)])
+        rows = [('apex', 'Octane', 2), ('apex', 'Wraith', 1), ('lol', 'Ahri', 2)]
+        self.assertEqual(rankings.page(), rows)
+        self.assertEqual(rankings.page(limit=2), rows[:2])
+        self.assertEqual(rankings.page(after=('apex', 1, 'Wraith')), rows[2:])
+        self.assertEqual(rankings.page('apex', after=('apex', 2, 'Octane')), rows[1:2])
+        self.assertEqual(rankings.page('valorant'), [])
+        self.assertEqual(rankings.page(guild_id=5), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Unit tests for the token-bucket rate limiter.
+"""
+import os
+import sqlite3
+import unittest
+from tests.helpers import FakeClock
+from utils.rate_limit import MemoryBackend, RateLimiter, SQLiteBackend, create_backend
+
+LIMITS = {
+    'default': {'user': {'burst': 1, 'rate': 1 / 5}},
+    'who': {
+        'user': {'burst': 3, 'rate': 1},
+        'guild': {'burst': 4, 'rate': 1},
+    },
+}
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        """Set up a limiter driven by a fake clock."""
+        self.clock = FakeClock()
+        self.limiter = RateLimiter(LIMITS, MemoryBackend(clock=self.clock))
+
+    def test_burst_then_refill(self):
+        """Test that a user can burst and then waits for refills."""
+        for _ in range(3):
+            self.assertEqual(self.limiter.acquire('who', 1, 10), 0)
+        self.assertAlmostEqual(self.limiter.acquire('who', 1, 10), 1)
+        self.clock.now += 1
+        self.assertEqual(self.limiter.acquire('who', 1, 10), 0)
+        self.assertGreater(self.limiter.acquire('who', 1, 10), 0)
+
+    def test_guild_scope(self):
+        """Test that the guild bucket is shared between users."""
+        for user_id in range(4):
+            self.assertEqual(self.limiter.acquire('who', user_id, 10), 0)
+        self.assertGreater(self.limiter.acquire('who', 99, 10), 0)
+        # A different guild and DMs are unaffected
+        self.assertEqual(self.limiter.acquire('who', 99, 11), 0)
+        self.assertEqual(self.limiter.acquire('who', 98, None), 0)
+
+    def test_rejected_use_costs_nothing(self):
+        """Test that a use rejected by one scope takes no tokens."""
+        for user_id in range(4):
+            self.limiter.acquire('who', user_id, 10)
+        self.limiter.acquire('who', 99, 10)
+        self.assertEqual(self.limiter.acquire('who', 99, 11), 0)
+        self.assertEqual(self.limiter.acquire('who', 99, 11), 0)
+        self.assertEqual(self.limiter.acquire('who', 99, 11), 0)
+
+    def test_default_limits(self):
+        """Test that commands without limits use the default entry."""
+        self.assertEqual(self.limiter.acquire('help', 1), 0)
+        self.assertAlmostEqual(self.limiter.acquire('help', 1), 5)
+        # Commands have separate buckets
+        self.assertEqual(self.limiter.acquire('stats', 1), 0)
+
+    def test_full_buckets_expire(self):
+        """Test that refilled buckets are evicted from memory."""
+        self.limiter.acquire('who', 1, 10)
+        self.assertEqual(self.limiter.stats().size, 2)
+        self.clock.now += 10
+        self.assertEqual(self.limiter.stats().size, 0)
+
+class TestSQLiteBackend(unittest.TestCase):
+    def setUp(self):
+        """Set up two limiters sharing one SQLite file, as two shards would."""
+        self.test_db_path = 'test_ratelimits.db'
+        self.clock = FakeClock()
+        self.first = RateLimiter(LIMITS, SQLiteBackend(self.test_db_path, clock=self.clock))
+        self.second = RateLimiter(LIMITS, SQLiteBackend(self.test_db_path, clock=self.clock))
+
+    def tearDown(self):
+        """Clean up test database."""
+        self.first.close()
+        self.second.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.test_db_path + suffix):
+                os.remove(self.test_db_path + suffix)
+
+    def test_buckets_are_shared(self):
+        """Test that limits hold across limiters using the same file."""
+        self.assertEqual(self.first.acquire('who', 1, 10), 0)
+        self.assertEqual(self.second.acquire('who', 1, 10), 0)
+        self.assertEqual(self.first.acquire('who', 1, 10), 0)
+        self.assertAlmostEqual(self.second.acquire('who', 1, 10), 1)
+        self.clock.now += 1
+        self.assertEqual(self.second.acquire('who', 1, 10), 0)
+
+    def test_rejected_use_costs_nothing(self):
+        """Test that a use rejected by one scope takes no tokens."""
+        for user_id in range(4):
+            self.first.acquire('who', user_id, 10)
+        self.assertGreater(self.second.acquire('who', 99, 10), 0)
+        for _ in range(3):
+            self.assertEqual(self.second.acquire('who', 99, 11), 0)
+
+    def test_refilled_buckets_are_purged(self):
+        """Test that full buckets are deleted."""
+        self.first.acquire('who', 1, 10)
+        self.assertEqual(self.first.stats().size, 2)
+        self.clock.now += 10
+        stats = self.second.stats()
+        self.assertEqual((stats.size, stats.expired), (0, 2))
+
+    def test_locked_database_lets_commands_through(self):
+        """Test that a lock held by another process does not stall or fail a check."""
+        holder = sqlite3.connect(self.test_db_path, isolation_level=None)
+        self.addCleanup(holder.close)
+        holder.execute("BEGIN IMMEDIATE")
+        for _ in range(3):
+            self.assertEqual(self.first.acquire('who', 1, 10), 0)
+        self.assertEqual(self.first.backend.allowed_while_locked, 3)
+        holder.execute("COMMIT")
+        # The allowed uses took no tokens, so the user has their full burst
+        retries = [self.first.acquire('who', 1, 10) for _ in range(4)]
+        self.assertEqual(retries[:3], [0, 0, 0])
+        self.assertGreater(retries[3], 0)
+        self.assertEqual(self.first.backend.allowed_while_locked, 3)
+
+    def test_create_backend(self):
+        """Test creating backends from their config names."""
+        self.assertIsInstance(create_backend('memory'), MemoryBackend)
+        self.assertIsInstance(create_backend('auto', workers=1), MemoryBackend)
+        with self.assertRaises(ValueError):
+            create_backend('sqlite')
+        with self.assertRaises(ValueError):
+            create_backend('redis')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Unit tests for the roster index.
+"""
+import unittest
+from config import ROSTER_PATH
+from roster import build_roster_index, load_roster, read_roster_file, validate_roster
+
+DATA = read_roster_file(ROSTER_PATH)
+CHARACTERS = DATA['characters']
+ROSTER = load_roster(ROSTER_PATH)
+
+SAMPLE = {
+    'Game': {
+        'characters': ['Alpha', 'Beta', 'Gamma'],
+        'roles': ['Tank', 'Support'],
+        'role_mapping': {'Alpha': 'Tank', 'Beta': 'Support'}
+    }
+}
+
+class TestRoster(unittest.TestCase):
+    def test_config_is_valid(self):
+        """Test that the shipped config has no roster problems."""
+        self.assertEqual(validate_roster(CHARACTERS), [])
+
+    def test_validate_roster(self):
+        """Test that inconsistencies are reported."""
+        roster = {
+            'game': {
+                'characters': ['Alpha', 'alpha', 'Beta'],
+                'roles': ['Tank'],
+                'role_mapping': {'Alpha': 'Tank', 'alpha': 'Tank', 'Beta': 'Healer', 'Delta': 'Tank'}
+            }
+        }
+        problems = validate_roster(roster)
+        self.assertIn("game: duplicate character 'alpha'", problems)
+        self.assertIn("game: character 'Beta' has unknown role 'Healer'", problems)
+        self.assertIn("game: role_mapping entry 'Delta' is not a listed character", problems)
+        self.assertEqual(len(validate_roster(SAMPLE)), 1)
+
+    def test_case_insensitive_lookups(self):
+        """Test game, role and character lookups ignore case."""
+        index = build_roster_index(SAMPLE)
+        game = index.find_game(' GAME ')
+        self.assertEqual(game.name, 'Game')
+        self.assertEqual(game.find_role('support'), 'Support')
+        self.assertEqual(game.find_character('aLpHa'), 'Alpha')
+        self.assertIsNone(game.find_character('Delta'))
+        self.assertIsNone(index.find_game('other'))
+
+    def test_role_tuples(self):
+        """Test per-role tuples skip unmapped characters."""
+        game = build_roster_index(SAMPLE).find_game('game')
+        self.assertEqual(game.characters, ('Alpha', 'Beta', 'Gamma'))
+        self.assertEqual(game.by_role['Tank'], ('Alpha',))
+        self.assertEqual(game.by_role['Support'], ('Beta',))
+        with self.assertRaises(TypeError):
+            game.by_role['Tank'] = ()
+
+    def test_random_game(self):
+        """Test random games come from the configured roster."""
+        for _ in range(50):
+            self.assertIn(ROSTER.random_game().name, CHARACTERS)
+
+    def test_load_roster(self):
+        """Test the shipped roster compiles with every game indexed."""
+        self.assertEqual(ROSTER.problems, ())
+        for game, data in CHARACTERS.items():
+            self.assertEqual(ROSTER.find_game(game).characters, tuple(data['characters']))
+
+if __name__ == '__main__':
+    unittest.main()
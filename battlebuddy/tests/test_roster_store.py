@@ -0,0 +1,105 @@
+"""
+Unit tests for the hot-reloadable roster.
+"""
+import json
+import os
+import tempfile
+import unittest
+
+from roster import RosterError, read_roster_file
+from roster_store import RosterStore
+
+def roster_data(*characters):
+    return {
+        'characters': {
+            'game': {
+                'characters': list(characters),
+                'roles': ['Tank'],
+                'role_mapping': {name: 'Tank' for name in characters},
+            },
+        },
+        'game_settings': {'game': {'max_team_size': 2}},
+        'character_info': {'game': {characters[0]: {'difficulty': 'Easy'}}},
+    }
+
+class TestRosterStore(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'roster.json')
+        self.write(roster_data('Alpha'))
+        self.mtime = 1_000_000_000
+
+    def write(self, data):
+        with open(self.path, 'w', encoding='utf-8') as roster_file:
+            if isinstance(data, str):
+                roster_file.write(data)
+            else:
+                json.dump(data, roster_file)
+
+    def touch(self):
+        # Bump the mtime explicitly; writes within one tick can share an mtime
+        self.mtime += 1_000_000_000
+        os.utime(self.path, ns=(self.mtime, self.mtime))
+
+    def test_initial_load(self):
+        """Test that the store compiles the roster and derived indexes."""
+        snapshot = RosterStore(self.path).current
+        game = snapshot.roster.find_game('GAME')
+        self.assertEqual(game.characters, ('Alpha',))
+        self.assertEqual(game.settings['max_team_size'], 2)
+        self.assertEqual(game.info['Alpha']['difficulty'], 'Easy')
+        self.assertEqual(snapshot.autocomplete.search_characters('game', 'al'), ['Alpha'])
+        self.assertIn('Available games: game', snapshot.templates.game_not_found('x'))
+
+    async def test_reload_on_change(self):
+        """Test that a changed file is swapped in."""
+        store = RosterStore(self.path)
+        old = store.current
+
+        self.assertFalse(await store.refresh())
+        self.write(roster_data('Alpha', 'Beta'))
+        self.touch()
+        self.assertTrue(await store.refresh())
+        self.assertEqual(store.current.roster.games['game'].characters, ('Alpha', 'Beta'))
+        # Holders of the old snapshot are unaffected
+        self.assertEqual(old.roster.games['game'].characters, ('Alpha',))
+        self.assertFalse(await store.refresh())
+
+    async def test_invalid_file_keeps_roster(self):
+        """Test that a broken file is reported once and the old roster kept."""
+        store = RosterStore(self.path)
+        old = store.current
+        self.write('{"characters": ')
+        self.touch()
+        with self.assertLogs('roster_store', 'ERROR'):
+            self.assertFalse(await store.refresh())
+        self.assertIs(store.current, old)
+        # Not retried until the file changes again
+        self.assertFalse(await store.refresh())
+
+        self.write(roster_data('Gamma'))
+        self.touch()
+        self.assertTrue(await store.refresh())
+        self.assertEqual(store.current.roster.games['game'].characters, ('Gamma',))
+
+    def test_structure_errors(self):
+        """Test that malformed rosters are rejected."""
+        bad = [
+            [],
+            {'characters': {}},
+            {'characters': {'game': {'characters': 'Alpha', 'roles': [], 'role_mapping': {}}}},
+            {'characters': {'game': {'characters': ['Alpha'], 'roles': []}}},
+            dict(roster_data('Alpha'), game_settings={'game': {'max_team_size': 0}}),
+            dict(roster_data('Alpha'), game_settings={'game': {'role_quotas': {'Tank': -1}}}),
+        ]
+        for data in bad:
+            with self.subTest(data=data):
+                self.write(data)
+                with self.assertRaises(RosterError):
+                    read_roster_file(self.path)
+        with self.assertRaises(RosterError):
+            read_roster_file(self.path + '.missing')
+
+if __name__ == '__main__':
+    unittest.main()
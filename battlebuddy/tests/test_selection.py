@@ -0,0 +1,200 @@
+"""
+Unit tests for weighted character selection.
+"""
+import random
+import unittest
+from collections import Counter
+from roster import build_roster_index
+from selection import (AVOID_RECENT, FAVORITES, FRESH, UNIFORM, AliasTable,
+                       SelectionEngine)
+from tests.helpers import FakeClock
+
+ROSTER = build_roster_index({
+    'game': {
+        'characters': ['a', 'b', 'c', 'd', 'e', 'f'],
+        'roles': ['Tank', 'Damage'],
+        'role_mapping': {'a': 'Tank', 'b': 'Tank', 'c': 'Damage', 'd': 'Damage',
+                         'e': 'Damage', 'f': 'Damage'},
+    },
+})
+GAME = ROSTER.games['game']
+
+# Chi-square critical values at p = 0.001, indexed by degrees of freedom
+CHI_SQUARE_CRITICAL = {1: 10.828, 2: 13.816, 3: 16.266, 4: 18.467, 5: 20.515}
+
+class DistributionTestCase(unittest.TestCase):
+    def assertDistribution(self, counts, items, weights, draws):
+        """Chi-square goodness-of-fit test of observed draw counts."""
+        total = sum(weights)
+        statistic = 0.0
+        degrees = -1
+        for item, weight in zip(items, weights):
+            if weight == 0:
+                self.assertEqual(counts[item], 0, f"{item} has zero weight but was drawn")
+                continue
+            expected = draws * weight / total
+            statistic += (counts[item] - expected) ** 2 / expected
+            degrees += 1
+        self.assertLess(statistic, CHI_SQUARE_CRITICAL[degrees])
+
+class TestAliasTable(DistributionTestCase):
+    def test_distribution(self):
+        """Test that draws follow the weights."""
+        items = ['a', 'b', 'c', 'd', 'e']
+        weights = [1, 2, 3, 4, 0]
+        table = AliasTable(items, weights)
+        rng = random.Random(42)
+        draws = 50_000
+        counts = Counter(table.sample(rng) for _ in range(draws))
+        self.assertDistribution(counts, items, weights, draws)
+
+    def test_skewed_distribution(self):
+        """Test a distribution dominated by one item."""
+        items = ['a', 'b', 'c']
+        weights = [0.01, 100, 0.5]
+        table = AliasTable(items, weights)
+        rng = random.Random(7)
+        draws = 200_000
+        counts = Counter(table.sample(rng) for _ in range(draws))
+        self.assertDistribution(counts, items, weights, draws)
+
+    def test_invalid_weights(self):
+        """Test that unusable weights are rejected."""
+        with self.assertRaises(ValueError):
+            AliasTable([], [])
+        with self.assertRaises(ValueError):
+            AliasTable(['a'], [1, 2])
+        with self.assertRaises(ValueError):
+            AliasTable(['a', 'b'], [0, 0])
+        with self.assertRaises(ValueError):
+            AliasTable(['a', 'b'], [1, -1])
+
+class TestSelectionEngine(DistributionTestCase):
+    def setUp(self):
+        self.clock = FakeClock(1_000_000.0)
+        self.engine = SelectionEngine(favorite_boost=3.0, fresh_boost=4.0,
+                                      fresh_horizon=100, avoid_last=2, rebuild_interval=60,
+                                      clock=self.clock, rng=random.Random(1))
+
+    def test_uniform_respects_role(self):
+        """Test that role filters apply."""
+        picks = {self.engine.pick(GAME, 'Tank', UNIFORM) for _ in range(100)}
+        self.assertEqual(picks, {'a', 'b'})
+
+    def test_favorites_are_boosted(self):
+        """Test that favorites are drawn in proportion to the boost."""
+        draws = 30_000
+        counts = Counter(self.engine.pick(GAME, 'Damage', FAVORITES, user_id=1,
+                                          favorites=['c', 'a'])
+                         for _ in range(draws))
+        # 'a' is a favorite but not a Damage character
+        self.assertEqual(set(counts), {'c', 'd', 'e', 'f'})
+        self.assertDistribution(counts, ['c', 'd', 'e', 'f'], [3, 1, 1, 1], draws)
+        self.assertEqual(self.engine.rebuilds, 1)
+
+        # Changing favorites rebuilds the table
+        self.engine.pick(GAME, 'Damage', FAVORITES, user_id=1, favorites=['d'])
+        self.assertEqual(self.engine.rebuilds, 2)
+
+    def test_fresh_prefers_unpicked(self):
+        """Test that recently picked characters are less likely."""
+        self.engine.record_pick('game', 'a')
+        draws = 30_000
+        counts = Counter(self.engine.pick(GAME, 'Tank', FRESH) for _ in range(draws))
+        self.assertDistribution(counts, ['a', 'b'], [1, 5], draws)
+
+    def test_fresh_tables_rebuild_lazily(self):
+        """Test that fresh tables are rebuilt at most once per interval."""
+        self.engine.pick(GAME, None, FRESH)
+        self.assertEqual(self.engine.rebuilds, 1)
+        for _ in range(10):
+            self.engine.record_pick('game', 'c')
+            self.engine.pick(GAME, None, FRESH)
+        self.assertEqual(self.engine.rebuilds, 1)
+
+        self.clock.now += 60
+        self.engine.pick(GAME, None, FRESH)
+        self.assertEqual(self.engine.rebuilds, 2)
+        # Nothing changed since, so no rebuild even after the interval
+        self.clock.now += 60
+        self.engine.pick(GAME, None, FRESH)
+        self.assertEqual(self.engine.rebuilds, 2)
+
+    def test_avoid_recent(self):
+        """Test that a user's last picks are excluded."""
+        self.engine.record_pick('game', 'c', user_id=1)
+        self.engine.record_pick('game', 'd', user_id=1)
+        self.engine.record_pick('game', 'e', user_id=2)
+        picks = {self.engine.pick(GAME, 'Damage', AVOID_RECENT, user_id=1) for _ in range(200)}
+        self.assertEqual(picks, {'e', 'f'})
+
+        # Only the last avoid_last picks count
+        self.engine.record_pick('game', 'f', user_id=1)
+        picks = {self.engine.pick(GAME, 'Damage', AVOID_RECENT, user_id=1) for _ in range(200)}
+        self.assertEqual(picks, {'c', 'e'})
+
+        # Excluding every candidate falls back to all of them
+        self.engine.record_pick('game', 'a', user_id=3)
+        self.engine.record_pick('game', 'b', user_id=3)
+        picks = {self.engine.pick(GAME, 'Tank', AVOID_RECENT, user_id=3) for _ in range(100)}
+        self.assertEqual(picks, {'a', 'b'})
+
+    def test_unknown_mode(self):
+        """Test that unknown modes are rejected."""
+        with self.assertRaises(ValueError):
+            self.engine.pick(GAME, None, 'weird')
+
+    def test_draft_team(self):
+        """Test that drafted teams meet quotas and have no duplicates."""
+        for _ in range(50):
+            team = self.engine.draft_team(GAME, 4, {'Tank': 1, 'Damage': 3})
+            characters = [character for character, _ in team]
+            self.assertEqual(len(set(characters)), 4)
+            roles = Counter(role for _, role in team)
+            self.assertEqual(roles, Counter({'Tank': 1, 'Damage': 3}))
+            for character, role in team:
+                self.assertEqual(ROSTER.games['game'].role_of[character], role)
+
+    def test_draft_team_balances_roles(self):
+        """Test that slots beyond the quotas spread over the roles."""
+        for _ in range(50):
+            roles = Counter(role for _, role in self.engine.draft_team(GAME, 4))
+            self.assertEqual(roles, Counter({'Tank': 2, 'Damage': 2}))
+        # Roles that run out of characters stop receiving slots
+        roles = Counter(role for _, role in self.engine.draft_team(GAME, 6))
+        self.assertEqual(roles, Counter({'Tank': 2, 'Damage': 4}))
+        # A team smaller than the quotas fills the largest shortfall first
+        roles = Counter(role for _, role in self.engine.draft_team(GAME, 1, {'Tank': 1, 'Damage': 2}))
+        self.assertEqual(roles, Counter({'Damage': 1}))
+
+    def test_draft_team_invalid_size(self):
+        """Test that impossible team sizes are rejected."""
+        with self.assertRaises(ValueError):
+            self.engine.draft_team(GAME, 0)
+        with self.assertRaises(ValueError):
+            self.engine.draft_team(GAME, 7)
+
+    def test_tables_follow_the_roster_snapshot(self):
+        """Test that a reloaded roster gets new tables and the old one keeps working."""
+        reloaded = build_roster_index({
+            'game': {
+                'characters': ['x', 'y'],
+                'roles': ['Tank'],
+                'role_mapping': {'x': 'Tank', 'y': 'Tank'},
+            },
+        }).games['game']
+        for mode in (FAVORITES, FRESH):
+            self.assertIn(self.engine.pick(GAME, None, mode, user_id=1, favorites=['a']), 'abcdef')
+            self.assertIn(self.engine.pick(reloaded, None, mode, user_id=1, favorites=['x']), 'xy')
+            # A command that started before the reload still draws from its snapshot
+            self.assertIn(self.engine.pick(GAME, 'Damage', mode, user_id=1, favorites=['c']), 'cdef')
+
+    def test_table_cache_is_bounded(self):
+        """Test that per-user tables are evicted."""
+        self.engine.max_tables = 3
+        for user_id in range(10):
+            self.engine.pick(GAME, None, FAVORITES, user_id=user_id, favorites=['a'])
+        self.assertEqual(len(self.engine._tables), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+Unit tests for the sharding helpers.
+"""
+import unittest
+from types import SimpleNamespace
+
+from sharding import (
+    SHARD_COUNT_ENV, SHARD_IDS_ENV, WORKER_ID_ENV, ShardStatus, collect_shard_health,
+    format_health, shard_options_from_env, shard_ranges, worker_count_from_env, worker_env
+)
+
+class FakeShard:
+    def __init__(self, latency, closed=False, ratelimited=False):
+        self.latency = latency
+        self.closed = closed
+        self.ratelimited = ratelimited
+
+    def is_closed(self):
+        return self.closed
+
+    def is_ws_ratelimited(self):
+        return self.ratelimited
+
+class TestSharding(unittest.TestCase):
+    def test_shard_ranges(self):
+        """Test shards are split into contiguous, near-equal ranges"""
+        self.assertEqual(shard_ranges(5, 2), [[0, 1, 2], [3, 4]])
+        self.assertEqual(shard_ranges(4, 4), [[0], [1], [2], [3]])
+        self.assertEqual(sum(shard_ranges(100, 7), []), list(range(100)))
+        with self.assertRaises(ValueError):
+            shard_ranges(2, 3)
+
+    def test_worker_env_round_trip(self):
+        """Test the launcher environment gives back the worker's shard options"""
+        env = worker_env(1, 6, [3, 4, 5], 2, base={'DISCORD_TOKEN': 'x'})
+        self.assertEqual(env['DISCORD_TOKEN'], 'x')
+        self.assertEqual(env[WORKER_ID_ENV], '1')
+        self.assertEqual(shard_options_from_env(env), {'shard_count': 6, 'shard_ids': [3, 4, 5]})
+        self.assertEqual(worker_count_from_env(env), 2)
+        self.assertEqual(worker_count_from_env({}), 1)
+
+    def test_shard_options_from_env(self):
+        """Test shard options are empty outside the launcher and validated inside it"""
+        self.assertEqual(shard_options_from_env({}), {})
+        for shard_ids in ('', '0,6'):
+            with self.subTest(shard_ids=shard_ids):
+                with self.assertRaises(ValueError):
+                    shard_options_from_env({SHARD_COUNT_ENV: '6', SHARD_IDS_ENV: shard_ids})
+
+    def test_collect_shard_health(self):
+        """Test each shard's status, latency and guild count are reported"""
+        bot = SimpleNamespace(
+            guilds=[SimpleNamespace(shard_id=0), SimpleNamespace(shard_id=2), SimpleNamespace(shard_id=2)],
+            shards={
+                2: FakeShard(0.0421),
+                0: FakeShard(float('inf')),
+                1: FakeShard(0.05, closed=True),
+                3: FakeShard(0.03, ratelimited=True),
+            },
+        )
+        states = {0: 'connecting', 1: 'ready', 2: 'ready', 3: 'ready'}
+        self.assertEqual(collect_shard_health(bot, states), [
+            ShardStatus(0, 'connecting', None, 1),
+            ShardStatus(1, 'disconnected', 50.0, 0),
+            ShardStatus(2, 'ready', 42.1, 2),
+            ShardStatus(3, 'ratelimited', 30.0, 0),
+        ])
+
+    def test_collect_unsharded_health(self):
+        """Test an unsharded bot is reported as a single shard"""
+        bot = SimpleNamespace(
+            guilds=[SimpleNamespace(shard_id=None)], shards=None, shard_id=None, latency=0.01,
+            is_closed=lambda: False, is_ready=lambda: True,
+        )
+        self.assertEqual(collect_shard_health(bot, {}), [ShardStatus(0, 'ready', 10.0, 0)])
+
+    def test_format_health_marks_stale_shards(self):
+        """Test shards that stopped reporting are shown as stale"""
+        rows = [(0, 0, 100, 'ready', 42.0, 3, 990), (1, 1, 200, 'ready', None, 0, 700)]
+        lines = format_health(rows, now=1000, stale_after=120).splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn('ready', lines[1])
+        self.assertIn('42ms', lines[1])
+        self.assertIn('stale', lines[2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Unit tests for the prebuilt responses.
+"""
+import unittest
+from roster import build_roster_index
+from templates import EmbedTemplate, build_templates
+
+import discord
+
+ROSTER = build_roster_index({
+    'apex': {
+        'characters': ['Wraith', 'Lifeline'],
+        'roles': ['Skirmisher', 'Support'],
+        'role_mapping': {'Wraith': 'Skirmisher', 'Lifeline': 'Support'},
+    },
+    'overwatch': {
+        'characters': ['Mercy'],
+        'roles': ['Tank', 'Support'],
+        'role_mapping': {'Mercy': 'Support'},
+    },
+})
+
+class TestEmbedTemplate(unittest.TestCase):
+    def test_render_is_independent(self):
+        """Test that rendered embeds do not share state with the template."""
+        embed = discord.Embed(title="Title", description="Text")
+        embed.add_field(name="a", value="1")
+        template = EmbedTemplate(embed)
+        embed.add_field(name="b", value="2")
+
+        first = template.render("first")
+        first.add_field(name="c", value="3")
+        first.set_field_at(0, name="changed", value="1")
+        second = template.render()
+        self.assertEqual(first.footer.text, "first")
+        self.assertIsNone(second.footer.text)
+        self.assertEqual([field.name for field in first.fields], ["changed", "c"])
+        self.assertEqual([field.name for field in second.fields], ["a"])
+        self.assertEqual(second.title, "Title")
+
+class TestResponseTemplates(unittest.TestCase):
+    def setUp(self):
+        self.templates = build_templates(ROSTER)
+
+    def test_help_embed(self):
+        """Test that the help embed lists every game and gets a per-user footer."""
+        embed = self.templates.help_embed("alice")
+        self.assertEqual(embed.title, "BattleBuddy Help")
+        self.assertEqual(embed.footer.text, "Requested by alice")
+        games = embed.fields[1].value
+        self.assertIn("**Apex**\nRoles: Skirmisher, Support\nCharacters: 2", games)
+        self.assertIn("**Overwatch**\nRoles: Tank, Support\nCharacters: 1", games)
+        self.assertEqual(self.templates.help_embed("bob").footer.text, "Requested by bob")
+
+    def test_messages(self):
+        """Test the not-found messages."""
+        self.assertEqual(self.templates.game_not_found("fortnite"),
+                         "Game 'fortnite' not found. Available games: apex, overwatch")
+        self.assertEqual(self.templates.role_not_found("Healer", "overwatch"),
+                         "Role 'Healer' not found for overwatch. Available roles: Tank, Support")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+Unit tests for the paginated stats view.
+"""
+import os
+import unittest
+from async_database import AsyncDatabase
+from database import Database
+from views import StatsPages
+
+class TestStatsPages(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        """Set up a test database with more characters than fit on a page."""
+        self.test_db_path = 'test_views_battlebuddy.db'
+        self.db = AsyncDatabase(Database(self.test_db_path))
+        for index in range(5):
+            for _ in range(index + 1):
+                self.db.database.record_character_pick('apex', f'char{index}')
+        self.db.database.record_character_pick('lol', 'Ahri')
+        self.pages = StatsPages(self.db, page_size=4)
+
+    def tearDown(self):
+        """Clean up test database."""
+        self.db.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.test_db_path + suffix):
+                os.remove(self.test_db_path + suffix)
+
+    async def test_pages(self):
+        """Test that pages follow each other and group rows by game."""
+        first = await self.pages.get(None, None)
+        self.assertEqual([field.name for field in first.embed.fields], ['Apex'])
+        self.assertTrue(first.embed.fields[0].value.startswith('**char4** - Picks: 5'))
+        self.assertEqual(first.next_cursor, ('apex', 2, 'char1'))
+
+        second = await self.pages.get(None, first.next_cursor)
+        self.assertEqual([field.name for field in second.embed.fields], ['Apex', 'Lol'])
+        self.assertIsNone(second.next_cursor)
+
+    async def test_pages_are_cached(self):
+        """Test that a rendered page is reused until it expires."""
+        first = await self.pages.get('apex', None)
+        self.db.database.record_character_pick('apex', 'char0')
+        self.assertIs(await self.pages.get('apex', None), first)
+        self.pages.cache.clear()
+        self.assertIsNot(await self.pages.get('apex', None), first)
+
+    async def test_pages_per_guild(self):
+        """Test that a guild's pages only count the picks made in it."""
+        self.db.database.record_character_pick('lol', 'Ahri', guild_id=7)
+        page = await self.pages.get(None, None, guild_id=7)
+        self.assertEqual(page.embed.description, "Character pick statistics in this server:")
+        self.assertEqual([(field.name, field.value) for field in page.embed.fields],
+                         [('Lol', '**Ahri** - Picks: 1')])
+        everywhere = await self.pages.get('lol', None)
+        self.assertEqual(everywhere.embed.fields[0].value, '**Ahri** - Picks: 2')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Small in-process caches.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries also expire after a fixed time.
+
+    Used for data that is expensive to build but fine to serve slightly
+    stale, such as rendered ``/stats`` pages.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """Create an empty cache.
+
+        Args:
+            maxsize (int): Maximum number of entries; the least recently
+                used entry is dropped when the cache is full
+            ttl (float): Seconds an entry stays valid after it is set
+            clock (Callable[[], float]): Monotonic time source in seconds
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._data: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a cached value, or ``default`` if missing or expired."""
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING or entry[0] <= self.clock():
+            if entry is not _MISSING:
+                del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Cache a value.
+
+        Args:
+            key (Hashable): Cache key
+            value (Any): Value to cache
+            ttl (Optional[float]): Override the cache's default lifetime
+        """
+        self._data[key] = (self.clock() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        """Remove a key if it is cached."""
+        self._data.pop(key, None)
+
+    def clear(self):
+        """Remove every entry."""
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[0] > self.clock()
+
+    def __len__(self) -> int:
+        return len(self._data)
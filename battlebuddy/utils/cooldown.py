@@ -1,33 +1,146 @@
 """
 Cooldown utility functions for command rate limiting.
+
+Cooldowns live in a ``CooldownStore`` that uses monotonic time and a
+hashed timing wheel, so expired entries are evicted automatically and
+memory stays proportional to the users currently on cooldown rather than
+every user who ever ran a command.
 """
 
-from datetime import datetime, timedelta
-from typing import Dict
-
-# Global dictionary to track user command cooldowns
-# Format: {user_id: datetime when cooldown expires}
-cooldowns: Dict[int, datetime] = {}
-
-def check_cooldown(user_id: int) -> bool:
-    """Check if a user is on cooldown for commands.
-    
-    Args:
-        user_id (int): Discord user ID to check
-        
-    Returns:
-        bool: True if user can use commands, False if on cooldown
-    """
-    if user_id in cooldowns:
-        if datetime.now() < cooldowns[user_id]:
-            return False
-    return True
-
-def set_cooldown(user_id: int, cooldown_seconds: int):
-    """Set cooldown for a user after command use.
-    
-    Args:
-        user_id (int): Discord user ID to set cooldown for
-        cooldown_seconds (int): Number of seconds for the cooldown
+import time
+from typing import Callable, Dict, Hashable, List, NamedTuple, Optional
+
+class CooldownEntry:
+    """A single cooldown, stored in both the entry map and a wheel slot."""
+    __slots__ = ('key', 'expires_at')
+
+    def __init__(self, key: Hashable, expires_at: float):
+        self.key = key
+        self.expires_at = expires_at
+
+class CooldownStats(NamedTuple):
+    """Snapshot of a ``CooldownStore``'s size and eviction counters."""
+    size: int
+    wheel_entries: int
+    expired: int
+    evicted: int
+
+class CooldownStore:
+    """Bounded cooldown tracker with automatic expiry.
+
+    Entries are kept in a dict for O(1) lookups and also filed into a
+    timing wheel slot by expiry time. Each check advances the wheel past
+    the slots whose time has come and drops the entries in them that have
+    expired, so evicting is amortised O(1) per entry. If the store still
+    reaches ``max_entries``, the oldest cooldown is evicted early.
     """
-    cooldowns[user_id] = datetime.now() + timedelta(seconds=cooldown_seconds) 
\ No newline at end of file
+
+    def __init__(self, resolution: float = 1.0, wheel_size: int = 64,
+                 max_entries: int = 100_000, clock: Callable[[], float] = time.monotonic):
+        """Create an empty store.
+
+        Args:
+            resolution (float): Seconds covered by each wheel slot
+            wheel_size (int): Number of wheel slots; cooldowns longer than
+                ``resolution * wheel_size`` stay in their slot for extra turns
+            max_entries (int): Maximum number of cooldowns kept at once
+            clock (Callable[[], float]): Monotonic time source in seconds
+        """
+        self.resolution = resolution
+        self.wheel_size = wheel_size
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: Dict[Hashable, CooldownEntry] = {}
+        self._wheel: List[List[CooldownEntry]] = [[] for _ in range(wheel_size)]
+        self._tick = int(clock() / resolution)
+        self._expired = 0
+        self._evicted = 0
+
+    def _advance(self, now: float):
+        """Evict expired entries from every slot the wheel has passed."""
+        tick = int(now / self.resolution)
+        if tick <= self._tick:
+            return
+        for step in range(1, min(tick - self._tick, self.wheel_size) + 1):
+            slot = (self._tick + step) % self.wheel_size
+            bucket = self._wheel[slot]
+            if not bucket:
+                continue
+            keep = []
+            for entry in bucket:
+                if self._entries.get(entry.key) is not entry:
+                    continue  # Superseded by a newer cooldown or evicted
+                if entry.expires_at <= now:
+                    del self._entries[entry.key]
+                    self._expired += 1
+                else:
+                    keep.append(entry)
+            self._wheel[slot] = keep
+        self._tick = tick
+
+    def remaining(self, key: Hashable) -> float:
+        """Return the seconds left on a cooldown, or 0 if there is none.
+
+        Args:
+            key (Hashable): Cooldown key, e.g. a Discord user ID
+        """
+        now = self.clock()
+        self._advance(now)
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= now:
+            return 0.0
+        return entry.expires_at - now
+
+    def set(self, key: Hashable, seconds: float):
+        """Start (or restart) a cooldown.
+
+        Args:
+            key (Hashable): Cooldown key, e.g. a Discord user ID
+            seconds (float): Length of the cooldown
+        """
+        now = self.clock()
+        self._advance(now)
+        if self._entries.pop(key, None) is None and len(self._entries) >= self.max_entries:
+            # Dicts keep insertion order, so the first key is the oldest cooldown
+            del self._entries[next(iter(self._entries))]
+            self._evicted += 1
+        entry = CooldownEntry(key, now + seconds)
+        self._entries[key] = entry
+        # File under the first tick that starts after expiry
+        self._wheel[(int(entry.expires_at / self.resolution) + 1) % self.wheel_size].append(entry)
+
+    def check_and_set(self, key: Hashable, seconds: float) -> float:
+        """Start a cooldown unless one is already running.
+
+        Args:
+            key (Hashable): Cooldown key, e.g. a Discord user ID
+            seconds (float): Length of the cooldown to start
+
+        Returns:
+            float: 0 if the cooldown was started, otherwise the seconds left
+        """
+        remaining = self.remaining(key)
+        if not remaining:
+            self.set(key, seconds)
+        return remaining
+
+    def clear(self, key: Optional[Hashable] = None):
+        """Remove one cooldown, or all of them when no key is given."""
+        if key is None:
+            self._entries.clear()
+            self._wheel = [[] for _ in range(self.wheel_size)]
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self) -> CooldownStats:
+        """Return the store's current size and eviction counters."""
+        self._advance(self.clock())
+        return CooldownStats(
+            size=len(self._entries),
+            wheel_entries=sum(len(bucket) for bucket in self._wheel),
+            expired=self._expired,
+            evicted=self._evicted,
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,120 @@
+"""
+Non-blocking logging for BattleBuddy bot.
+
+Log calls only put the record on an in-memory queue. A ``QueueListener``
+thread formats each record and writes it to the console and to a
+size-rotated log file, so file and terminal I/O never run on the event loop.
+
+Formatting tracebacks is left to the listener thread as well; only the
+message itself is merged on the calling thread, so later changes to
+mutable arguments cannot alter a queued record.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from datetime import datetime, timezone
+from typing import List, Optional
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed with ``extra=``
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+class JsonFormatter(logging.Formatter):
+    """Format each record as a single-line JSON object.
+
+    Fields passed with ``extra=`` are included as top-level keys.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue records without formatting them.
+
+    ``QueueHandler.prepare`` formats the whole record, traceback included,
+    so it can be pickled. The listener runs in this process, so only the
+    message is merged here and everything else is left to the listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+def setup_logging(path: Optional[str] = None, level: int = logging.INFO, json_format: bool = False,
+                  max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                  console: bool = True) -> logging.handlers.QueueListener:
+    """Route all logging through a queue to a background writer thread.
+
+    Replaces any handlers on the root logger. Calling this again replaces
+    the previous setup. Queued records are flushed at interpreter exit.
+
+    Args:
+        path (Optional[str]): Log file, rotated when it reaches ``max_bytes``.
+            None logs to the console only.
+        level (int): Minimum level of records that are logged
+        json_format (bool): Write one JSON object per line instead of text
+        max_bytes (int): Size at which the log file is rotated
+        backup_count (int): Number of rotated files kept
+        console (bool): Also write records to stderr
+
+    Returns:
+        logging.handlers.QueueListener: The running listener
+    """
+    global _listener
+    stop_logging()
+
+    formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+    handlers: List[logging.Handler] = []
+    if path:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handlers.append(logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'))
+    if console:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_DeferredQueueHandler(log_queue))
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+def stop_logging():
+    """Write out queued records and stop the listener thread."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+atexit.register(stop_logging)
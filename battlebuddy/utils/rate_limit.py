@@ -0,0 +1,281 @@
+"""
+Token-bucket rate limiting for command usage.
+
+Each command can have its own limits for two scopes:
+- user: how often a single user may run the command
+- guild: how often the command may run in a single server
+
+A scope's limit is a token bucket holding up to ``burst`` tokens that
+refills at ``rate`` tokens per second; every use takes one token. Buckets
+are stored in their equivalent "theoretical arrival time" form (GCRA): a
+single timestamp per bucket after which the bucket is full again, so full
+buckets can simply be forgotten.
+
+Bucket state lives in a pluggable backend:
+- MemoryBackend: a ``CooldownStore`` private to this process
+- SQLiteBackend: a small SQLite table that several bot processes (shards)
+  on the same host share, updated with an atomic check-and-set
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from utils.cooldown import CooldownStats, CooldownStore
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ('user', 'guild')
+
+# Tolerance for floating point error when comparing refill times
+EPSILON = 1e-9
+
+class RateLimit(NamedTuple):
+    """Token bucket settings for one command scope."""
+    burst: float
+    rate: float
+
+    @property
+    def interval(self) -> float:
+        """float: Seconds needed to refill one token."""
+        return 1.0 / self.rate
+
+class RateLimitBackend(ABC):
+    """Storage for token buckets.
+
+    Implementations must make ``acquire`` atomic: either a token is taken
+    from every bucket, or from none of them.
+    """
+
+    @abstractmethod
+    def acquire(self, buckets: Sequence[Tuple[str, RateLimit]]) -> float:
+        """Take one token from each bucket if all of them have one.
+
+        Args:
+            buckets (Sequence[Tuple[str, RateLimit]]): (bucket key, limit) pairs
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise seconds until they can be
+        """
+
+    @abstractmethod
+    def stats(self) -> CooldownStats:
+        """Return the number of stored buckets and eviction counters."""
+
+    def close(self):
+        """Release any resources held by the backend."""
+
+class MemoryBackend(RateLimitBackend):
+    """Buckets kept in process memory.
+
+    Each bucket is a ``CooldownStore`` entry that expires once the bucket
+    has refilled, so memory stays bounded.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, max_buckets: int = 100_000):
+        """Create an empty backend.
+
+        Args:
+            clock (Callable[[], float]): Monotonic time source in seconds
+            max_buckets (int): Maximum number of buckets kept in memory
+        """
+        self.buckets = CooldownStore(max_entries=max_buckets, clock=clock)
+
+    def acquire(self, buckets: Sequence[Tuple[str, RateLimit]]) -> float:
+        updates: List[Tuple[str, float]] = []
+        retry_after = 0.0
+        for key, limit in buckets:
+            # Seconds until the bucket would be full again after this use
+            refill_after = self.buckets.remaining(key) + limit.interval
+            excess = refill_after - limit.burst * limit.interval
+            if excess > EPSILON:
+                retry_after = max(retry_after, excess)
+            else:
+                updates.append((key, refill_after))
+        if retry_after:
+            return retry_after
+        for key, refill_after in updates:
+            self.buckets.set(key, refill_after)
+        return 0.0
+
+    def stats(self) -> CooldownStats:
+        return self.buckets.stats()
+
+class SQLiteBackend(RateLimitBackend):
+    """Buckets shared through a SQLite database.
+
+    Every process that opens the same file sees the same buckets. Each
+    ``acquire`` reads and updates its buckets inside one ``BEGIN IMMEDIATE``
+    transaction, which takes SQLite's write lock up front, so concurrent
+    processes cannot both spend the last token. The state is disposable,
+    so the file is opened with ``synchronous=OFF`` to keep checks fast;
+    put it on a tmpfs such as /dev/shm to avoid touching the disk at all.
+
+    Commands check their limits on the event loop, so waiting for another
+    process's lock stalls every command in this process. The wait is
+    capped at a few milliseconds, and if the lock is still held the use is
+    allowed (and counted in ``allowed_while_locked``): skipping one check is
+    cheaper than stalling the bot.
+    """
+
+    def __init__(self, db_path: str, clock: Callable[[], float] = time.time,
+                 purge_every: int = 1024, busy_timeout: int = 20):
+        """Open (and create if needed) the shared bucket table.
+
+        Args:
+            db_path (str): Path to the SQLite file shared by all processes
+            clock (Callable[[], float]): Time source shared by all processes
+            purge_every (int): Delete refilled buckets after this many acquires
+            busy_timeout (int): Milliseconds to wait for another process's lock
+        """
+        self.db_path = db_path
+        self.clock = clock
+        self.purge_every = purge_every
+        self._acquires = 0
+        self._expired = 0
+        self.allowed_while_locked = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self.conn.execute(f"PRAGMA busy_timeout = {busy_timeout}")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = OFF")
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                key TEXT PRIMARY KEY,
+                full_at REAL NOT NULL
+            ) WITHOUT ROWID
+        ''')
+
+    def acquire(self, buckets: Sequence[Tuple[str, RateLimit]]) -> float:
+        with self._lock:
+            now = self.clock()
+            updates: List[Tuple[str, float]] = []
+            retry_after = 0.0
+            try:
+                self.conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError as e:
+                # Another process held the write lock for the whole busy timeout
+                self.allowed_while_locked += 1
+                logger.warning("Rate limit database is busy, allowing the command: %s", e)
+                return 0.0
+            try:
+                for key, limit in buckets:
+                    row = self.conn.execute(
+                        "SELECT full_at FROM rate_limit_buckets WHERE key = ?", (key,)
+                    ).fetchone()
+                    full_at = max(row[0], now) if row else now
+                    excess = full_at + limit.interval - now - limit.burst * limit.interval
+                    if excess > EPSILON:
+                        retry_after = max(retry_after, excess)
+                    else:
+                        updates.append((key, full_at + limit.interval))
+                if not retry_after:
+                    self.conn.executemany('''
+                        INSERT INTO rate_limit_buckets (key, full_at) VALUES (?, ?)
+                        ON CONFLICT(key) DO UPDATE SET full_at = excluded.full_at
+                    ''', updates)
+                self.conn.execute("COMMIT")
+            except sqlite3.Error:
+                self.conn.execute("ROLLBACK")
+                raise
+
+            self._acquires += 1
+            if self._acquires % self.purge_every == 0:
+                self._purge(now)
+            return retry_after
+
+    def _purge(self, now: float):
+        """Delete buckets that have refilled completely."""
+        try:
+            cursor = self.conn.execute("DELETE FROM rate_limit_buckets WHERE full_at <= ?", (now,))
+            self._expired += cursor.rowcount
+        except sqlite3.Error as e:
+            logger.warning("Error purging rate limit buckets: %s", e)
+
+    def stats(self) -> CooldownStats:
+        with self._lock:
+            self._purge(self.clock())
+            size = self.conn.execute("SELECT COUNT(*) FROM rate_limit_buckets").fetchone()[0]
+        return CooldownStats(size=size, wheel_entries=0, expired=self._expired, evicted=0)
+
+    def close(self):
+        self.conn.close()
+
+def create_backend(name: str, db_path: Optional[str] = None, workers: int = 1) -> RateLimitBackend:
+    """Create a rate limit backend from its config name.
+
+    Args:
+        name (str): 'memory', 'sqlite', or 'auto' for 'sqlite' when several
+            worker processes share the limits and 'memory' otherwise
+        db_path (Optional[str]): Shared database file for the 'sqlite' backend
+        workers (int): Number of bot processes running side by side
+
+    Returns:
+        RateLimitBackend: The configured backend
+    """
+    if name == 'auto':
+        name = 'sqlite' if workers > 1 else 'memory'
+    if name == 'memory':
+        return MemoryBackend()
+    if name == 'sqlite':
+        if not db_path:
+            raise ValueError("The sqlite rate limit backend needs a database path")
+        return SQLiteBackend(db_path)
+    raise ValueError(f"Unknown rate limit backend: {name}")
+
+class RateLimiter:
+    """Per-command, per-user and per-guild token-bucket limiter."""
+
+    def __init__(self, limits: Dict[str, Dict[str, dict]],
+                 backend: Optional[RateLimitBackend] = None):
+        """Create a limiter from ``RATE_LIMITS``-style settings.
+
+        Args:
+            limits (Dict[str, Dict[str, dict]]): Maps command names to
+                ``{scope: {'burst': ..., 'rate': ...}}``. The ``'default'``
+                entry applies to commands without their own entry.
+            backend (Optional[RateLimitBackend]): Bucket storage, defaults
+                to a process-local ``MemoryBackend``
+        """
+        self.limits = {
+            command: {scope: RateLimit(**limit) for scope, limit in scopes.items()}
+            for command, scopes in limits.items()
+        }
+        self.backend = backend if backend is not None else MemoryBackend()
+
+    def limits_for(self, command: str) -> Dict[str, RateLimit]:
+        """Return the scope limits that apply to a command."""
+        return self.limits.get(command, self.limits.get('default', {}))
+
+    def acquire(self, command: str, user_id: int, guild_id: Optional[int] = None) -> float:
+        """Take a token from every bucket that applies to this command use.
+
+        Tokens are only taken if every scope has one available, so a use
+        rejected by the guild bucket does not cost the user a token.
+
+        Args:
+            command (str): Command name
+            user_id (int): Discord user ID
+            guild_id (Optional[int]): Discord server ID, None in DMs
+
+        Returns:
+            float: 0 if the command may run, otherwise seconds until it may
+        """
+        ids = {'user': user_id, 'guild': guild_id}
+        buckets = [
+            (f"{command}:{scope}:{ids[scope]}", limit)
+            for scope, limit in self.limits_for(command).items()
+            if ids.get(scope) is not None
+        ]
+        return self.backend.acquire(buckets) if buckets else 0.0
+
+    def stats(self) -> CooldownStats:
+        """Return the size and eviction counters of the bucket store."""
+        return self.backend.stats()
+
+    def close(self):
+        """Close the backend."""
+        self.backend.close()
@@ -0,0 +1,34 @@
+"""
+Parsing of time windows such as ``7d`` for command parameters.
+"""
+
+import re
+from typing import Optional
+
+_UNITS = {'m': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400}
+
+_WINDOW = re.compile(r'^\s*(\d+)\s*([mhdw])\s*$', re.IGNORECASE)
+
+def parse_window(text: str) -> Optional[int]:
+    """Parse a time window into seconds.
+
+    Args:
+        text (str): A count followed by a unit: m (minutes), h (hours),
+            d (days) or w (weeks), e.g. ``24h`` or ``7d``
+
+    Returns:
+        Optional[int]: The window in seconds, or None if ``text`` is not a
+            valid, non-zero window
+    """
+    match = _WINDOW.match(text or '')
+    if not match:
+        return None
+    seconds = int(match.group(1)) * _UNITS[match.group(2).lower()]
+    return seconds or None
+
+def format_window(seconds: int) -> str:
+    """Format a window in seconds using the largest unit that divides it."""
+    for unit, size in sorted(_UNITS.items(), key=lambda item: -item[1]):
+        if seconds % size == 0:
+            return f"{seconds // size}{unit}"
+    return f"{seconds}s"
@@ -0,0 +1,176 @@
+"""
+Interactive message views for BattleBuddy Discord bot.
+
+Currently provides the paginated ``/stats`` view. Discord embeds are limited
+to 25 fields, which the full stats list (one field per character) easily
+exceeds, so stats are shown one page at a time with buttons to move between
+pages. Each page is fetched from the database only when it is shown, and
+rendered pages are cached for a short time. Stats are shown either for the
+server the command was run in or across all servers.
+"""
+import logging
+import time
+from typing import List, NamedTuple, Optional, Tuple
+
+import discord
+
+from async_database import AsyncDatabase
+from utils.cache import TTLCache
+from utils.time_window import format_window
+
+logger = logging.getLogger(__name__)
+
+# Keyset cursor: (game, picks, character) of the last row on a page
+Cursor = Tuple[str, int, str]
+
+class StatsPage(NamedTuple):
+    """A rendered page of statistics."""
+    embed: discord.Embed
+    next_cursor: Optional[Cursor]
+
+class StatsPages:
+    """Fetches and renders ``/stats`` pages, caching rendered pages."""
+
+    def __init__(self, db: AsyncDatabase, page_size: int = 15, cache_ttl: float = 30.0,
+                 cache_size: int = 256):
+        """Create the page source.
+
+        Args:
+            db (AsyncDatabase): Database to read stats pages from
+            page_size (int): Characters per page
+            cache_ttl (float): Seconds a rendered page may be reused
+            cache_size (int): Maximum number of cached pages
+        """
+        self.db = db
+        self.page_size = page_size
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+
+    async def get(self, game: Optional[str], cursor: Optional[Cursor],
+                  window: Optional[int] = None, guild_id: Optional[int] = None) -> StatsPage:
+        """Return the page of stats that starts after ``cursor``.
+
+        Args:
+            game (Optional[str]): If provided, only this game's stats
+            cursor (Optional[Cursor]): Last row of the previous page, None
+                for the first page
+            window (Optional[int]): If provided, only count picks from the
+                last ``window`` seconds
+            guild_id (Optional[int]): If provided, only count picks made in
+                this guild, otherwise picks from all guilds
+
+        Returns:
+            StatsPage: The rendered page. Its embed is shared with the
+                cache, so copy it before adding per-request fields.
+        """
+        key = (game, cursor, window, guild_id)
+        page = self.cache.get(key)
+        if page is None:
+            since = int(time.time()) - window if window else None
+            # Fetch one extra row to find out whether there is a next page
+            rows = await self.db.get_character_stats_page(game, cursor, self.page_size + 1,
+                                                          since, guild_id)
+            page = self.render(rows[:self.page_size], len(rows) > self.page_size, window,
+                               guild_id is not None)
+            self.cache.set(key, page)
+        return page
+
+    @staticmethod
+    def render(rows: List[Tuple[str, str, int]], has_more: bool,
+               window: Optional[int] = None, in_guild: bool = False) -> StatsPage:
+        """Render stats rows as an embed with one field per game.
+
+        Args:
+            rows (List[Tuple[str, str, int]]): (game, character, picks) rows
+            has_more (bool): Whether another page follows this one
+            window (Optional[int]): Window in seconds the picks were counted over
+            in_guild (bool): Whether only picks from one server were counted
+
+        Returns:
+            StatsPage: The rendered page
+        """
+        scope = " in this server" if in_guild else ""
+        embed = discord.Embed(
+            title="Character Statistics",
+            description=(f"Character picks{scope} in the last {format_window(window)}:"
+                         if window else f"Character pick statistics{scope}:"),
+            color=discord.Color.blue()
+        )
+        lines: List[str] = []
+        for index, (game, character, picks) in enumerate(rows):
+            lines.append(f"**{character}** - Picks: {picks}")
+            if index + 1 == len(rows) or rows[index + 1][0] != game:
+                embed.add_field(name=game.capitalize(), value="\n".join(lines), inline=False)
+                lines = []
+        last = rows[-1] if rows else None
+        next_cursor = (last[0], last[2], last[1]) if last and has_more else None
+        return StatsPage(embed, next_cursor)
+
+class StatsView(discord.ui.View):
+    """Previous/next buttons for paging through ``/stats``.
+
+    Keyset pagination only moves forward, so the view remembers the cursor
+    each visited page started at to be able to go back.
+    """
+
+    def __init__(self, pages: StatsPages, game: Optional[str], first_page: StatsPage,
+                 author: discord.abc.User, timeout: float = 120,
+                 window: Optional[int] = None, guild_id: Optional[int] = None):
+        """Create the view for a ``/stats`` response.
+
+        Args:
+            pages (StatsPages): Page source
+            game (Optional[str]): Game filter the command was run with
+            first_page (StatsPage): The page shown initially
+            author (discord.abc.User): User who ran the command; only they
+                can turn pages
+            timeout (float): Seconds of inactivity before the buttons stop working
+            window (Optional[int]): Time window the command was run with
+            guild_id (Optional[int]): Guild the stats are scoped to, None
+                for all guilds
+        """
+        super().__init__(timeout=timeout)
+        self.pages = pages
+        self.game = game
+        self.window = window
+        self.guild_id = guild_id
+        self.author = author
+        self.page = first_page
+        self.starts: List[Optional[Cursor]] = [None]
+        self._update_buttons()
+
+    def render(self) -> discord.Embed:
+        """Return the current page's embed with the per-request footer."""
+        embed = self.page.embed.copy()
+        embed.set_footer(text=f"Page {len(self.starts)} - Requested by {self.author.name}")
+        return embed
+
+    def _update_buttons(self):
+        self.previous_page.disabled = len(self.starts) == 1
+        self.next_page.disabled = self.page.next_cursor is None
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """Only let the user who ran the command turn pages."""
+        if interaction.user.id != self.author.id:
+            await interaction.response.send_message(
+                "Run /stats yourself to browse the statistics.",
+                ephemeral=True
+            )
+            return False
+        return True
+
+    async def _show(self, interaction: discord.Interaction, cursor: Optional[Cursor]):
+        self.page = await self.pages.get(self.game, cursor, self.window, self.guild_id)
+        self._update_buttons()
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        """Show the previous page."""
+        self.starts.pop()
+        await self._show(interaction, self.starts[-1])
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.primary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        """Show the next page."""
+        self.starts.append(self.page.next_cursor)
+        await self._show(interaction, self.page.next_cursor)
@@ -0,0 +1,53 @@
+"""
+Benchmark autocomplete lookups per second.
+
+Replays every prefix of every character name (as if typed one keystroke
+at a time), plus a set of misspellings that need the fuzzy fallback,
+against the League of Legends index (the largest roster) and the index
+of every character across all games.
+
+Usage:
+    python benchmarks/bench_autocomplete.py [--rounds N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'battlebuddy'))
+
+from autocomplete import build_autocomplete  # noqa: E402
+from config import ROSTER_PATH  # noqa: E402
+from roster import load_roster  # noqa: E402
+
+TYPOS = ['wriath', 'octnae', 'kaisa', 'yasou', 'jnix', 'mercyy', 'reinhart', 'blodhound']
+
+def bench(name: str, index, queries: list, rounds: int):
+    """Print lookups per second and mean latency for ``queries``."""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for query in queries:
+            index.search(query)
+    elapsed = time.perf_counter() - start
+    lookups = rounds * len(queries)
+    print(f"{name:<28} {lookups / elapsed:>10.0f} lookups/s   {elapsed / lookups * 1e6:6.2f}us/lookup")
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    autocomplete = build_autocomplete(load_roster(ROSTER_PATH))
+    lol = autocomplete.characters['lol']
+    keystrokes = [name[:i] for name in lol.names for i in range(1, len(name) + 1)]
+    bench('lol keystrokes', lol, keystrokes, args.rounds)
+    bench('lol typos (fuzzy)', lol, TYPOS, args.rounds * 100)
+
+    everyone = autocomplete.all_characters
+    keystrokes = [name[:i] for name in everyone.names for i in range(1, len(name) + 1)]
+    bench('all games keystrokes', everyone, keystrokes, args.rounds)
+    bench('all games typos (fuzzy)', everyone, TYPOS, args.rounds * 100)
+
+if __name__ == '__main__':
+    main()
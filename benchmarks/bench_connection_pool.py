@@ -0,0 +1,60 @@
+"""
+Microbenchmark pooled connections against connect-per-call.
+
+Runs the same mix of ``Database`` operations (write-through pick, favorite
+lookup, favorite add/remove) with the pooled WAL connections and with the
+previous behaviour of opening a new ``sqlite3.connect`` for every query,
+and prints ops/sec for each.
+
+Usage:
+    python benchmarks/bench_connection_pool.py [--ops N]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'battlebuddy'))
+
+from database import Database  # noqa: E402
+
+class ConnectPerCallDatabase(Database):
+    """``Database`` with the old connect-per-call behaviour and no PRAGMAs."""
+
+    def get_connection(self):
+        return sqlite3.connect(self.db_path)
+
+OPERATIONS = {
+    'record_pick': lambda db, i: db.record_character_pick('apex', f'char{i % 26}'),
+    'get_favorites': lambda db, i: db.get_favorites(i % 100),
+    'toggle_favorite': lambda db, i: (db.add_favorite(i, 'apex', 'Wraith'),
+                                      db.remove_favorite(i, 'apex', 'Wraith')),
+}
+
+def bench(db: Database, operation, ops: int) -> float:
+    """Return operations per second for ``operation``."""
+    start = time.perf_counter()
+    for i in range(ops):
+        operation(db, i)
+    return ops / (time.perf_counter() - start)
+
+def main():
+    """Run every operation against both connection strategies."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--ops', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = ConnectPerCallDatabase(os.path.join(tmp, 'legacy.db'), pragmas={})
+        pooled = Database(os.path.join(tmp, 'pooled.db'))
+        print(f"{'operation':<16} {'connect/call':>14} {'pooled+WAL':>14} {'speedup':>8}")
+        for name, operation in OPERATIONS.items():
+            before = bench(legacy, operation, args.ops)
+            after = bench(pooled, operation, args.ops)
+            print(f"{name:<16} {before:>10.0f} op/s {after:>10.0f} op/s {after / before:>7.1f}x")
+        pooled.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark event-loop lag while slash commands hit the database.
+
+Simulates many concurrent command handlers that each record a pick and
+read stats, first calling the blocking ``Database`` directly on the event
+loop and then going through ``AsyncDatabase``. A ticker coroutine sleeps
+for 1ms in a loop and records how late it wakes up; that overshoot is the
+lag every other interaction (and the gateway heartbeat) would see.
+
+Usage:
+    python benchmarks/bench_event_loop_lag.py [--commands N] [--concurrency C]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'battlebuddy'))
+
+from async_database import AsyncDatabase  # noqa: E402
+from database import Database  # noqa: E402
+
+TICK = 0.001
+
+async def measure_lag(stop: asyncio.Event, samples: list):
+    """Record how late a 1ms sleep wakes up until stopped."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        samples.append(time.perf_counter() - start - TICK)
+
+async def sync_command(db: Database, i: int):
+    """A handler that calls the blocking database on the event loop."""
+    db.record_character_pick('apex', f'char{i % 26}')
+    db.get_favorites(i)
+    await asyncio.sleep(0)
+
+async def async_command(db: AsyncDatabase, i: int):
+    """A handler that awaits the async facade."""
+    await db.record_character_pick('apex', f'char{i % 26}')
+    await db.get_favorites(i)
+
+async def run(handler, db, commands: int, concurrency: int):
+    """Run ``commands`` handlers, ``concurrency`` at a time, while measuring lag."""
+    samples: list = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(measure_lag(stop, samples))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(i):
+        async with semaphore:
+            await handler(db, i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(limited(i) for i in range(commands)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    return elapsed, samples
+
+def report(name: str, elapsed: float, samples: list, commands: int):
+    """Print throughput and lag percentiles."""
+    samples = sorted(samples) or [0.0]
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{name:<14} {commands / elapsed:>10.0f} cmd/s   "
+          f"lag p50 {statistics.median(samples) * 1000:7.2f}ms   "
+          f"p99 {p99 * 1000:7.2f}ms   max {samples[-1] * 1000:7.2f}ms")
+
+def main():
+    """Run the benchmark for both database front-ends."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--commands', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Write-through picks so both runs pay for a commit per command
+        sync_db = Database(os.path.join(tmp, 'sync.db'))
+        elapsed, samples = asyncio.run(run(sync_command, sync_db, args.commands, args.concurrency))
+        report('Database', elapsed, samples, args.commands)
+
+        async_db = AsyncDatabase(Database(os.path.join(tmp, 'async.db')))
+        elapsed, samples = asyncio.run(run(async_command, async_db, args.commands, args.concurrency))
+        async_db.close()
+        report('AsyncDatabase', elapsed, samples, args.commands)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark event-loop lag caused by logging.
+
+Simulates many concurrent command handlers that each hit an error path
+and log it with a traceback, first with the handlers ``bot.py`` used to
+install directly on the root logger (a ``FileHandler`` and a
+``StreamHandler``, both writing on the calling thread) and then with
+``setup_logging``, which only queues records. A run with logging
+disabled gives the baseline. The lag is measured as in
+``bench_event_loop_lag.py``: how late a 1ms sleep wakes up.
+
+Console output goes to a file so the terminal does not skew the numbers.
+
+Usage:
+    python benchmarks/bench_logging_lag.py [--commands N] [--concurrency C]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'battlebuddy'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_event_loop_lag import measure_lag, report  # noqa: E402
+from utils.logging_setup import TEXT_FORMAT, setup_logging, stop_logging  # noqa: E402
+
+logger = logging.getLogger('bench')
+
+async def command(i: int):
+    """A handler that fails and logs the error, as every command's except block does."""
+    try:
+        raise LookupError(f"character {i} not found")
+    except LookupError as e:
+        logger.exception("Error in who command: %s", e)
+    await asyncio.sleep(0)
+
+async def run(commands: int, concurrency: int):
+    """Run ``commands`` handlers, ``concurrency`` at a time, while measuring lag."""
+    samples: list = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(measure_lag(stop, samples))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(i):
+        async with semaphore:
+            await command(i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(limited(i) for i in range(commands)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    return elapsed, samples
+
+def main():
+    """Run the benchmark for both logging setups."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--commands', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.path.join(tmp, 'console.log'), 'w') as console:
+        # Both setups write their console output to stderr
+        sys.stderr = console
+        try:
+            # Baseline: the same handlers with nothing logged
+            logger.disabled = True
+            elapsed, samples = asyncio.run(run(args.commands, args.concurrency))
+            report('no logging', elapsed, samples, args.commands)
+            logger.disabled = False
+
+            root = logging.getLogger()
+            root.setLevel(logging.INFO)
+            handlers = [logging.FileHandler(os.path.join(tmp, 'direct.log')), logging.StreamHandler()]
+            for handler in handlers:
+                handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+                root.addHandler(handler)
+            elapsed, samples = asyncio.run(run(args.commands, args.concurrency))
+            report('direct', elapsed, samples, args.commands)
+            for handler in handlers:
+                root.removeHandler(handler)
+                handler.close()
+
+            setup_logging(os.path.join(tmp, 'queued.log'))
+            elapsed, samples = asyncio.run(run(args.commands, args.concurrency))
+            start = time.perf_counter()
+            stop_logging()
+            drained = time.perf_counter() - start
+            report('queued', elapsed, samples, args.commands)
+            print(f"{'':<14} listener finished writing {drained * 1000:.0f}ms after the last command")
+        finally:
+            sys.stderr = sys.__stderr__
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark the overhead of command and query instrumentation.
+
+Times a trivial command callback and a trivial query method with and
+without ``timed_command`` / ``timed_query``, so the difference is
+the cost of the instrumentation itself. Real commands take milliseconds,
+so anything in the low microseconds is negligible.
+
+Usage:
+    python benchmarks/bench_metrics.py [--calls N]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'battlebuddy'))
+
+from metrics import Metrics, phase, timed_command, timed_query  # noqa: E402
+
+class Store:
+    """Stand-in for ``Database`` with one cheap method."""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def lookup(self, key):
+        return key
+
+    @timed_query
+    def timed_lookup(self, key):
+        return key
+
+async def command(interaction):
+    """A command that does no work besides one awaited database phase."""
+    with phase('db'):
+        pass
+    return interaction
+
+def report(name: str, elapsed: float, calls: int):
+    """Print the mean time per call."""
+    print(f"{name:<24} {elapsed / calls * 1e6:6.2f}us/call")
+
+async def bench_commands(calls: int, metrics: Metrics):
+    """Time the bare and the instrumented command."""
+    interaction = SimpleNamespace(client=SimpleNamespace(metrics=metrics))
+    for name, callback in (('command', command), ('command + metrics', timed_command(command))):
+        start = time.perf_counter()
+        for _ in range(calls):
+            await callback(interaction)
+        report(name, time.perf_counter() - start, calls)
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--calls', type=int, default=200_000)
+    args = parser.parse_args()
+
+    metrics = Metrics()
+    asyncio.run(bench_commands(args.calls, metrics))
+
+    store = Store(metrics)
+    for name, method in (('query', store.lookup), ('query + metrics', store.timed_lookup)):
+        start = time.perf_counter()
+        for i in range(args.calls):
+            method(i)
+        report(name, time.perf_counter() - start, args.calls)
+
+if __name__ == '__main__':
+    main()
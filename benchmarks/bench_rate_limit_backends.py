@@ -0,0 +1,74 @@
+"""
+Benchmark rate limiter check latency for each backend.
+
+Times ``RateLimiter.acquire`` for the ``/who`` limits (user and guild
+buckets) against the in-memory backend and the shared SQLite backend,
+optionally with several processes hammering the same SQLite file to
+simulate shards. The target is a p99 under 100us.
+
+Usage:
+    python benchmarks/bench_rate_limit_backends.py [--checks N] [--processes P] [--path FILE]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'battlebuddy'))
+
+from config import RATE_LIMITS  # noqa: E402
+from utils.rate_limit import MemoryBackend, RateLimiter, SQLiteBackend  # noqa: E402
+
+def time_checks(limiter: RateLimiter, checks: int, offset: int = 0) -> list:
+    """Return the latency of ``checks`` acquires, in seconds."""
+    samples = []
+    for i in range(checks):
+        start = time.perf_counter()
+        limiter.acquire('who', offset + i % 5000, i % 50)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def worker(path: str, checks: int, offset: int, results):
+    """Run checks from a separate process against the shared file."""
+    limiter = RateLimiter(RATE_LIMITS, SQLiteBackend(path))
+    results.put(time_checks(limiter, checks, offset))
+    limiter.close()
+
+def report(name: str, samples: list):
+    """Print latency percentiles in microseconds."""
+    samples.sort()
+    pct = lambda p: samples[min(len(samples) - 1, int(len(samples) * p))] * 1e6  # noqa: E731
+    print(f"{name:<28} p50 {pct(0.50):7.1f}us   p99 {pct(0.99):7.1f}us   max {samples[-1] * 1e6:8.1f}us")
+
+def main():
+    """Run the benchmark for each backend."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--checks', type=int, default=20000)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--path', help='SQLite file to use, e.g. /dev/shm/ratelimits.db')
+    args = parser.parse_args()
+
+    report('memory', time_checks(RateLimiter(RATE_LIMITS, MemoryBackend()), args.checks))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.path or os.path.join(tmp, 'ratelimits.db')
+        limiter = RateLimiter(RATE_LIMITS, SQLiteBackend(path))
+        report('sqlite (1 process)', time_checks(limiter, args.checks))
+
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=worker, args=(path, args.checks, n * 100000, results))
+            for n in range(args.processes)
+        ]
+        for process in workers:
+            process.start()
+        samples = [sample for _ in workers for sample in results.get()]
+        for process in workers:
+            process.join()
+        report(f'sqlite ({args.processes} processes)', samples)
+        limiter.close()
+
+if __name__ == '__main__':
+    main()
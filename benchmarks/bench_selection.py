@@ -0,0 +1,55 @@
+"""
+Benchmark weighted character draws per second.
+
+Compares drawing a League of Legends champion (the largest roster) with
+``random.choices`` over a freshly computed weight list, which is what
+reweighting per call costs, against the cached alias tables of
+``SelectionEngine`` for each selection mode.
+
+Usage:
+    python benchmarks/bench_selection.py [--draws N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'battlebuddy'))
+
+from config import ROSTER_PATH  # noqa: E402
+from roster import load_roster  # noqa: E402
+from selection import MODES, SelectionEngine  # noqa: E402
+
+def bench(name: str, draw, draws: int):
+    """Print draws per second and mean latency of ``draw``."""
+    start = time.perf_counter()
+    for _ in range(draws):
+        draw()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {draws / elapsed:>10.0f} draws/s   {elapsed / draws * 1e6:6.2f}us/draw")
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--draws', type=int, default=100_000)
+    args = parser.parse_args()
+
+    roster = load_roster(ROSTER_PATH)
+    champions = roster.games['lol'].characters
+    favorites = frozenset(champions[::20])
+
+    def reweight_per_call():
+        weights = [3.0 if name in favorites else 1.0 for name in champions]
+        return random.choices(champions, weights)[0]
+
+    bench('random.choices reweighted', reweight_per_call, args.draws)
+
+    engine = SelectionEngine()
+    for user_id, name in enumerate(champions[:10]):
+        engine.record_pick('lol', name, user_id)
+    for mode in MODES:
+        bench(f'engine {mode}', lambda: engine.pick(roster.games['lol'], None, mode, 1, favorites), args.draws)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+"""
+Offline load test for the slash commands.
+
+Builds a bot with ``bot.create_bot`` without connecting to Discord and
+calls the command callbacks directly with stub interactions, from many simulated users at
+once on one event loop. Everything the bot writes (database, logs, rate
+limit and command sync state) goes to a temporary directory.
+
+Reports throughput and p50/p95/p99 latency per command, plus the error
+count, mean database time and deferred responses recorded by the bot's
+own metrics. Save a
+run with ``--save`` and check later runs against it with ``--compare``;
+the exit code is 1 if p50, p95 or throughput got worse by more than
+``--tolerance``.
+
+Usage:
+    python benchmarks/load_test.py [--users N] [--commands-per-user K]
+        [--mix who=4,stats=1] [--api-latency MS] [--save FILE] [--compare FILE]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+BATTLEBUDDY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'battlebuddy')
+sys.path.insert(0, BATTLEBUDDY_DIR)
+
+DEFAULT_MIX = {'who': 40, 'random': 15, 'stats': 15, 'favorite': 10,
+               'favorites': 10, 'team': 5, 'help': 5}
+
+# Never rejects, but still runs every command through the limiter
+UNLIMITED = {'default': {'user': {'burst': 10 ** 9, 'rate': 10 ** 9},
+                         'guild': {'burst': 10 ** 9, 'rate': 10 ** 9}}}
+
+class StubResponse:
+    """Records what a command sends instead of calling Discord."""
+
+    def __init__(self, api_latency: float):
+        self.api_latency = api_latency
+        self.messages: List[tuple] = []
+        self._done = False
+
+    async def _call(self, *args, **kwargs):
+        if self.api_latency:
+            await asyncio.sleep(self.api_latency)
+        self.messages.append((args, kwargs))
+        self._done = True
+
+    send_message = edit_message = _call
+
+    async def defer(self, *args, **kwargs):
+        await self._call()
+
+    def is_done(self) -> bool:
+        return self._done
+
+class StubFollowup:
+    """Records follow-up messages."""
+
+    def __init__(self, response: StubResponse):
+        self.response = response
+
+    async def send(self, *args, **kwargs):
+        await self.response._call(*args, **kwargs)
+
+def stub_interaction(client, user_id: int, guild_id: int, api_latency: float) -> SimpleNamespace:
+    """Build the parts of ``discord.Interaction`` the commands use."""
+    response = StubResponse(api_latency)
+    return SimpleNamespace(
+        client=client,
+        user=SimpleNamespace(id=user_id, name=f'user{user_id}'),
+        guild_id=guild_id,
+        guild=None,
+        command=None,
+        permissions=SimpleNamespace(administrator=False),
+        response=response,
+        followup=StubFollowup(response),
+    )
+
+def command_arguments(command: str, roster, rng: random.Random) -> dict:
+    """Pick realistic arguments for a command."""
+    game = rng.choice(roster.game_names)
+    game_index = roster.games[game]
+    if command == 'who':
+        role = rng.choice(game_index.roles) if rng.random() < 0.3 else None
+        mode = rng.choice([None, None, 'favorites', 'fresh', 'avoid_recent'])
+        return {'game': game, 'role': role, 'mode': mode}
+    if command == 'random':
+        return {'mode': rng.choice([None, 'fresh'])}
+    if command == 'stats':
+        return {'game': rng.choice([None, game]), 'window': rng.choice([None, None, '24h', '7d']),
+                'scope': rng.choice([None, None, 'global'])}
+    if command == 'favorite':
+        return {'game': game, 'character': rng.choice(game_index.characters)}
+    if command == 'team':
+        return {'game': rng.choice([name for name in roster.game_names
+                                    if roster.games[name].settings.get('max_team_size')])}
+    return {}
+
+def percentile(samples: List[float], q: float) -> float:
+    """Return the nearest-rank percentile of sorted samples."""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+async def run_load(bot, args) -> Dict[str, dict]:
+    """Replay the workload and return results per command."""
+    # Open the database and roster up front, as the bot does before connecting
+    await bot.setup_hook()
+    commands = {command.name: command for command in bot.tree.get_commands()}
+    mix = {name: weight for name, weight in args.mix.items() if name in commands}
+    names, weights = list(mix), list(mix.values())
+    samples: Dict[str, List[float]] = {name: [] for name in names}
+    raised: Dict[str, int] = dict.fromkeys(names, 0)
+    api_latency = args.api_latency / 1000
+    start_line = asyncio.Event()
+
+    async def user(user_id: int):
+        rng = random.Random(args.seed * 1_000_003 + user_id)
+        guild_id = rng.randrange(args.guilds)
+        await start_line.wait()
+        for _ in range(args.commands_per_user):
+            name = rng.choices(names, weights)[0]
+            kwargs = command_arguments(name, bot.roster_store.current.roster, rng)
+            interaction = stub_interaction(bot, user_id, guild_id, api_latency)
+            started = time.perf_counter()
+            try:
+                await commands[name].callback(interaction, **kwargs)
+            except Exception:
+                raised[name] += 1
+            samples[name].append(time.perf_counter() - started)
+            if args.think:
+                await asyncio.sleep(rng.uniform(0, args.think))
+
+    tasks = [asyncio.create_task(user(user_id)) for user_id in range(args.users)]
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    start_line.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    await bot.db.flush_picks()
+
+    summaries = {summary.command: summary for summary in bot.metrics.command_summary()}
+    results = {}
+    for name in names:
+        latencies = sorted(samples[name])
+        summary = summaries.get(name)
+        results[name] = {
+            'count': len(latencies),
+            'throughput': len(latencies) / elapsed,
+            'p50': percentile(latencies, 0.50),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+            'errors': raised[name] + (summary.errors if summary else 0),
+            'mean_db': summary.mean_db if summary else 0.0,
+            'deferred': summary.deferred if summary else 0,
+        }
+    latencies = sorted(latency for command_samples in samples.values() for latency in command_samples)
+    total = len(latencies)
+    results['total'] = {
+        'count': total,
+        'throughput': total / elapsed,
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+        'errors': sum(result['errors'] for result in results.values()),
+        'mean_db': sum(result['mean_db'] * result['count'] for result in results.values()) / max(1, total),
+        'deferred': sum(result['deferred'] for result in results.values()),
+    }
+    return results
+
+def print_results(results: Dict[str, dict]):
+    """Print a table of the results."""
+    print(f"{'command':<10} {'count':>7} {'cmd/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} "
+          f"{'errors':>7} {'db avg':>8} {'deferred':>8}")
+    for name, result in results.items():
+        print(f"{name:<10} {result['count']:>7} {result['throughput']:>9.0f} "
+              f"{result['p50'] * 1000:>7.2f}ms {result['p95'] * 1000:>7.2f}ms "
+              f"{result['p99'] * 1000:>7.2f}ms {result['errors']:>7} "
+              f"{result['mean_db'] * 1000:>6.2f}ms {result.get('deferred', 0):>8}")
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """List the figures that got worse than the baseline by more than ``tolerance``."""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        for key in ('p50', 'p95'):
+            if before[key] and result[key] > before[key] * (1 + tolerance):
+                regressions.append(f"{name} {key}: {before[key] * 1000:.2f}ms -> {result[key] * 1000:.2f}ms")
+        if result['throughput'] < before['throughput'] * (1 - tolerance):
+            regressions.append(f"{name} throughput: {before['throughput']:.0f} -> "
+                               f"{result['throughput']:.0f} cmd/s")
+        if result['errors'] > before['errors']:
+            regressions.append(f"{name} errors: {before['errors']} -> {result['errors']}")
+    return regressions
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """Parse ``who=4,stats=1`` into command weights."""
+    mix = {}
+    for item in text.split(','):
+        name, _, weight = item.partition('=')
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the load test."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=2000, help="concurrent simulated users")
+    parser.add_argument('--commands-per-user', type=int, default=5)
+    parser.add_argument('--guilds', type=int, default=50, help="servers the users are spread over")
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help="command weights, e.g. who=4,stats=1 (default: %(default)s)")
+    parser.add_argument('--api-latency', type=float, default=0.0,
+                        help="simulated Discord API latency per response, in ms")
+    parser.add_argument('--think', type=float, default=0.0,
+                        help="maximum random pause between a user's commands, in seconds")
+    parser.add_argument('--rate-limits', action='store_true',
+                        help="apply the configured rate limits instead of unlimited buckets")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help="write the results to this JSON file")
+    parser.add_argument('--compare', help="fail if results are worse than this saved run")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed relative slowdown for --compare (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+    save_path = os.path.abspath(args.save) if args.save else None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The bot keeps its files relative to the working directory
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            import logging
+            from bot import create_bot, load_settings
+            from utils.logging_setup import setup_logging
+            setup_logging(None, level=logging.WARNING)
+            # Every user starts at once; let them all wait for a command slot
+            overrides = {'COMMAND_QUEUE_SIZE': args.users}
+            if not args.rate_limits:
+                overrides['RATE_LIMITS'] = UNLIMITED
+            bot = create_bot(load_settings(**overrides))
+            results = asyncio.run(run_load(bot, args))
+            bot.shutdown()
+        finally:
+            os.chdir(cwd)
+
+    print_results(results)
+    if save_path:
+        with open(save_path, 'w', encoding='utf-8') as results_file:
+            json.dump(results, results_file, indent=2)
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
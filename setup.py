@@ -16,6 +16,7 @@ setup(
     long_description_content_type="text/markdown",
     url="https://github.com/w0rm/battlebuddy",
     packages=find_packages(),
+    package_data={"battlebuddy": ["data/*.json"]},
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",